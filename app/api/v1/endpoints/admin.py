@@ -0,0 +1,50 @@
+import logging
+from typing import Dict, Any
+
+from fastapi import APIRouter
+from starlette.concurrency import run_in_threadpool
+
+from app.services.pdf_parser import extraction_cache
+from app.services.rate_limiter import governor
+from app.services.resilience import circuit_breakers
+from app.services.result_cache import analysis_cache, parse_cache
+from app.services.usage import process_usage
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+def _cache_stats() -> Dict[str, Any]:
+    return {
+        "pdf_extraction": extraction_cache.stats(),
+        "parse_results": parse_cache.stats(),
+        "analysis_results": analysis_cache.stats(),
+    }
+
+
+@router.get("/admin/cache-stats", response_model=Dict[str, Any], tags=["Admin"])
+async def cache_stats():
+    """Hit/miss counters for this worker process's caches."""
+    # Counting the disk tiers' entries queries SQLite under each cache's lock, so it runs in the thread pool
+    return await run_in_threadpool(_cache_stats)
+
+
+@router.get("/admin/rate-limits", response_model=Dict[str, Any], tags=["Admin"])
+async def rate_limit_stats():
+    """Queue depth, in-flight calls and wait times per provider/model limiter in this worker process."""
+    return governor.stats()
+
+
+@router.get("/admin/circuit-breakers", response_model=Dict[str, Any], tags=["Admin"])
+async def circuit_breaker_stats():
+    """Circuit state and failure counts per provider in this worker process."""
+    return circuit_breakers.stats()
+
+
+@router.get("/usage", response_model=Dict[str, Any], tags=["Admin"])
+async def usage_stats():
+    """
+    Model calls, tokens, cost, time to first token and tokens per second per model type in this
+    worker process; /metrics has the token and cost counters of all workers.
+    """
+    return {"total": process_usage.summary(), "models": process_usage.by_model()}
@@ -1,75 +1,358 @@
+import asyncio
+import io
+import json
 import logging
-import os
+import time
 import traceback
+import zipfile
 
-from fastapi import APIRouter, File, UploadFile, HTTPException, Query, Body
-
-# Define temp directory relative to project root
-TEMP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "temp")
+from fastapi import APIRouter, File, UploadFile, HTTPException, Query, Body, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
+from app.config import settings
 from app.models.cv_model import CVModel
-from typing import Dict, Any
+from app.models.rank_model import RankResponse
+from typing import Dict, Any, List, Optional, Tuple
 from app.services.cv_processor import CVProcessor
-from app.services.pdf_parser import PDFParser
-from app.utils.models import ModelType
+from app.services.cv_store import cv_store
+from app.services.execution import pools
+from app.services.pipeline import extract_document, parse_document, store_parse
+from app.services.ranking import rank_candidates
+from app.services.resilience import DeadlineExceededError, ProviderUnavailableError
+from app.services.scoring import ScoringEngine
+from app.services.usage import UsageTally, collect_usage
+from app.utils.file_utils import UploadTooLargeError, read_upload
+from app.utils.models import AnalysisMode, AnalysisSection, DedupMode, ModelType, ParseMode
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
 @router.post("/parse-cv/", response_model=CVModel, tags=["CV Processing"])
-async def parse_cv(file: UploadFile = File(...),
-                   model_type: ModelType = Query(..., description="Parsing model to use")):
+async def parse_cv(response: Response,
+                   file: UploadFile = File(...),
+                   model_type: ModelType = Query(..., description="Parsing model to use"),
+                   bypass_cache: bool = Query(False, description="Ignore cached parse results and call the model"),
+                   fallback: Optional[List[ModelType]] = Query(None, description="Models to fail over to, in order"),
+                   hedge_delay: Optional[float] = Query(None, ge=0, description="Seconds before also trying the next fallback model"),
+                   mode: Optional[ParseMode] = Query(None, description="single: one call for the whole CV; chunked: one call per CV section, in parallel"),
+                   dedup: Optional[DedupMode] = Query(None, description="Near-duplicate handling: off, detect or reuse")):
     if file.content_type != "application/pdf":
         raise HTTPException(status_code=400, detail="File must be a PDF")
 
-    os.makedirs(TEMP_DIR, exist_ok=True)  # Ensure temp directory exists
-    file_path = os.path.join(TEMP_DIR, file.filename)
     try:
-        with open(file_path, "wb") as buffer:
-            buffer.write(file.file.read())
-        logger.info(f"File saved temporarily at {file_path}")
+        content = await read_upload(file, settings.upload_max_bytes, model_type)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
-        logger.error(f"Failed to save file: {e}")
+        logger.error(f"Failed to read file: {e}")
         raise HTTPException(status_code=500, detail="Failed to read or save uploaded file")
 
     try:
-        text = PDFParser.extract_text_from_pdf(file_path)
-        cv_data = CVProcessor.parse_cv(text=text, model_type=model_type)
+        report = {}
+        with collect_usage() as usage:
+            cv_data = await parse_document(content, file.filename, model_type, use_cache=not bypass_cache,
+                                           fallback=fallback, hedge_delay=hedge_delay, mode=mode, dedup=dedup,
+                                           report=report)
+        _set_report_headers(response, report)
+        _set_usage_headers(response, usage)
         logger.info("successfully parsed CV")
         return cv_data
+    except ProviderUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except DeadlineExceededError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         logger.error(f"Error processing CV: {e}")
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=400, detail=str(e))
-    finally:
-        # Ensure the temporary file is deleted
+
+def _set_report_headers(response: Response, report: dict):
+    extraction = report.get("extraction")
+    if extraction:
+        response.headers["X-Extraction-Tier"] = extraction["tier"]
+        if extraction["quality"] is not None:
+            response.headers["X-Extraction-Quality"] = str(extraction["quality"])
+    if report.get("cv_id") is not None:
+        response.headers["X-CV-Id"] = str(report["cv_id"])
+    near_duplicate = report.get("near_duplicate")
+    if near_duplicate:
+        response.headers["X-Near-Duplicate-Of"] = str(near_duplicate["cv_id"])
+        response.headers["X-Near-Duplicate-Similarity"] = str(near_duplicate["similarity"])
+        response.headers["X-Near-Duplicate-Reused"] = str(near_duplicate["reused"]).lower()
+        if near_duplicate["changed_fields"]:
+            response.headers["X-Near-Duplicate-Changed-Fields"] = ",".join(near_duplicate["changed_fields"])
+
+
+def _set_usage_headers(response: Response, usage: UsageTally):
+    """Tokens, cost and speed of the model calls the request made (all zero when served from cache)."""
+    summary = usage.summary()
+    response.headers["X-Usage-Calls"] = str(summary["calls"])
+    response.headers["X-Usage-Prompt-Tokens"] = str(summary["prompt_tokens"])
+    response.headers["X-Usage-Completion-Tokens"] = str(summary["completion_tokens"])
+    response.headers["X-Usage-Cost-USD"] = f"{summary['cost_usd']:.6f}"
+    if summary["estimated_calls"]:
+        response.headers["X-Usage-Estimated"] = "true"
+    if summary["tokens_per_second"] is not None:
+        response.headers["X-Usage-Tokens-Per-Second"] = str(summary["tokens_per_second"])
+    if summary["time_to_first_token_seconds"] is not None:
+        response.headers["X-Usage-Time-To-First-Token"] = str(summary["time_to_first_token_seconds"])
+
+
+def _is_zip(file: UploadFile) -> bool:
+    return file.content_type in ("application/zip", "application/x-zip-compressed") \
+        or (file.filename or "").lower().endswith(".zip")
+
+
+class BatchTooLargeError(ValueError):
+    """The batch as a whole has more files or bytes than allowed; the request is rejected with 413."""
+
+
+def _check_batch(files: int, size: int):
+    if files > settings.batch_max_files:
+        raise BatchTooLargeError(f"Batch exceeds {settings.batch_max_files} files")
+    if size > settings.batch_upload_max_bytes:
+        raise BatchTooLargeError(f"Batch exceeds {settings.batch_upload_max_bytes} uncompressed bytes")
+
+
+def _unpack_zip(filename: str, content: bytes, files_before: int = 0,
+                size_before: int = 0) -> List[Tuple[str, bytes]]:
+    """
+    PDF members of a ZIP archive. The member count and uncompressed sizes from the archive's
+    directory are checked against the batch limits (on top of the files and bytes already in the
+    batch) before anything is decompressed.
+    """
+    with zipfile.ZipFile(io.BytesIO(content)) as archive:
+        members = [member for member in archive.infolist()
+                   if not member.is_dir() and not member.filename.startswith("__MACOSX/")
+                   and member.filename.lower().endswith(".pdf")]
+        _check_batch(files_before + len(members), size_before + sum(member.file_size for member in members))
+        for member in members:
+            if member.file_size > settings.upload_max_bytes:
+                raise UploadTooLargeError(
+                    f"{member.filename} exceeds the {settings.upload_max_bytes} byte upload limit")
+        return [(f"{filename}/{member.filename}", archive.read(member)) for member in members]
+
+
+async def _collect_documents(files: List[UploadFile],
+                             model_type: ModelType) -> Tuple[List[Tuple[str, bytes]], List[dict]]:
+    """
+    Read uploads into (filename, bytes) pairs, expanding ZIP archives; unusable uploads become error
+    lines. Raises BatchTooLargeError once the batch exceeds the file count or total size limit.
+    """
+    documents, errors = [], []
+    for file in files:
+        size = sum(len(content) for _, content in documents)
+        try:
+            if _is_zip(file):
+                content = await read_upload(file, settings.batch_upload_max_bytes, model_type)
+                documents.extend(await run_in_threadpool(_unpack_zip, file.filename, content, len(documents), size))
+            elif file.content_type == "application/pdf":
+                content = await read_upload(file, settings.upload_max_bytes, model_type)
+                _check_batch(len(documents) + 1, size + len(content))
+                documents.append((file.filename, content))
+            else:
+                errors.append({"filename": file.filename, "status": "error", "error": "File must be a PDF or ZIP"})
+        except zipfile.BadZipFile:
+            errors.append({"filename": file.filename, "status": "error", "error": "Invalid ZIP archive"})
+        except UploadTooLargeError as e:
+            errors.append({"filename": file.filename, "status": "error", "error": str(e)})
+    return documents, errors
+
+
+@router.post("/parse-cv/batch", tags=["CV Processing"],
+             response_class=StreamingResponse,
+             responses={200: {"content": {"application/x-ndjson": {}},
+                              "description": "One JSON object per line, in completion order"}})
+async def parse_cv_batch(files: List[UploadFile] = File(..., description="PDF files and/or ZIP archives of PDFs"),
+                         model_type: ModelType = Query(..., description="Parsing model to use"),
+                         concurrency: int = Query(settings.batch_concurrency, ge=1, le=settings.batch_max_concurrency,
+                                                  description="Number of CVs processed in parallel"),
+                         bypass_cache: bool = Query(False, description="Ignore cached parse results and call the model"),
+                         mode: Optional[ParseMode] = Query(None, description="single or chunked parsing"),
+                         dedup: Optional[DedupMode] = Query(None, description="Near-duplicate handling: off, detect or reuse")):
+    try:
+        documents, errors = await _collect_documents(files, model_type)
+    except BatchTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    slots = asyncio.Semaphore(concurrency)
+
+    async def parse_one(index: int, filename: str, content: bytes) -> dict:
+        async with slots:
+            started = time.perf_counter()
+            try:
+                report = {}
+                with collect_usage() as usage:
+                    cv_data = await parse_document(content, filename, model_type, use_cache=not bypass_cache,
+                                                   mode=mode, dedup=dedup, report=report)
+                line = {"status": "ok", "result": cv_data.model_dump(mode="json"), **report,
+                        "usage": usage.summary()}
+            except Exception as e:
+                logger.error(f"Error processing {filename} in batch: {e}")
+                line = {"status": "error", "error": str(e)}
+            return {"index": index, "filename": filename, **line,
+                    "elapsed_seconds": round(time.perf_counter() - started, 3)}
+
+    async def stream():
+        for error in errors:
+            yield json.dumps(error) + "\n"
+        tasks = [asyncio.create_task(parse_one(i, name, content)) for i, (name, content) in enumerate(documents)]
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                logger.info(f"Temporary file {file_path} removed successfully")
+            for next_done in asyncio.as_completed(tasks):
+                yield json.dumps(await next_done) + "\n"
+        finally:
+            # Client went away: stop the remaining work
+            for task in tasks:
+                task.cancel()
+
+    logger.info(f"Batch parse of {len(documents)} file(s) with concurrency {concurrency}")
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/parse-cv/stream", tags=["CV Processing"],
+             response_class=StreamingResponse,
+             responses={200: {"content": {"text/event-stream": {}},
+                              "description": "Server-Sent Events: one `section` event per completed CV field, "
+                                             "then a `result` event with the validated CV and a `usage` event "
+                                             "with the tokens and cost of the call (or an `error` event)"}})
+async def parse_cv_stream(file: UploadFile = File(...),
+                          model_type: ModelType = Query(..., description="Parsing model to use"),
+                          bypass_cache: bool = Query(False, description="Ignore cached parse results and call the model")):
+    if file.content_type != "application/pdf":
+        raise HTTPException(status_code=400, detail="File must be a PDF")
+    try:
+        content = await read_upload(file, settings.upload_max_bytes, model_type)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    async def events():
+        try:
+            report = {}
+            text = await extract_document(content, file.filename, report=report, model_type=model_type)
+            yield _sse("extracted", {"characters": len(text), **report["extraction"]})
+            with collect_usage() as usage:
+                async for kind, payload in pools.stream_llm(CVProcessor.stream_parse_cv, text, model_type,
+                                                            use_cache=not bypass_cache,
+                                                            lane=CVProcessor.provider(model_type)):
+                    if kind == "section":
+                        section, value = payload
+                        yield _sse("section", {"section": section, "value": value})
+                    else:
+                        await store_parse(content, file.filename, model_type, payload, text=text)
+                        yield _sse("result", payload.model_dump(mode="json"))
+            yield _sse("usage", usage.summary())
+            logger.info("successfully streamed CV")
         except Exception as e:
-            logger.error(f"Failed to remove temporary file: {e}")
+            logger.error(f"Error streaming CV: {e}")
+            logger.error(traceback.format_exc())
+            yield _sse("error", {"detail": str(e)})
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @router.post("/analyze-cv/", response_model=Dict[str, Any], tags=["CV Processing"])
 async def analyze_cv(
+    response: Response,
     job_title: str = Query(..., description="Job title for the position"),
     company_name: str = Query(..., description="Company name"),
     requirements: str = Query(..., description="Key job requirements"),
     model_type: ModelType = Query(..., description="Analysis model to use"),
+    bypass_cache: bool = Query(False, description="Ignore cached analysis results and call the model"),
+    fallback: Optional[List[ModelType]] = Query(None, description="Models to fail over to, in order"),
+    hedge_delay: Optional[float] = Query(None, ge=0, description="Seconds before also trying the next fallback model"),
+    mode: Optional[AnalysisMode] = Query(None, description="single: one call for the whole analysis; decomposed: one call per section, in parallel"),
+    sections: Optional[List[AnalysisSection]] = Query(None, description="Only generate these sections (default: all)"),
     cv_data: Dict[str, Any] = Body(..., description="CV data from previous parsing")
 ):
     try:
-        analysis = CVProcessor.analyze_cv(
-            cv_data=cv_data,
-            job_title=job_title,
-            company_name=company_name,
-            requirements=requirements,
-            model_type=model_type
-        )
+        with collect_usage() as usage:
+            analysis = await CVProcessor.analyze_cv_hedged(
+                cv_data=cv_data,
+                job_title=job_title,
+                company_name=company_name,
+                requirements=requirements,
+                model_type=model_type,
+                fallback=settings.analyze_fallback_chain if fallback is None else fallback,
+                hedge_delay=settings.analyze_hedge_delay_seconds if hedge_delay is None else hedge_delay,
+                use_cache=not bypass_cache,
+                mode=settings.analysis_mode if mode is None else mode,
+                sections=sections
+            )
+        _set_usage_headers(response, usage)
         logger.info("Successfully analyzed CV")
         return analysis
+    except ProviderUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except DeadlineExceededError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         logger.error(f"Error analyzing CV: {e}")
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/score-cv/", response_model=Dict[str, Any], tags=["CV Processing"])
+async def score_cv(
+    requirements: str = Query(..., description="Key job requirements, e.g. '5+ years of Python, Kubernetes and AWS'"),
+    cv_data: Dict[str, Any] = Body(..., description="CV data from previous parsing")
+):
+    """Years of experience, matching/missing skills and a fit score computed locally, without an LLM call."""
+    try:
+        return ScoringEngine.score(cv_data, requirements)
+    except Exception as e:
+        logger.error(f"Error scoring CV: {e}")
+        logger.error(traceback.format_exc())
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/rank/", response_model=RankResponse, tags=["CV Processing"])
+async def rank_cvs(
+    response: Response,
+    job_title: str = Query(..., description="Job title for the position"),
+    company_name: str = Query(..., description="Company name"),
+    requirements: str = Query(..., description="Key job requirements"),
+    model_type: ModelType = Query(..., description="Analysis model used for the shortlisted CVs"),
+    top_k: int = Query(settings.rank_top_k, ge=0, le=settings.rank_max_top_k,
+                       description="Number of best pre-filtered CVs analyzed by the LLM"),
+    concurrency: int = Query(settings.rank_concurrency, ge=1, le=settings.batch_max_concurrency,
+                             description="Number of LLM analyses run in parallel"),
+    sections: Optional[List[AnalysisSection]] = Query(None, description="Analysis sections generated for shortlisted CVs"),
+    bypass_cache: bool = Query(False, description="Ignore cached analysis results and call the model"),
+    cv_ids: Optional[List[int]] = Query(None, description="Ids of stored CVs to rank instead of a request body"),
+    cvs: Optional[List[Dict[str, Any]]] = Body(None, description="Parsed CVs to rank")
+):
+    """Rank many parsed CVs against one job: local pre-filter over all, LLM analysis of the top_k only."""
+    if (cvs is None) == (cv_ids is None):
+        raise HTTPException(status_code=400, detail="Pass either parsed CVs as the body or cv_ids of stored CVs")
+    if len(cvs or cv_ids) > settings.rank_max_candidates:
+        raise HTTPException(status_code=413, detail=f"Ranking is limited to {settings.rank_max_candidates} CVs")
+    try:
+        if cv_ids is not None:
+            stored = await run_in_threadpool(cv_store.get_many, cv_ids)
+            missing = sorted(set(cv_ids) - {entry.cv_id for entry in stored})
+            if missing:
+                raise HTTPException(status_code=404, detail=f"CV(s) not found: {', '.join(map(str, missing))}")
+            candidates = [{"id": str(entry.cv_id), "cv": entry.cv.model_dump()} for entry in stored]
+        else:
+            candidates = [{"id": str(index), "cv": CVModel.model_validate(cv).model_dump()}
+                          for index, cv in enumerate(cvs)]
+        # The suitability score that orders the leaderboard comes from the recommendation section
+        sections = list(dict.fromkeys((sections or settings.rank_analysis_sections) + [AnalysisSection.RECOMMENDATION]))
+        with collect_usage() as usage:
+            leaderboard = await rank_candidates(candidates, job_title, company_name, requirements, model_type,
+                                                top_k=top_k, concurrency=concurrency, sections=sections,
+                                                use_cache=not bypass_cache)
+        _set_usage_headers(response, usage)
+        logger.info(f"Ranked {len(candidates)} CV(s), analyzed {leaderboard.analyzed}")
+        return leaderboard
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error ranking CVs: {e}")
+        logger.error(traceback.format_exc())
+        raise HTTPException(status_code=400, detail=str(e))
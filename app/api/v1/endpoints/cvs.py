@@ -0,0 +1,64 @@
+import logging
+import time
+import traceback
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.models.store_model import SearchResponse, StoredCV
+from app.services.cv_store import cv_store
+from app.services.near_duplicates import diff_cvs, near_duplicate_index
+from app.utils.models import ModelType
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+@router.get("/search", response_model=SearchResponse, tags=["CV Store"])
+async def search_cvs(q: Optional[str] = Query(None, description='Query such as "Python AND Kubernetes, 5+ years"'),
+                     skill: Optional[List[str]] = Query(None, description="Skills the CV must have (repeatable)"),
+                     title: Optional[str] = Query(None, description="Words in the CV title or a position held"),
+                     company: Optional[str] = Query(None, description="Words in a company worked for"),
+                     location: Optional[str] = Query(None, description="Words in the candidate's or a job's location"),
+                     min_years: Optional[float] = Query(None, ge=0, description="Minimum years of experience"),
+                     model_type: Optional[ModelType] = Query(None, description="Only CVs parsed by this model"),
+                     limit: int = Query(20, ge=1, le=settings.search_max_limit),
+                     offset: int = Query(0, ge=0),
+                     include_cv: bool = Query(False, description="Include the full parsed CV of each match")):
+    started = time.perf_counter()
+    try:
+        total, results, applied_years = await run_in_threadpool(
+            cv_store.search, q, skills=skill, title=title, company=company, location=location,
+            min_years=min_years, model_type=model_type, limit=limit, offset=offset, include_cv=include_cv)
+    except Exception as e:
+        logger.error(f"Error searching CVs: {e}")
+        logger.error(traceback.format_exc())
+        raise HTTPException(status_code=400, detail=str(e))
+    return SearchResponse(query=q, min_years=applied_years, total=total,
+                          took_ms=round(1000 * (time.perf_counter() - started), 3), results=results)
+
+
+@router.get("/cvs/{cv_id}", response_model=StoredCV, tags=["CV Store"])
+async def get_cv(cv_id: int):
+    stored = await run_in_threadpool(cv_store.get, cv_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="CV not found")
+    return stored
+
+
+@router.get("/cvs/{cv_id}/diff/{other_id}", response_model=Dict[str, Dict[str, Any]], tags=["CV Store"])
+async def diff_stored_cvs(cv_id: int, other_id: int):
+    """Fields that differ between two stored CVs, e.g. a CV and the near-duplicate it was flagged against."""
+    stored = await run_in_threadpool(cv_store.get_many, [cv_id, other_id])
+    if len(stored) != len({cv_id, other_id}):
+        raise HTTPException(status_code=404, detail="CV not found")
+    return diff_cvs(stored[0].cv, stored[-1].cv)
+
+
+@router.delete("/cvs/{cv_id}", status_code=204, tags=["CV Store"])
+async def delete_cv(cv_id: int):
+    if not await run_in_threadpool(cv_store.delete, cv_id):
+        raise HTTPException(status_code=404, detail="CV not found")
+    await run_in_threadpool(near_duplicate_index.remove, cv_id)
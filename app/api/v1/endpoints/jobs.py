@@ -0,0 +1,45 @@
+import logging
+
+from fastapi import APIRouter, File, UploadFile, HTTPException, Query
+
+from app.config import settings
+from app.models.job_model import JobModel
+from app.services.job_queue import job_queue
+from app.utils.file_utils import UploadTooLargeError, read_upload
+from app.utils.models import ModelType
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+@router.post("/jobs/parse", response_model=JobModel, status_code=202, tags=["Jobs"])
+async def submit_parse_job(file: UploadFile = File(...),
+                           model_type: ModelType = Query(..., description="Parsing model to use"),
+                           bypass_cache: bool = Query(False, description="Ignore cached parse results")):
+    if file.content_type != "application/pdf":
+        raise HTTPException(status_code=400, detail="File must be a PDF")
+
+    try:
+        content = await read_upload(file, settings.upload_max_bytes, model_type)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    job_id = await job_queue.submit(model_type, file.filename, content, use_cache=not bypass_cache)
+    logger.info(f"Queued parse job {job_id} for {file.filename}")
+    return await job_queue.get(job_id)
+
+
+@router.get("/jobs/{job_id}", response_model=JobModel, tags=["Jobs"])
+async def get_job(job_id: str):
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}/wait", response_model=JobModel, tags=["Jobs"])
+async def wait_for_job(job_id: str,
+                       timeout: float = Query(30.0, gt=0, description="Seconds to wait for the job to finish")):
+    job = await job_queue.wait(job_id, min(timeout, settings.job_wait_max_seconds))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
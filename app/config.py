@@ -1,7 +1,9 @@
-from typing import Optional
+from typing import Dict, List, Optional
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from app.utils.models import AnalysisMode, AnalysisSection, DedupMode, ModelType, ParseMode
+
 
 class Settings(BaseSettings):
     anthropic_api_key: Optional[str] = None
@@ -15,6 +17,139 @@ class Settings(BaseSettings):
     ollama_host: Optional[str] = None
     ollama_model: Optional[str] = None
 
+    # Execution pools: PDF extraction runs in worker processes, LLM calls in threads
+    pdf_workers: int = 2
+    pdf_max_concurrency: int = 4
+    llm_workers: int = 16
+    llm_max_concurrency: int = 16
+
+    # PDF extraction: PDFs with at least pdf_parallel_min_pages pages are split into one page range
+    # per PDF worker (0 disables). Turning off table detection or image/vector-graphics analysis
+    # makes extraction several times faster for CVs that don't need them.
+    pdf_parallel_min_pages: int = 8
+    pdf_detect_tables: bool = True
+    pdf_detect_images: bool = True
+    # Fast path: plain text extraction is tried first and used when its quality score (0-1, from text
+    # density, garbled characters, columns and block order) reaches pdf_fast_path_min_quality
+    pdf_fast_path_enabled: bool = True
+    pdf_fast_path_min_quality: float = 0.8
+
+    # Shared HTTP connection pool used by the provider clients
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0
+
+    # Caches: in-memory LRU tier backed by SQLite files under cache_dir
+    cache_dir: str = "cache"
+    pdf_cache_enabled: bool = True
+    pdf_cache_memory_items: int = 256
+    pdf_cache_max_bytes: int = 512 * 1024 * 1024
+    parse_cache_enabled: bool = True
+    parse_cache_memory_items: int = 512
+    parse_cache_max_bytes: int = 256 * 1024 * 1024
+    parse_cache_ttl_seconds: Optional[float] = 7 * 24 * 3600
+    analysis_cache_enabled: bool = True
+    analysis_cache_memory_items: int = 256
+    analysis_cache_max_bytes: int = 256 * 1024 * 1024
+    analysis_cache_ttl_seconds: Optional[float] = 24 * 3600
+
+    # Persistent stores (job queue, ...) live under data_dir
+    data_dir: str = "data"
+    job_workers: int = 4
+    job_poll_interval: float = 1.0
+    job_wait_max_seconds: float = 60.0
+    # Running jobs not renewed for job_lease_seconds are requeued, or failed after job_max_attempts
+    job_lease_seconds: float = 60.0
+    job_max_attempts: int = 3
+    # Every parse is kept in the searchable CV store (data_dir/cvs.sqlite3)
+    cv_store_enabled: bool = True
+    search_max_limit: int = 100
+
+    # Near-duplicate detection over extracted markdown (MinHash/LSH, needs the CV store).
+    # detect: report the earlier CV a new upload resembles; reuse: also return its parse instead of calling the model
+    dedup_mode: DedupMode = DedupMode.DETECT
+    dedup_threshold: float = 0.85
+    dedup_num_perm: int = 128
+    dedup_index_max_documents: int = 1_000_000
+
+    # Metrics: Prometheus scrape endpoint at /metrics. With several uvicorn workers, set the
+    # PROMETHEUS_MULTIPROC_DIR environment variable to an empty directory shared by all of them
+    metrics_enabled: bool = True
+
+    # Token prices in USD per million tokens, per model type ("input" for the prompt, "output" for the
+    # completion). Model types without an entry, like the local Ollama models, are counted at no cost.
+    model_prices: Dict[str, Dict[str, float]] = {
+        "chatgpt": {"input": 2.50, "output": 10.00},
+        "deepseek-api": {"input": 0.27, "output": 1.10},
+        "claude": {"input": 3.00, "output": 15.00},
+        "gemini": {"input": 0.10, "output": 0.40},
+    }
+
+    # Uploads: larger PDFs are rejected with 413; PDFs up to pdf_in_memory_max_bytes are extracted
+    # from memory, bigger ones through a temp file
+    upload_max_bytes: int = 20 * 1024 * 1024
+    batch_upload_max_bytes: int = 200 * 1024 * 1024
+    pdf_in_memory_max_bytes: int = 8 * 1024 * 1024
+
+    # Bulk parsing
+    batch_concurrency: int = 8
+    batch_max_concurrency: int = 32
+    batch_max_files: int = 500
+
+    # Per-provider ("ollama") or per-model ("ollama:qwen:14b") limits. Each entry may set
+    # requests_per_minute, tokens_per_minute and max_in_flight; omitted limits are not enforced.
+    rate_limits: Dict[str, Dict[str, float]] = {
+        "openai": {"requests_per_minute": 500, "tokens_per_minute": 200000, "max_in_flight": 32},
+        "deepseek": {"requests_per_minute": 300, "max_in_flight": 32},
+        "anthropic": {"requests_per_minute": 50, "tokens_per_minute": 40000, "max_in_flight": 8},
+        "gemini": {"requests_per_minute": 15, "tokens_per_minute": 1000000, "max_in_flight": 8},
+        "ollama": {"max_in_flight": 2},
+    }
+    rate_limit_max_wait_seconds: Optional[float] = None
+
+    # Provider call resilience: per-attempt timeout, overall deadline, retries and circuit breaker
+    llm_timeout_seconds: float = 60.0
+    llm_deadline_seconds: float = 300.0
+    llm_retry_attempts: int = 3
+    llm_retry_base_delay: float = 0.5
+    llm_retry_max_delay: float = 8.0
+    # Local Ollama models can take minutes per parse, so they have their own attempt timeout and
+    # deadline (None: no limit); a timed-out local call is not retried
+    ollama_timeout_seconds: Optional[float] = None
+    ollama_deadline_seconds: Optional[float] = None
+    circuit_failure_threshold: int = 5
+    circuit_recovery_seconds: float = 30.0
+
+    # Fallback chains per endpoint. With a hedge delay the next model also starts when the current
+    # ones are slower than the delay; without it the next model only starts after a failure.
+    parse_fallback_chain: List[ModelType] = []
+    parse_hedge_delay_seconds: Optional[float] = None
+    analyze_fallback_chain: List[ModelType] = []
+    analyze_hedge_delay_seconds: Optional[float] = None
+
+    # Pull email, phone and profile links out of the CV text with rules and ask the LLM only for the rest
+    contact_pre_extraction: bool = True
+
+    # "single" asks one call for the whole CV; "chunked" splits it into sections parsed concurrently
+    parse_mode: ParseMode = ParseMode.SINGLE
+    # "single" generates the whole analysis in one call; "decomposed" generates each section concurrently
+    analysis_mode: AnalysisMode = AnalysisMode.SINGLE
+    # Compute years of experience and dictionary skill matches locally and override the model's numbers
+    # with them (opt-in; skills outside the dictionary keep the model's verdict)
+    deterministic_scoring: bool = False
+
+    # Ranking: every CV is scored locally, only the top_k best are analyzed by the LLM
+    rank_top_k: int = 10
+    rank_max_top_k: int = 100
+    rank_concurrency: int = 4
+    rank_max_candidates: int = 5000
+    rank_analysis_sections: List[AnalysisSection] = [AnalysisSection.EXECUTIVE_SUMMARY, AnalysisSection.RECOMMENDATION]
+
+    # Markdown compaction between PDF extraction and the LLM; steps run in a fixed order
+    markdown_compaction_enabled: bool = True
+    markdown_compaction_steps: List[str] = ["images", "headers_footers", "page_breaks", "tables", "emphasis",
+                                            "whitespace"]
+
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra='ignore')
 
 
@@ -1,10 +1,49 @@
-from fastapi import FastAPI
-from app.api.v1.endpoints import cv_parser
+from contextlib import asynccontextmanager
 
-app = FastAPI()
+from fastapi import FastAPI, Response
+from app.api.v1.endpoints import admin, cv_parser, cvs, jobs
+from app.config import settings
+from app.services.cv_store import cv_store
+from app.services.execution import pools
+from app.services.job_queue import job_queue
+from app.services.near_duplicates import near_duplicate_index
+from app.services.service_registry import service_registry
+from app.utils.file_utils import UploadSizeLimitMiddleware
+from app.utils.metrics import METRICS_PATH, MetricsMiddleware, mark_process_dead, render
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    pools.start()
+    await job_queue.start()
+    yield
+    await job_queue.stop()
+    pools.shutdown()
+    service_registry.close()
+    cv_store.close()
+    near_duplicate_index.close()
+    mark_process_dead()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(UploadSizeLimitMiddleware, max_bytes=settings.upload_max_bytes,
+                   batch_max_bytes=settings.batch_upload_max_bytes)
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
 
 app.include_router(cv_parser.router, prefix="/api/v1")
+app.include_router(jobs.router, prefix="/api/v1")
+app.include_router(cvs.router, prefix="/api/v1")
+app.include_router(admin.router, prefix="/api/v1")
 
 @app.get("/")
 def read_root():
     return {"message": "CV Parser API"}
+
+
+if settings.metrics_enabled:
+    @app.get(METRICS_PATH, include_in_schema=False)
+    def metrics():
+        """Prometheus scrape endpoint."""
+        body, content_type = render()
+        return Response(content=body, media_type=content_type)
@@ -0,0 +1,25 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel
+
+from app.models.cv_model import CVModel
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class JobModel(BaseModel):
+    job_id: str
+    status: JobStatus
+    model_type: str
+    filename: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    result: Optional[CVModel] = None
+    error: Optional[str] = None
@@ -0,0 +1,27 @@
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class RankedCandidate(BaseModel):
+    rank: int
+    candidate_id: str
+    name: Optional[str] = None
+    final_score: float
+    prefilter_score: float
+    bm25: float
+    scores: Dict[str, Any]
+    suitability_score: Optional[float] = None
+    analysis: Optional[Dict[str, Any]] = None
+    analysis_seconds: Optional[float] = None
+    error: Optional[str] = None
+
+
+class RankResponse(BaseModel):
+    job_title: str
+    company_name: str
+    candidates: int
+    analyzed: int
+    prefilter_seconds: float
+    total_seconds: float
+    leaderboard: List[RankedCandidate]
@@ -0,0 +1,28 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from app.models.cv_model import CVModel
+
+
+class StoredCV(BaseModel):
+    cv_id: int
+    source_hash: str
+    model_type: str
+    filename: Optional[str] = None
+    name: Optional[str] = None
+    title: Optional[str] = None
+    location: Optional[str] = None
+    years_experience: float
+    created_at: datetime
+    updated_at: datetime
+    cv: Optional[CVModel] = None
+
+
+class SearchResponse(BaseModel):
+    query: Optional[str] = None
+    min_years: Optional[float] = None
+    total: int
+    took_ms: float
+    results: List[StoredCV]
@@ -0,0 +1,108 @@
+import logging
+import re
+from typing import List, Optional, Tuple
+
+from app.models.cv_model import Contact
+
+logger = logging.getLogger(__name__)
+
+EMAIL_RE = re.compile(r"(?<![\w.+-])[\w.+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}")
+# Separated digit groups, optionally with a country code and a bracketed area code
+PHONE_RE = re.compile(r"(?<![\w+])(?:\+\d{1,3}[\s.-]?)?(?:\(\d{2,5}\)[\s.-]?)?\d{2,5}(?:[\s.-]\d{2,5}){1,4}(?!\w)")
+MARKDOWN_LINK_RE = re.compile(r"\[[^\]]*\]\(([^)\s]+)\)")
+BARE_URL_RE = re.compile(r"(?:https?://|www\.)[^\s<>()\[\]\"']+"
+                         r"|\b(?:linkedin\.com|github\.com|gitlab\.com|bitbucket\.org)/[^\s<>()\[\]\"']+",
+                         re.IGNORECASE)
+YEAR_RE = re.compile(r"(?:19|20)\d{2}")
+CODE_HOSTS = ("github.com", "gitlab.com", "bitbucket.org")
+# Hosts whose links are personal profiles wherever they appear in the CV
+PROFILE_HOSTS = ("linkedin.com",) + CODE_HOSTS + (
+    "stackoverflow.com", "kaggle.com", "medium.com", "dev.to", "behance.net", "dribbble.com", "twitter.com", "x.com")
+# The contact header of the CV. Phone numbers are looked for here only, where dates and figures are rare,
+# and other links here are taken as the candidate's; links further down (projects, employers) are left to the LLM
+HEADER_CHARS = 2000
+
+
+class ContactExtractor:
+    """
+    Rule-based extraction of the contact fields that have a fixed shape (email, phone, profile links)
+    from the markdown of a CV, so the LLM doesn't have to generate them. Location is left to the model.
+    Only profile links and links in the contact header are taken; a repository or company link in
+    the body is not a contact link.
+    """
+
+    # Bump when the rules change; it is part of the parse cache key
+    VERSION = "2"
+    FIELDS = ("email", "phone", "linkedin", "github", "other_links")
+
+    @staticmethod
+    def extract(text: str) -> Contact:
+        contact = Contact(email=ContactExtractor._email(text), phone=ContactExtractor._phone(text))
+        for url, in_header in ContactExtractor._links(text):
+            host = re.sub(r"^(?:https?://)?(?:www\.)?", "", url, flags=re.IGNORECASE).lower().rstrip("/")
+            profile = host.startswith(PROFILE_HOSTS)
+            if host.startswith(CODE_HOSTS):
+                # github.com/jane is a profile; github.com/jane/project is only one when listed in the header
+                profile = host.count("/") == 1
+            if not (profile or in_header):
+                continue
+            if host.startswith("linkedin.com") and contact.linkedin is None:
+                contact.linkedin = url
+            elif host.startswith(CODE_HOSTS) and contact.github is None:
+                contact.github = url
+            elif url not in contact.other_links:
+                contact.other_links.append(url)
+        return contact
+
+    @staticmethod
+    def known_fields(contact: Contact) -> List[str]:
+        """Fields the extractor filled in and that the LLM therefore need not be asked for."""
+        return [field for field in ContactExtractor.FIELDS if getattr(contact, field)]
+
+    @staticmethod
+    def merge(llm_contact: Contact, extracted: Contact) -> Contact:
+        """Prefer the deterministic values; keep whatever the model found on top of them."""
+        merged = llm_contact.model_copy(deep=True)
+        for field in ("email", "phone", "linkedin", "github"):
+            value = getattr(extracted, field)
+            if value:
+                setattr(merged, field, value)
+        merged.other_links = list(dict.fromkeys(extracted.other_links + merged.other_links))
+        return merged
+
+    @staticmethod
+    def _email(text: str) -> Optional[str]:
+        for match in EMAIL_RE.finditer(text):
+            email = match.group(0).strip(".")
+            # Skip image/asset names such as logo@2x.png
+            if not email.lower().endswith((".png", ".jpg", ".jpeg", ".gif", ".svg")):
+                return email
+        return None
+
+    @staticmethod
+    def _phone(text: str) -> Optional[str]:
+        for match in PHONE_RE.finditer(text[:HEADER_CHARS]):
+            candidate = match.group(0).strip()
+            digits = re.sub(r"\D", "", candidate)
+            if not 9 <= len(digits) <= 15:
+                continue
+            # Date ranges like "2016 - 2020 2021" have the shape of a number but are all years
+            groups = re.findall(r"\d+", candidate)
+            if all(YEAR_RE.fullmatch(group) for group in groups):
+                continue
+            return candidate
+        return None
+
+    @staticmethod
+    def _links(text: str) -> List[Tuple[str, bool]]:
+        """Links in the text with whether they appear in the contact header."""
+        links = [(match.group(1), match.start()) for match in MARKDOWN_LINK_RE.finditer(text)]
+        # Bare URLs outside of markdown links; blanking the links keeps the offsets
+        stripped = MARKDOWN_LINK_RE.sub(lambda match: " " * len(match.group(0)), text)
+        links.extend((match.group(0).rstrip(".,;:"), match.start()) for match in BARE_URL_RE.finditer(stripped))
+        first_seen = {}
+        for link, position in links:
+            if not link.lower().startswith(("mailto:", "tel:", "#")):
+                first_seen[link] = min(position, first_seen.get(link, position))
+        ordered = sorted(first_seen.items(), key=lambda item: item[1])
+        return [(link, position < HEADER_CHARS) for link, position in ordered]
@@ -1,33 +1,41 @@
-from typing import List
+from functools import partial
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
 
-from app.config import settings
-from app.models.cv_model import CVModel, CVAnalysisResponse
-from app.services.cv_processor_services.chatgpt_service import ChatGPTService
-from app.services.cv_processor_services.claude_service import ClaudeService
-from app.services.cv_processor_services.deepseek_service import DeepSeekService
-from app.services.cv_processor_services.gemini_service import GeminiService
-from app.services.cv_processor_services.ollama_service import OllamaService
-from app.utils.models import ModelType
+from app.models.cv_model import CVModel
+from app.services.execution import pools
+from app.services.hedging import hedged_call
+from app.services.service_registry import service_registry
+from app.utils.models import AnalysisMode, ModelType, ParseMode
+
+
+def _chain(model_type: ModelType, fallback: Optional[List[ModelType]]) -> List[ModelType]:
+    chain = [model_type]
+    for candidate in fallback or []:
+        if candidate not in chain:
+            chain.append(candidate)
+    return chain
 
 
 class CVProcessor:
     @staticmethod
-    def parse_cv(text: str, model_type: ModelType) -> CVModel:
-        service_map = {
-            ModelType.CHATGPT: ChatGPTService(model = settings.openai_model, api_key=settings.openai_api_key),
-            ModelType.DEEPSEEK_API: DeepSeekService(model = settings.deepseek_model, api_key=settings.deepseek_api_key),
-            ModelType.DEEPSEEK_R1_1_5B: OllamaService(model=ModelType.DEEPSEEK_R1_1_5B),
-            ModelType.DEEPSEEK_R1_8B: OllamaService(model=ModelType.DEEPSEEK_R1_8B),
-            ModelType.DEEPSEEK_R1_14B: OllamaService(model=ModelType.DEEPSEEK_R1_14B),
-            ModelType.MISTRAL: OllamaService(model=ModelType.MISTRAL),
-            ModelType.QWEN_1_8B: OllamaService(model=ModelType.QWEN_1_8B),
-            ModelType.QWEN_14B: OllamaService(model=ModelType.QWEN_14B),
-            ModelType.GEMINI: GeminiService(model=settings.gemini_model),
-            ModelType.OLLAMA: OllamaService(model=settings.ollama_model),
-            ModelType.CLAUDE: ClaudeService(model=settings.anthropic_model, api_key=settings.anthropic_api_key),
-        }
-        service = service_map.get(model_type)
-        return service.parse_cv(text)
+    def provider(model_type: ModelType) -> str:
+        """Provider lane the model's calls run in."""
+        return service_registry.provider(model_type)
+
+    @staticmethod
+    def parse_cv(text: str, model_type: ModelType, use_cache: bool = True) -> CVModel:
+        service = service_registry.get(model_type)
+        return service.parse_cv(text, use_cache=use_cache)
+
+    @staticmethod
+    async def parse_cv_chunked(text: str, model_type: ModelType, use_cache: bool = True) -> CVModel:
+        service = service_registry.get(model_type)
+        return await service.parse_cv_chunked(text, use_cache=use_cache)
+
+    @staticmethod
+    def stream_parse_cv(text: str, model_type: ModelType, use_cache: bool = True) -> Iterator[Tuple[str, Any]]:
+        service = service_registry.get(model_type)
+        return service.stream_parse_cv(text, use_cache=use_cache)
 
     @staticmethod
     def analyze_cv(
@@ -35,20 +43,74 @@ class CVProcessor:
         job_title: str,
         company_name: str,
         requirements: str,
-        model_type: ModelType
+        model_type: ModelType,
+        use_cache: bool = True,
+        sections: Optional[Iterable[str]] = None
+    ) -> dict:
+        service = service_registry.get(model_type)
+        return service.analyze_cv(cv_data, job_title, company_name, requirements, use_cache=use_cache,
+                                  sections=sections)
+
+    @staticmethod
+    async def analyze_cv_decomposed(
+        cv_data: dict,
+        job_title: str,
+        company_name: str,
+        requirements: str,
+        model_type: ModelType,
+        use_cache: bool = True,
+        sections: Optional[Iterable[str]] = None
+    ) -> dict:
+        service = service_registry.get(model_type)
+        return await service.analyze_cv_decomposed(cv_data, job_title, company_name, requirements,
+                                                   use_cache=use_cache, sections=sections)
+
+    @staticmethod
+    async def parse_cv_hedged(
+        text: str,
+        model_type: ModelType,
+        fallback: Optional[List[ModelType]] = None,
+        hedge_delay: Optional[float] = None,
+        use_cache: bool = True,
+        mode: ParseMode = ParseMode.SINGLE
+    ) -> CVModel:
+        """Parse with `model_type`, failing over (or hedging after `hedge_delay`) along `fallback`."""
+        if mode == ParseMode.CHUNKED:
+            calls = [(m.value, partial(CVProcessor.parse_cv_chunked, text, m, use_cache=use_cache))
+                     for m in _chain(model_type, fallback)]
+        else:
+            calls = [
+                (m.value, partial(pools.run_llm, CVProcessor.parse_cv, text=text, model_type=m, use_cache=use_cache,
+                                  lane=CVProcessor.provider(m)))
+                for m in _chain(model_type, fallback)
+            ]
+        return await hedged_call(calls, hedge_delay)
+
+    @staticmethod
+    async def analyze_cv_hedged(
+        cv_data: dict,
+        job_title: str,
+        company_name: str,
+        requirements: str,
+        model_type: ModelType,
+        fallback: Optional[List[ModelType]] = None,
+        hedge_delay: Optional[float] = None,
+        use_cache: bool = True,
+        mode: AnalysisMode = AnalysisMode.SINGLE,
+        sections: Optional[Iterable[str]] = None
     ) -> dict:
-        service_map = {
-            ModelType.CHATGPT: ChatGPTService(model = settings.openai_model, api_key=settings.openai_api_key),
-            ModelType.DEEPSEEK_API: DeepSeekService(model = settings.deepseek_model, api_key=settings.deepseek_api_key),
-            ModelType.DEEPSEEK_R1_1_5B: OllamaService(model=ModelType.DEEPSEEK_R1_1_5B),
-            ModelType.DEEPSEEK_R1_8B: OllamaService(model=ModelType.DEEPSEEK_R1_8B),
-            ModelType.DEEPSEEK_R1_14B: OllamaService(model=ModelType.DEEPSEEK_R1_14B),
-            ModelType.MISTRAL: OllamaService(model=ModelType.MISTRAL),
-            ModelType.QWEN_1_8B: OllamaService(model=ModelType.QWEN_1_8B),
-            ModelType.QWEN_14B: OllamaService(model=ModelType.QWEN_14B),
-            ModelType.GEMINI: GeminiService(model=settings.gemini_model),
-            ModelType.OLLAMA: OllamaService(model=settings.ollama_model),
-            ModelType.CLAUDE: ClaudeService(model=settings.anthropic_model, api_key=settings.anthropic_api_key),
-        }
-        service = service_map.get(model_type)
-        return service.analyze_cv(cv_data, job_title, company_name, requirements)
+        """Analyze with `model_type`, failing over (or hedging after `hedge_delay`) along `fallback`."""
+        if mode == AnalysisMode.DECOMPOSED:
+            calls = [
+                (m.value, partial(CVProcessor.analyze_cv_decomposed, cv_data, job_title, company_name, requirements,
+                                  m, use_cache=use_cache, sections=sections))
+                for m in _chain(model_type, fallback)
+            ]
+        else:
+            calls = [
+                (m.value, partial(pools.run_llm, CVProcessor.analyze_cv, cv_data=cv_data, job_title=job_title,
+                                  company_name=company_name, requirements=requirements, model_type=m,
+                                  use_cache=use_cache, sections=sections, lane=CVProcessor.provider(m)))
+                for m in _chain(model_type, fallback)
+            ]
+        return await hedged_call(calls, hedge_delay)
@@ -1,31 +1,229 @@
+import asyncio
 import json
 import logging
 from abc import ABC, abstractmethod
 from datetime import datetime
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
 
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
 from app.models.cv_model import (
-    CVModel, Contact, Education, Experience, Project, Certification
+    CVAnalysisResponse, CVModel, Contact, Education, Experience, Project, Certification
 )
-from app.utils.prompt_analysis import analysis_prompt
+from app.services.contact_extractor import ContactExtractor
+from app.services.execution import pools
+from app.services.rate_limiter import governor
+from app.services.resilience import Deadline, call_with_resilience, circuit_guard
+from app.services.result_cache import analysis_cache, parse_cache
+from app.services.scoring import ScoringEngine
+from app.services.section_splitter import SECTION_FIELDS, SectionSplitter
+from app.services.usage import measure_call, record_output
+from app.utils.cache import sha256_hex
+from app.utils.json_stream import IncrementalJSONParser
+from app.utils.metrics import observe_stage
+from app.utils.tokens import estimate_tokens
+from app.utils.prompt import parse_prompt, prompt, section_prompt
+from app.utils.models import AnalysisSection
+from app.utils.prompt_analysis import analysis_prompt, analysis_sections_prompt
 
 logger = logging.getLogger(__name__)
 
+# Changing the prompt text changes its version and so invalidates cached results
+PARSE_PROMPT_VERSION = sha256_hex(prompt)[:16]
+ANALYSIS_PROMPT_VERSION = sha256_hex(analysis_prompt)[:16]
+SECTION_PROMPT_VERSION = sha256_hex(*(section_prompt(fields) for fields in SECTION_FIELDS.values()))[:16]
+
+
+def _restricted_schema(model, fields: Iterable[str]) -> dict:
+    """JSON schema of a response model restricted to the given top-level fields."""
+    schema = model.model_json_schema()
+    return {
+        "type": "object",
+        "properties": {field: schema["properties"][field] for field in fields},
+        "required": list(fields),
+        "$defs": schema.get("$defs", {}),
+    }
+
+
 class BaseService(ABC):
+    # Backend family the service talks to; services of one provider share rate limits and batch lanes
+    provider: str = "unknown"
+    # ModelType the registry built this service for; labels its metrics
+    model_type = None
+    # Whether a client-side timeout is a transient failure worth retrying and counting against the circuit
+    timeouts_transient = True
+
+    @property
+    def timeout_seconds(self) -> Optional[float]:
+        """Client-side limit for one attempt; None waits as long as the provider takes."""
+        return settings.llm_timeout_seconds
+
+    @property
+    def deadline_seconds(self) -> Optional[float]:
+        """Overall limit for a call including rate-limit waits and retries; None for no limit."""
+        return settings.llm_deadline_seconds
+
     @abstractmethod
     def _call_api(self, text: str, is_analysis: bool = False, **kwargs) -> dict:
         """call the api of specific service."""
         pass
 
-    def parse_cv(self, text: str) -> CVModel:
-        structured_data: dict = self._call_api(text)
-        print(structured_data)
+    def _stream_api(self, text: str, is_analysis: bool = False, **kwargs) -> Iterator[str]:
+        """Stream the raw completion text; services without streaming support return it in one piece."""
+        yield json.dumps(self._call_api(text, is_analysis=is_analysis, **kwargs))
 
-        name = structured_data.get("name", "N/A")
-        title = structured_data.get("title", "N/A")
-        contact_data = structured_data.get("contact", {})
+    @property
+    def model_name(self) -> str:
+        return getattr(self.model, "value", str(self.model))
+
+    def _invoke(self, text: str, is_analysis: bool = False, **kwargs) -> dict:
+        """Call the provider through its rate-limit slot, with retries, circuit breaker and deadline."""
+        # Parse calls send the parse prompt alongside the text; analysis text already embeds its prompt
+        tokens = estimate_tokens(text) + (0 if is_analysis else estimate_tokens(kwargs.get("instructions", prompt)))
+
+        def attempt(deadline: Deadline) -> dict:
+            with governor.slot(self.provider, self.model_name, tokens, timeout=deadline.remaining()):
+                timeout = deadline.cap(self.timeout_seconds)
+                with observe_stage("llm_call", self.model_type), \
+                        measure_call(self.model_type, self.provider, tokens) as call:
+                    result = self._call_api(text, is_analysis=is_analysis, timeout=timeout, **kwargs)
+                    call.output = json.dumps(result)
+                    return result
+
+        return call_with_resilience(self.provider, attempt, Deadline(self.deadline_seconds),
+                                    timeouts_transient=self.timeouts_transient)
+
+    def _parse_cache_key(self, text: str, instructions: str = prompt) -> str:
+        # The reduced prompt differs per CV, so the variant actually sent is part of the key
+        variant = PARSE_PROMPT_VERSION if instructions == prompt else sha256_hex(instructions)[:16]
+        return sha256_hex(text, type(self).__name__, self.model_name, variant, ContactExtractor.VERSION)
+
+    def _prepare_parse(self, text: str) -> Tuple[Optional[Contact], str]:
+        """Pre-extract the fixed-shape contact fields and build a prompt asking only for the rest."""
+        if not settings.contact_pre_extraction:
+            return None, prompt
+        with observe_stage("prompt_build", self.model_type):
+            known_contact = ContactExtractor.extract(text)
+            return known_contact, parse_prompt(ContactExtractor.known_fields(known_contact))
+
+    def parse_section(self, section: str, text: str, known_contact_fields: Iterable[str] = ()) -> dict:
+        """Extract the CV fields belonging to one section of the markdown."""
+        fields = SECTION_FIELDS[section]
+        with observe_stage("prompt_build", self.model_type):
+            instructions = section_prompt(fields, known_contact_fields)
+        structured_data: dict = self._invoke(text, instructions=instructions, schema=_restricted_schema(CVModel, fields))
+        return {field: structured_data.get(field) for field in fields}
+
+    async def parse_cv_chunked(self, text: str, use_cache: bool = True) -> CVModel:
+        """
+        Split the CV into sections and extract each with its own, smaller prompt; the calls run
+        concurrently and their fields are merged. CVs without recognizable sections use parse_cv.
+        """
+        sections = SectionSplitter.split(text)
+        if sections.keys() <= {"header"}:
+            return await pools.run_llm(self.parse_cv, text, use_cache=use_cache, lane=self.provider)
+
+        known_contact = ContactExtractor.extract(text) if settings.contact_pre_extraction else None
+        known_fields = ContactExtractor.known_fields(known_contact) if known_contact else []
+        cache_key = sha256_hex(text, type(self).__name__, self.model_name, "chunked", SECTION_PROMPT_VERSION,
+                               ContactExtractor.VERSION, ",".join(known_fields))
+        # The cache's SQLite tier blocks, so it is used from the thread pool here on the event loop
+        if use_cache and settings.parse_cache_enabled:
+            cached = await run_in_threadpool(parse_cache.get, cache_key)
+            if cached is not None:
+                logger.info(f"Parse cache hit for {self.model_name} (chunked)")
+                return CVModel.model_validate_json(cached)
+
+        # The header holds name, title and contact; without one, look for them in the whole CV
+        sections["header"] = sections.get("header") or text
+        logger.info(f"Chunked parse with {self.model_name}: {', '.join(sections)}")
+        results = await asyncio.gather(*(
+            pools.run_llm(self.parse_section, section, section_text, known_fields, lane=self.provider)
+            for section, section_text in sections.items()
+        ))
+        structured_data = {}
+        for result in results:
+            structured_data.update(result)
+        cv_model = self._build_cv_model(structured_data, known_contact)
+
+        if settings.parse_cache_enabled:
+            await run_in_threadpool(parse_cache.set, cache_key, cv_model.model_dump_json())
+        return cv_model
+
+    def parse_cv(self, text: str, use_cache: bool = True) -> CVModel:
+        known_contact, instructions = self._prepare_parse(text)
+        cache_key = self._parse_cache_key(text, instructions)
+        if use_cache and settings.parse_cache_enabled:
+            cached = parse_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Parse cache hit for {self.model_name}")
+                return CVModel.model_validate_json(cached)
+
+        structured_data: dict = self._invoke(text, instructions=instructions)
+        logger.debug(structured_data)
+        cv_model = self._build_cv_model(structured_data, known_contact)
+
+        if settings.parse_cache_enabled:
+            parse_cache.set(cache_key, cv_model.model_dump_json())
+        return cv_model
+
+    def stream_parse_cv(self, text: str, use_cache: bool = True) -> Iterator[Tuple[str, Any]]:
+        """
+        Parse while the completion streams in. Yields ("section", (key, value)) for each top-level
+        CVModel field as soon as the model has finished generating it, then ("result", CVModel).
+        """
+        known_contact, instructions = self._prepare_parse(text)
+        cache_key = self._parse_cache_key(text, instructions)
+        if use_cache and settings.parse_cache_enabled:
+            cached = parse_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Parse cache hit for {self.model_name}")
+                cv_model = CVModel.model_validate_json(cached)
+                for key, value in cv_model.model_dump(mode="json").items():
+                    yield "section", (key, value)
+                yield "result", cv_model
+                return
+
+        parser = IncrementalJSONParser()
+        tokens = estimate_tokens(text) + estimate_tokens(instructions)
+        # A stream that has started emitting can't be transparently retried, so only the breaker applies
+        with circuit_guard(self.provider, timeouts_transient=self.timeouts_transient), \
+                governor.slot(self.provider, self.model_name, tokens, timeout=self.deadline_seconds):
+            # Includes the time the consumer takes between sections, which is negligible for SSE
+            with observe_stage("llm_call", self.model_type), measure_call(self.model_type, self.provider, tokens):
+                for chunk in self._stream_api(text, timeout=self.timeout_seconds, instructions=instructions):
+                    record_output(chunk)
+                    for key, value in parser.feed(chunk):
+                        if key == "contact" and known_contact is not None:
+                            value = self._merge_contact(value, known_contact).model_dump(mode="json")
+                        yield "section", (key, value)
+        if not parser.members:
+            raise RuntimeError(f"{self.model_name} returned no JSON content")
+
+        cv_model = self._build_cv_model(parser.members, known_contact)
+        if settings.parse_cache_enabled:
+            parse_cache.set(cache_key, cv_model.model_dump_json())
+        yield "result", cv_model
+
+    @staticmethod
+    def _merge_contact(contact_data: Optional[dict], known_contact: Optional[Contact]) -> Contact:
+        contact_data = dict(contact_data or {})
         # Handle both missing and None cases for other_links
         contact_data["other_links"] = contact_data.get("other_links") or []
         contact = Contact(**contact_data)
+        if known_contact is not None:
+            contact = ContactExtractor.merge(contact, known_contact)
+        return contact
+
+    def _build_cv_model(self, structured_data: dict, known_contact: Optional[Contact] = None) -> CVModel:
+        with observe_stage("validation", self.model_type):
+            return self._validate_cv_model(structured_data, known_contact)
+
+    def _validate_cv_model(self, structured_data: dict, known_contact: Optional[Contact] = None) -> CVModel:
+        name = structured_data.get("name") or "N/A"
+        title = structured_data.get("title", "N/A")
+        contact = self._merge_contact(structured_data.get("contact"), known_contact)
 
         # Handle all list fields, converting None to empty list
         education = [
@@ -55,23 +253,98 @@ class BaseService(ABC):
             skills_from_work_experience=skills_from_work_experience
         )
 
-    def analyze_cv(self, cv_data: dict, job_title: str, company_name: str, requirements: str) -> dict:
-        formatted_prompt = analysis_prompt.replace("[JOB_TITLE]", job_title)\
-                                       .replace("[COMPANY_NAME]", company_name)\
-                                       .replace("[REQUIREMENTS]", requirements)
-        
-        analysis_input = f"{formatted_prompt}\n\nAnalyze the following CV data:\n{json.dumps(cv_data, indent=2)}"
-        analysis_data: dict = self._call_api(analysis_input, is_analysis=True, 
-                                           job_title=job_title, 
-                                           company_name=company_name, 
-                                           requirements=requirements)
-        
-        # Add metadata to the analysis result
-        analysis_data["metadata"] = {
+    @staticmethod
+    def _analysis_sections(sections: Optional[Iterable[str]]) -> Optional[List[str]]:
+        """Requested sections in prompt order, or None for the full analysis."""
+        if not sections:
+            return None
+        requested = {AnalysisSection(section).value for section in sections}
+        ordered = [section.value for section in AnalysisSection if section.value in requested]
+        return None if len(ordered) == len(AnalysisSection) else ordered
+
+    def _analysis_cache_key(self, cv_data: dict, job_title: str, company_name: str, requirements: str,
+                            sections: Optional[List[str]] = None) -> str:
+        cv_fingerprint = sha256_hex(json.dumps(cv_data, sort_keys=True, separators=(",", ":"), default=str))
+        job_fingerprint = sha256_hex(*(" ".join(value.split()) for value in (job_title, company_name, requirements)))
+        parts = [cv_fingerprint, job_fingerprint, type(self).__name__, self.model_name, ANALYSIS_PROMPT_VERSION]
+        if sections:
+            parts.append(",".join(sections))
+        if settings.deterministic_scoring:
+            # The computed numbers are part of the prompt
+            parts.append(f"scoring-{ScoringEngine.VERSION}")
+        return sha256_hex(*parts)
+
+    def analyze_cv(self, cv_data: dict, job_title: str, company_name: str, requirements: str,
+                   use_cache: bool = True, sections: Optional[Iterable[str]] = None) -> dict:
+        """Analyze the CV against the job; `sections` limits the analysis to those top-level sections."""
+        sections = self._analysis_sections(sections)
+        scores = ScoringEngine.score(cv_data, requirements) if settings.deterministic_scoring else None
+        cache_key = self._analysis_cache_key(cv_data, job_title, company_name, requirements, sections)
+        analysis_data = None
+        if use_cache and settings.analysis_cache_enabled:
+            cached = analysis_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Analysis cache hit for {self.model_name}")
+                analysis_data = json.loads(cached)
+
+        if analysis_data is None:
+            analysis_data = self._run_analysis(cv_data, job_title, company_name, requirements, sections, scores)
+            if sections:
+                analysis_data = {section: analysis_data.get(section) for section in sections}
+            if settings.analysis_cache_enabled:
+                analysis_cache.set(cache_key, json.dumps(analysis_data))
+
+        if scores is not None:
+            # The model's own arithmetic is not trusted for these fields
+            ScoringEngine.apply_to_analysis(analysis_data, scores)
+        analysis_data["metadata"] = self._analysis_metadata(analysis_data, job_title, company_name)
+        return analysis_data
+
+    async def analyze_cv_decomposed(self, cv_data: dict, job_title: str, company_name: str, requirements: str,
+                                    use_cache: bool = True, sections: Optional[Iterable[str]] = None) -> dict:
+        """
+        Generate each analysis section with its own call, all running concurrently, and assemble
+        the result. Sections are cached individually.
+        """
+        sections = self._analysis_sections(sections) or [section.value for section in AnalysisSection]
+        parts = await asyncio.gather(*(
+            pools.run_llm(self.analyze_cv, cv_data, job_title, company_name, requirements,
+                          use_cache=use_cache, sections=[section], lane=self.provider)
+            for section in sections
+        ))
+        analysis_data = {section: part.get(section) for section, part in zip(sections, parts)}
+        analysis_data["metadata"] = self._analysis_metadata(analysis_data, job_title, company_name)
+        return analysis_data
+
+    @staticmethod
+    def _analysis_metadata(analysis_data: dict, job_title: str, company_name: str) -> dict:
+        # Metadata of the analysis result is regenerated on every call, cached or not
+        return {
             "analysis_date": datetime.now().isoformat(),
             "job_title": job_title,
             "company_name": company_name,
-            "analyzer_comments": analysis_data.get("metadata", {}).get("analyzer_comments", "")
+            "analyzer_comments": (analysis_data.get("metadata") or {}).get("analyzer_comments", "")
         }
 
+    def _run_analysis(self, cv_data: dict, job_title: str, company_name: str, requirements: str,
+                      sections: Optional[List[str]] = None, scores: Optional[dict] = None) -> dict:
+        with observe_stage("prompt_build", self.model_type):
+            template = analysis_sections_prompt(sections) if sections else analysis_prompt
+            formatted_prompt = template.replace("[JOB_TITLE]", job_title)\
+                                       .replace("[COMPANY_NAME]", company_name)\
+                                       .replace("[REQUIREMENTS]", requirements)
+            if scores is not None:
+                facts = {key: scores[key] for key in ("years_actual", "years_required", "required_skills",
+                                                      "matching_skills", "missing_skills")}
+                formatted_prompt += ("\nThese values were computed from the CV; use them as given for the years and "
+                                     "skills they cover and judge any other requirements yourself:\n"
+                                     f"{json.dumps(facts)}\n")
+
+            analysis_input = f"{formatted_prompt}\n\nAnalyze the following CV data:\n{json.dumps(cv_data, indent=2)}"
+            schema = _restricted_schema(CVAnalysisResponse, sections) if sections else None
+        analysis_data: dict = self._invoke(analysis_input, is_analysis=True, 
+                                           job_title=job_title, 
+                                           company_name=company_name, 
+                                           requirements=requirements,
+                                           schema=schema)
         return analysis_data
@@ -1,14 +1,40 @@
 import json
+from typing import Iterator, Optional
+
+import httpx
 from anthropic import Anthropic
 
+from app.config import settings
 from app.services.cv_processor_services.base_service import BaseService
+from app.services.usage import report_tokens
 from app.utils.prompt import prompt
 
 
 class ClaudeService(BaseService):
-    def __init__(self, model: str, api_key: str):
+    provider = "anthropic"
+
+    def __init__(self, model: str, api_key: str, http_client: Optional[httpx.Client] = None):
         self.model = model
-        self.client = Anthropic(api_key=f"{api_key}")
+        # Retries are handled by BaseService so they respect rate limits and the circuit breaker
+        self.client = Anthropic(api_key=f"{api_key}", http_client=http_client, max_retries=0)
+
+    def _request(self, text: str, is_analysis: bool, **kwargs) -> dict:
+        system_message = "You are a CV analysis expert." if is_analysis else "You are a CV parsing assistant."
+        instructions = kwargs.get("instructions", prompt)
+        content = text if is_analysis else f"{instructions}\n\n###pdf content\n{text}"
+        return dict(
+            model=self.model,
+            max_tokens=4096,
+            messages=[
+                {
+                    "role": "user",
+                    "content": content
+                }
+            ],
+            system=system_message,
+            temperature=0,
+            timeout=kwargs.get("timeout", settings.llm_timeout_seconds)
+        )
 
     def _call_api(self, text: str, is_analysis: bool = False, **kwargs) -> dict:
         """
@@ -16,22 +42,9 @@ class ClaudeService(BaseService):
         Reference: https://docs.anthropic.com/claude/reference/messages_post
         """
         try:
-            system_message = "You are a CV analysis expert." if is_analysis else "You are a CV parsing assistant."
-            content = text if is_analysis else f"{prompt}\n\n###pdf content\n{text}"
-            
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=4096,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": content
-                    }
-                ],
-                system=system_message,
-                temperature=0
-            )
-            
+            response = self.client.messages.create(**self._request(text, is_analysis, **kwargs))
+            report_tokens(response.usage.input_tokens, response.usage.output_tokens)
+
             # Parse the response and ensure it's valid JSON
             try:
                 result = json.loads(response.content[0].text.strip())
@@ -46,4 +59,22 @@ class ClaudeService(BaseService):
                     return json.loads(json_str)
                 raise RuntimeError("Failed to parse JSON response from Claude")
         except Exception as e:
-            raise RuntimeError(f"Anthropic API error: {e}")
+            raise RuntimeError(f"Anthropic API error: {e}") from e
+
+    def _stream_api(self, text: str, is_analysis: bool = False, **kwargs) -> Iterator[str]:
+        """
+        Streams the Claude response text as it is generated.
+        Reference: https://docs.anthropic.com/claude/reference/messages-streaming
+        """
+        try:
+            stream = self.client.messages.create(**self._request(text, is_analysis, **kwargs), stream=True)
+            for event in stream:
+                if event.type == "content_block_delta" and getattr(event.delta, "text", None):
+                    yield event.delta.text
+                elif event.type == "message_start":
+                    report_tokens(prompt_tokens=event.message.usage.input_tokens)
+                elif event.type == "message_delta":
+                    # Cumulative output tokens; the last delta carries the final count
+                    report_tokens(completion_tokens=event.usage.output_tokens)
+        except Exception as e:
+            raise RuntimeError(f"Anthropic API error: {e}") from e
@@ -1,31 +1,71 @@
 import json
+from typing import Iterator, List, Optional
 
+import httpx
 from openai import OpenAI
 
+from app.config import settings
 from app.services.cv_processor_services.base_service import BaseService
+from app.services.usage import report_tokens
 from app.utils.prompt import prompt
 
 
 class DeepSeekService(BaseService):
-    def __init__(self, model: str, api_key: str):
+    provider = "deepseek"
+
+    def __init__(self, model: str, api_key: str, http_client: Optional[httpx.Client] = None):
         self.model = model
-        self.client = OpenAI(api_key=api_key, )
+        # Retries are handled by BaseService so they respect rate limits and the circuit breaker
+        self.client = OpenAI(api_key=api_key, http_client=http_client, max_retries=0)
+
+    @staticmethod
+    def _messages(text: str, is_analysis: bool, instructions: str = prompt) -> List[dict]:
+        if is_analysis:
+            return [{"role": "system", "content": "You are a CV analysis expert."},
+                    {"role": "user", "content": text}]
+        return [{"role": "system", "content": "You are a CV parsing assistant."},
+                {"role": "user", "content": instructions},
+                {"role": "user", "content": f"###pdf content\n{text}"}]
 
-    def _call_api(self, text: str) -> dict:
+    def _call_api(self, text: str, is_analysis: bool = False, **kwargs) -> dict:
         """
-        Calls Deepseek model to extract CV details.
+        Calls Deepseek model to extract CV details or analyze CV.
         Reference: https://api-docs.deepseek.com
         """
         try:
             response = self.client.chat.completions.create(
                 model=self.model,
                 store=False,
-                messages=[{"role": "system", "content": "You are a CV parsing assistant."},
-                          {"role": "user", "content": prompt},
-                          {"role": "user", "content": f"###pdf content\n{text}"}],
+                messages=self._messages(text, is_analysis, kwargs.get("instructions", prompt)),
                 response_format={'type': 'json_object'},
-                timeout=8
+                timeout=kwargs.get("timeout", settings.llm_timeout_seconds)
             )
+            if response.usage is not None:
+                report_tokens(response.usage.prompt_tokens, response.usage.completion_tokens)
             return json.loads(response.choices[0].message.content.strip())
         except Exception as e:
-            raise RuntimeError(f"OpenAI API error: {e}")
+            raise RuntimeError(f"OpenAI API error: {e}") from e
+
+    def _stream_api(self, text: str, is_analysis: bool = False, **kwargs) -> Iterator[str]:
+        """
+        Streams the Deepseek completion text as it is generated.
+        Reference: https://api-docs.deepseek.com
+        """
+        try:
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                store=False,
+                messages=self._messages(text, is_analysis, kwargs.get("instructions", prompt)),
+                response_format={'type': 'json_object'},
+                timeout=kwargs.get("timeout", settings.llm_timeout_seconds),
+                stream=True,
+                # The final chunk then carries the token usage (with no choices)
+                stream_options={"include_usage": True}
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                if chunk.usage is not None:
+                    report_tokens(chunk.usage.prompt_tokens, chunk.usage.completion_tokens)
+        except Exception as e:
+            raise RuntimeError(f"OpenAI API error: {e}") from e
@@ -1,39 +1,75 @@
 import json
 import logging
 import traceback
+from typing import Iterator
 
 import google.generativeai as genai
 
 from app.config import settings
 from app.services.cv_processor_services.base_service import BaseService
+from app.services.usage import report_tokens
 from app.utils.prompt import prompt
 
 logger = logging.getLogger(__name__)
 
 
 class GeminiService(BaseService):
+    provider = "gemini"
+
     def __init__(self, model: str):
         self.model = model
         genai.configure(api_key=settings.gemini_api_key)
+        self.client = genai.GenerativeModel(self.model)
+
+    def _request(self, text: str, is_analysis: bool, **kwargs) -> dict:
+        if is_analysis:
+            contents = [
+                {"role": "user", "parts": ["You are a CV analysis expert."]},
+                {"role": "user", "parts": [text]}
+            ]
+        else:
+            contents = [
+                {"role": "user", "parts": ["You are a CV parsing assistant."]},
+                {"role": "user", "parts": [kwargs.get("instructions", prompt)]},
+                {"role": "user", "parts": [f"###pdf content\n{text}"]}
+            ]
+        return dict(
+            contents=contents,
+            generation_config=genai.GenerationConfig(
+                response_mime_type="application/json"),
+            request_options={"timeout": kwargs.get("timeout", settings.llm_timeout_seconds)}
+        )
+
+    @staticmethod
+    def _report_usage(response):
+        usage = getattr(response, "usage_metadata", None)
+        if usage and usage.total_token_count:
+            report_tokens(usage.prompt_token_count, usage.candidates_token_count)
 
-    def _call_api(self, text: str) -> dict:
+    def _call_api(self, text: str, is_analysis: bool = False, **kwargs) -> dict:
         """
-        Calls Gemini model to extract CV details.
+        Calls Gemini model to extract CV details or analyze CV.
         Reference: https://ai.google.dev/gemini-api/docs
         """
         try:
-            model = genai.GenerativeModel(self.model)
-            response = model.generate_content(
-                contents=[
-                    {"role": "user", "parts": ["You are a CV parsing assistant."]},
-                    {"role": "user", "parts": [prompt]},
-                    {"role": "user", "parts": [f"###pdf content\n{text}"]}
-                ],
-                generation_config=genai.GenerationConfig(
-                    response_mime_type="application/json")
-            )
-
+            response = self.client.generate_content(**self._request(text, is_analysis, **kwargs))
+            self._report_usage(response)
             return json.loads(response.text)
         except Exception as e:
             logging.error(traceback.format_exc())
-            raise RuntimeError(f"Gemini API error: {e}")
+            raise RuntimeError(f"Gemini API error: {e}") from e
+
+    def _stream_api(self, text: str, is_analysis: bool = False, **kwargs) -> Iterator[str]:
+        """
+        Streams the Gemini response text as it is generated.
+        Reference: https://ai.google.dev/gemini-api/docs/text-generation#generate-a-text-stream
+        """
+        try:
+            for chunk in self.client.generate_content(**self._request(text, is_analysis, **kwargs), stream=True):
+                if chunk.text:
+                    yield chunk.text
+                # Each chunk carries the running counts, so the last one reported wins
+                self._report_usage(chunk)
+        except Exception as e:
+            logging.error(traceback.format_exc())
+            raise RuntimeError(f"Gemini API error: {e}") from e
@@ -1,40 +1,95 @@
 import json
+from typing import Iterator, Optional
 
 from ollama import Client
 
 from app.config import settings
-from app.models.cv_model import CVModel
+from app.models.cv_model import CVModel, CVAnalysisResponse
 from app.services.cv_processor_services.base_service import BaseService
+from app.services.usage import report_tokens
 from app.utils.prompt import prompt
 
 
 class OllamaService(BaseService):
-    def __init__(self, model: str):
+    provider = "ollama"
+    # A local generation that timed out would only time out again
+    timeouts_transient = False
+
+    def __init__(self, model: str, client: Optional[Client] = None):
         self.model = model
-        self.client = Client(
+        self.client = client or Client(
             host=settings.ollama_host,
+            timeout=settings.ollama_timeout_seconds,
+        )
+
+    @property
+    def timeout_seconds(self) -> Optional[float]:
+        return settings.ollama_timeout_seconds
+
+    @property
+    def deadline_seconds(self) -> Optional[float]:
+        return settings.ollama_deadline_seconds
+
+    def _request(self, text: str, is_analysis: bool, **kwargs) -> dict:
+        # Section-wise calls pass the schema of just the fields they ask for
+        if is_analysis:
+            system_message = "You are a CV analysis expert."
+            content = text
+            schema = kwargs.get("schema") or CVAnalysisResponse.model_json_schema()
+        else:
+            system_message = "You are a helpful assistant that organizes CV text into structured JSON format."
+            content = f"{kwargs.get('instructions', prompt)}\nCV Text:\n{text}"
+            schema = kwargs.get("schema") or CVModel.model_json_schema()
+        return dict(
+            model=self.model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": system_message
+                },
+                {
+                    'role': 'user',
+                    'content': content,
+                },
+            ],
+            format=schema,
         )
 
-    def _call_api(self, text: str) -> dict:
+    @staticmethod
+    def _report_usage(response, first_token: bool = True):
+        """Token counts and timings (in nanoseconds) that Ollama returns with the final response."""
+        if response.eval_count is None:
+            return
+        first_token_seconds = None
+        if first_token:
+            # Loading the model and evaluating the prompt both happen before the first token
+            first_token_seconds = ((response.load_duration or 0) + (response.prompt_eval_duration or 0)) / 1e9
+        report_tokens(response.prompt_eval_count or 0, response.eval_count, first_token_seconds=first_token_seconds,
+                      generation_seconds=(response.eval_duration or 0) / 1e9 or None)
+
+    def _call_api(self, text: str, is_analysis: bool = False, **kwargs) -> dict:
         """
-        Calls Ollama model to extract CV details.
+        Calls Ollama model to extract CV details or analyze CV.
         Reference: https://github.com/ollama/ollama-python
         """
         try:
-            response = self.client.chat(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a helpful assistant that organizes CV text into structured JSON format."
-                    },
-                    {
-                        'role': 'user',
-                        'content': f"{prompt}\nCV Text:\n{text}",
-                    },
-                ],
-                format=CVModel.model_json_schema(),
-            )
+            response = self.client.chat(**self._request(text, is_analysis, **kwargs))
+            self._report_usage(response)
             return json.loads(response.message.content)
         except Exception as e:
-            raise RuntimeError(f"Ollama API error: {e}")
+            raise RuntimeError(f"Ollama API error: {e}") from e
+
+    def _stream_api(self, text: str, is_analysis: bool = False, **kwargs) -> Iterator[str]:
+        """
+        Streams the Ollama response text as it is generated.
+        Reference: https://github.com/ollama/ollama-python#streaming-responses
+        """
+        try:
+            for part in self.client.chat(**self._request(text, is_analysis, **kwargs), stream=True):
+                if part.message.content:
+                    yield part.message.content
+                if part.done:
+                    # The streamed first chunk already gave the time to first token
+                    self._report_usage(part, first_token=False)
+        except Exception as e:
+            raise RuntimeError(f"Ollama API error: {e}") from e
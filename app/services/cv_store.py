@@ -0,0 +1,309 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from app.config import settings
+from app.models.cv_model import CVModel
+from app.models.store_model import StoredCV
+from app.services.scoring import SKILL_ALIASES, YEARS_RE, ScoringEngine
+from app.utils.models import ModelType
+
+logger = logging.getLogger(__name__)
+
+CLAUSE_SPLIT_RE = re.compile(r"[,;&]|\bAND\b", re.IGNORECASE)
+ALTERNATIVE_SPLIT_RE = re.compile(r"\|+|\bOR\b", re.IGNORECASE)
+NEGATION_RE = re.compile(r"^(?:NOT\s+|-)", re.IGNORECASE)
+# Words around terms in a query ("5+ years of experience with Go") that are not search terms
+QUERY_FILLER_RE = re.compile(r"\b(?:of|with|in|experience|experienced|exp)\b|[()\"]", re.IGNORECASE)
+# Spellings this short ("go", "ai") only match the skills column; in free text they are mostly noise
+SHORT_TERM_LENGTH = 2
+# Normalized skills are indexed as single tokens: "c++" -> "cplusplus", "node.js" -> "nodedotjs"
+SKILL_KEY_CHARS = {"+": "plus", "#": "sharp", ".": "dot"}
+# Facet tokens: every CV has ALL_FACET, and "years<n>" for each whole year of experience up to MAX_YEAR_FACET,
+# so "5+ years" is a lookup in the index instead of a filter over every matching row. The year facets are
+# a snapshot taken when the CV was stored; CVs with a current ("Present") role also get ONGOING_FACET and
+# are checked against their experience as of query time
+ALL_FACET = "cv"
+ONGOING_FACET = "ongoing"
+MAX_YEAR_FACET = 50
+YEAR_SECONDS = 365.25 * 24 * 3600
+# Years of experience as of now: a CV with an ongoing role keeps accruing time after it was stored
+CURRENT_YEARS_SQL = (f"(c.years_experience + CASE WHEN c.ongoing THEN "
+                     f"MAX(0, (julianday('now') - 2440587.5) * 86400 - c.updated_at) / {YEAR_SECONDS} ELSE 0 END)")
+
+SELECT_COLUMNS = ("c.id, c.source_hash, c.model_type, c.filename, c.name, c.title, c.location, "
+                  f"ROUND({CURRENT_YEARS_SQL}, 1), c.created_at, c.updated_at")
+
+
+def _phrase(text: str) -> str:
+    return '"' + text.replace('"', '""') + '"'
+
+
+def skill_key(skill: str) -> str:
+    return "".join(SKILL_KEY_CHARS.get(char, char) for char in skill if char.isalnum() or char in SKILL_KEY_CHARS)
+
+
+def _facets(years: float, ongoing: bool, model_type: ModelType) -> str:
+    tokens = [ALL_FACET, f"model{skill_key(model_type.value)}"] + ([ONGOING_FACET] if ongoing else [])
+    tokens += [f"years{n}" for n in range(1, min(int(years), MAX_YEAR_FACET) + 1)]
+    return " ".join(tokens)
+
+
+class CVStore:
+    """
+    SQLite store of parsed CVs, one row per (source PDF hash, model). Name, titles, companies,
+    locations, skills (as written and normalized), the remaining CV text and facet tokens for the
+    model and years of experience are indexed in an FTS5 table, so a search is a single full-text
+    query answered from the index, with no LLM call.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA busy_timeout=5000")
+            # Metadata rows stay small so filters and sorting don't page through the CV payloads
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cvs ("
+                "id INTEGER PRIMARY KEY, source_hash TEXT NOT NULL, model_type TEXT NOT NULL, filename TEXT, "
+                "name TEXT, title TEXT, location TEXT, years_experience REAL NOT NULL, "
+                "ongoing INTEGER NOT NULL DEFAULT 0, "
+                "created_at REAL NOT NULL, updated_at REAL NOT NULL, UNIQUE (source_hash, model_type))"
+            )
+            # Stores created before ongoing roles were tracked keep snapshot years until a CV is stored again
+            if "ongoing" not in {row[1] for row in self._conn.execute("PRAGMA table_info(cvs)")}:
+                self._conn.execute("ALTER TABLE cvs ADD COLUMN ongoing INTEGER NOT NULL DEFAULT 0")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS cv_data (id INTEGER PRIMARY KEY, data TEXT NOT NULL)")
+            # "+" and "#" are part of tokens so C++ and C# stay searchable
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS cv_search USING fts5("
+                "name, titles, companies, locations, skills, skill_keys, facets, content, "
+                "tokenize = \"unicode61 tokenchars '+#'\")"
+            )
+        return self._conn
+
+    @staticmethod
+    def _index_fields(cv: CVModel, years: float, ongoing: bool, model_type: ModelType) -> dict:
+        experience = cv.experience or []
+        content = [entry.responsibilities or "" for entry in experience]
+        content += [f"{project.title or ''} {project.description or ''} {' '.join(project.technologies_used)}"
+                    for project in cv.projects or []]
+        content += [f"{entry.degree or ''} {entry.field_of_study or ''} {entry.institution or ''}"
+                    for entry in cv.education or []]
+        content += [f"{entry.name or ''} {entry.issuing_organization or ''}" for entry in cv.certifications or []]
+        content = "\n".join(content)
+        # Listed skills plus dictionary skills only mentioned in descriptions, in normalized form
+        skills = ScoringEngine.candidate_skills(cv.model_dump()) | ScoringEngine.mentioned_skills(content)
+        return {
+            "name": cv.name or "",
+            "titles": "\n".join([cv.title or ""] + [entry.position or "" for entry in experience]),
+            "companies": "\n".join(entry.company or "" for entry in experience),
+            "locations": "\n".join([cv.contact.location or ""]
+                                   + [entry.location or "" for entry in experience + list(cv.education or [])]),
+            "skills": "\n".join(cv.skills + cv.skills_from_work_experience),
+            "skill_keys": " ".join(sorted(filter(None, (skill_key(skill) for skill in skills)))),
+            "facets": _facets(years, ongoing, model_type),
+            "content": content,
+        }
+
+    def save(self, source_hash: str, model_type: ModelType, filename: Optional[str], cv: CVModel) -> int:
+        """Insert or replace the parse of one source document by one model; returns the CV id."""
+        years = ScoringEngine.experience_years([entry.model_dump() for entry in cv.experience or []])
+        ongoing = any(ScoringEngine.is_present(entry.end_date) and ScoringEngine.parse_date(entry.start_date)
+                      for entry in cv.experience or [])
+        fields = self._index_fields(cv, years, ongoing, model_type)
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute("SELECT id FROM cvs WHERE source_hash = ? AND model_type = ?",
+                                 (source_hash, model_type.value)).fetchone()
+                values = (filename, cv.name, cv.title, cv.contact.location, years, ongoing, now)
+                if row is None:
+                    cv_id = db.execute(
+                        "INSERT INTO cvs (source_hash, model_type, filename, name, title, location, "
+                        "years_experience, ongoing, updated_at, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (source_hash, model_type.value) + values + (now,),
+                    ).lastrowid
+                else:
+                    cv_id = row[0]
+                    db.execute(
+                        "UPDATE cvs SET filename = ?, name = ?, title = ?, location = ?, years_experience = ?, "
+                        "ongoing = ?, updated_at = ? WHERE id = ?",
+                        values + (cv_id,),
+                    )
+                    db.execute("DELETE FROM cv_search WHERE rowid = ?", (cv_id,))
+                db.execute("INSERT OR REPLACE INTO cv_data (id, data) VALUES (?, ?)", (cv_id, cv.model_dump_json()))
+                db.execute(
+                    "INSERT INTO cv_search (rowid, name, titles, companies, locations, skills, skill_keys, facets, "
+                    "content) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (cv_id, fields["name"], fields["titles"], fields["companies"], fields["locations"],
+                     fields["skills"], fields["skill_keys"], fields["facets"], fields["content"]),
+                )
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        return cv_id
+
+    @staticmethod
+    def _row_to_model(row, include_cv: bool) -> StoredCV:
+        return StoredCV(
+            cv_id=row[0],
+            source_hash=row[1],
+            model_type=row[2],
+            filename=row[3],
+            name=row[4],
+            title=row[5],
+            location=row[6],
+            years_experience=row[7],
+            created_at=datetime.fromtimestamp(row[8]),
+            updated_at=datetime.fromtimestamp(row[9]),
+            cv=CVModel.model_validate_json(row[10]) if include_cv else None,
+        )
+
+    def get_many(self, cv_ids: List[int]) -> List[StoredCV]:
+        """Stored CVs with their data, in the order of `cv_ids`; unknown ids are skipped."""
+        if not cv_ids:
+            return []
+        placeholders = ", ".join("?" * len(cv_ids))
+        with self._lock:
+            rows = self._db().execute(
+                f"SELECT {SELECT_COLUMNS}, d.data FROM cvs c JOIN cv_data d ON d.id = c.id "
+                f"WHERE c.id IN ({placeholders})",
+                list(cv_ids),
+            ).fetchall()
+        by_id = {row[0]: self._row_to_model(row, include_cv=True) for row in rows}
+        return [by_id[cv_id] for cv_id in dict.fromkeys(cv_ids) if cv_id in by_id]
+
+    def get(self, cv_id: int) -> Optional[StoredCV]:
+        found = self.get_many([cv_id])
+        return found[0] if found else None
+
+    def delete(self, cv_id: int) -> bool:
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                deleted = db.execute("DELETE FROM cvs WHERE id = ?", (cv_id,)).rowcount
+                db.execute("DELETE FROM cv_data WHERE id = ?", (cv_id,))
+                db.execute("DELETE FROM cv_search WHERE rowid = ?", (cv_id,))
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        return bool(deleted)
+
+    @staticmethod
+    def parse_query(query: str) -> Tuple[List[Tuple[bool, List[str]]], Optional[float]]:
+        """
+        Split a query such as "Python AND Kubernetes, 5+ years" into clauses that must all match
+        (each a list of OR-ed terms, optionally negated with NOT or a leading "-") and a minimum
+        number of years of experience.
+        """
+        query = query or ""
+        min_years = ScoringEngine.required_years(query)
+        clauses = []
+        for chunk in CLAUSE_SPLIT_RE.split(YEARS_RE.sub(" ", query)):
+            chunk = chunk.strip()
+            negated = bool(NEGATION_RE.match(chunk))
+            chunk = NEGATION_RE.sub("", chunk)
+            terms = [" ".join(QUERY_FILLER_RE.sub(" ", term).split()) for term in ALTERNATIVE_SPLIT_RE.split(chunk)]
+            terms = [term for term in terms if re.search(r"\w", term)]
+            if terms:
+                clauses.append((negated, terms))
+        return clauses, min_years
+
+    @staticmethod
+    def _term_expression(terms: List[str]) -> str:
+        """
+        FTS5 expression matching any of `terms`. Dictionary skills match the normalized skill keys
+        only (which include skills mentioned in descriptions); other terms also match the CV text.
+        """
+        alternatives = []
+        for term in terms:
+            skill = ScoringEngine.normalize_skill(term)
+            key = skill_key(skill)
+            if key:
+                alternatives.append(f"skill_keys : {_phrase(key)}")
+            if skill not in SKILL_ALIASES:
+                for spelling in dict.fromkeys((term.lower(), skill)):
+                    alternatives.append(f"skills : {_phrase(spelling)}" if len(spelling) <= SHORT_TERM_LENGTH
+                                        else _phrase(spelling))
+        return "(" + " OR ".join(dict.fromkeys(alternatives)) + ")"
+
+    def search(self, query: Optional[str] = None, skills: Optional[List[str]] = None, title: Optional[str] = None,
+               company: Optional[str] = None, location: Optional[str] = None, min_years: Optional[float] = None,
+               model_type: Optional[ModelType] = None, limit: int = 20, offset: int = 0,
+               include_cv: bool = False) -> Tuple[int, List[StoredCV], Optional[float]]:
+        """Returns the total number of matches, one page of them (most recently stored first) and the minimum years applied."""
+        clauses, query_years = self.parse_query(query or "")
+        clauses += [(False, [skill]) for skill in skills or []]
+        min_years = query_years if min_years is None else min_years
+
+        # Every condition becomes part of one FTS5 boolean query, evaluated on the index's posting lists
+        included = [self._term_expression(terms) for negated, terms in clauses if not negated]
+        excluded = [self._term_expression(terms) for negated, terms in clauses if negated]
+        for column, value in (("titles", title), ("companies", company), ("locations", location)):
+            if value and re.search(r"\w", value):
+                included.append(f"{column} : {_phrase(value)}")
+        if model_type is not None:
+            included.append(f"facets : {_phrase('model' + skill_key(model_type.value))}")
+        refine, refine_params = "", []
+        if min_years:
+            whole_years = min(int(min_years), MAX_YEAR_FACET)
+            if whole_years:
+                # The snapshot facet, or a role still running that may have reached the minimum since
+                included.append(f"facets : ({_phrase(f'years{whole_years}')} OR {_phrase(ONGOING_FACET)})")
+            # Ongoing roles, fractional and very large minimums are checked on the rows the index returns
+            refine, refine_params = f"AND {CURRENT_YEARS_SQL} >= ?", [min_years]
+        if excluded and not included:
+            included.append(f"facets : {_phrase(ALL_FACET)}")
+
+        columns, join = SELECT_COLUMNS, ""
+        if include_cv:
+            columns, join = SELECT_COLUMNS + ", d.data", "JOIN cv_data d ON d.id = c.id"
+        with self._lock:
+            db = self._db()
+            if not included:
+                total = db.execute("SELECT COUNT(*) FROM cvs").fetchone()[0]
+                rows = db.execute(f"SELECT {columns} FROM cvs c {join} ORDER BY c.id DESC LIMIT ? OFFSET ?",
+                                  (limit, offset)).fetchall()
+            else:
+                match = " AND ".join(included) + "".join(f" NOT {expression}" for expression in excluded)
+                if refine:
+                    total = db.execute(f"SELECT COUNT(*) FROM cv_search s JOIN cvs c ON c.id = s.rowid "
+                                       f"WHERE cv_search MATCH ? {refine}", [match] + refine_params).fetchone()[0]
+                else:
+                    total = db.execute("SELECT COUNT(*) FROM cv_search WHERE cv_search MATCH ?", (match,)).fetchone()[0]
+                rows = db.execute(
+                    f"SELECT {columns} FROM cv_search s JOIN cvs c ON c.id = s.rowid {join} "
+                    f"WHERE cv_search MATCH ? {refine} ORDER BY s.rowid DESC LIMIT ? OFFSET ?",
+                    [match] + refine_params + [limit, offset],
+                ).fetchall()
+        return total, [self._row_to_model(row, include_cv) for row in rows], min_years
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db().execute("SELECT COUNT(*) FROM cvs").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+cv_store = CVStore(os.path.join(settings.data_dir, "cvs.sqlite3"))
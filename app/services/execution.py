@@ -0,0 +1,145 @@
+import asyncio
+import contextvars
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+
+from app.config import settings
+from app.utils.metrics import LLM_LANE_QUEUE_DEPTH, LLM_LANE_WAIT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutionPools:
+    """
+    Runs blocking work off the event loop.
+    PDF-to-markdown conversion is CPU-bound and goes to a process pool, provider calls are
+    network-bound and go to a thread pool. Each stage has its own semaphore so a burst of
+    uploads queues in the event loop instead of piling up inside the executors.
+
+    Provider calls also pass through their provider's lane: a semaphore sized to the provider's
+    `max_in_flight` that is awaited before a thread is taken, so calls to a saturated provider
+    (a local Ollama host) wait on the event loop instead of parking threads other providers need.
+    """
+
+    def __init__(self, pdf_workers: int, pdf_max_concurrency: int,
+                 llm_workers: int, llm_max_concurrency: int, lane_sizes: Optional[Dict[str, int]] = None):
+        self.pdf_workers = pdf_workers
+        self.llm_workers = llm_workers
+        self._pdf_slots = asyncio.Semaphore(pdf_max_concurrency)
+        self._llm_slots = asyncio.Semaphore(llm_max_concurrency)
+        self._lanes = {provider: asyncio.Semaphore(size) for provider, size in (lane_sizes or {}).items()}
+        self._pdf_pool: Optional[ProcessPoolExecutor] = None
+        self._llm_pool: Optional[ThreadPoolExecutor] = None
+
+    def start(self):
+        if self._pdf_pool is None:
+            # spawn avoids forking a process that already runs uvicorn and client threads
+            self._pdf_pool = ProcessPoolExecutor(max_workers=self.pdf_workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+        if self._llm_pool is None:
+            self._llm_pool = ThreadPoolExecutor(max_workers=self.llm_workers, thread_name_prefix="llm")
+        logger.info(f"Execution pools started (pdf_workers={self.pdf_workers}, llm_workers={self.llm_workers})")
+
+    def shutdown(self):
+        if self._pdf_pool is not None:
+            self._pdf_pool.shutdown(wait=True, cancel_futures=True)
+            self._pdf_pool = None
+        if self._llm_pool is not None:
+            self._llm_pool.shutdown(wait=False, cancel_futures=True)
+            self._llm_pool = None
+        logger.info("Execution pools stopped")
+
+    async def run_extraction(self, func: Callable[..., Any], *args) -> Any:
+        """Run a picklable CPU-bound callable in the process pool."""
+        self.start()
+        async with self._pdf_slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pdf_pool, func, *args)
+
+    @asynccontextmanager
+    async def _lane(self, provider: Optional[str]) -> AsyncIterator[None]:
+        lane = self._lanes.get(provider)
+        if lane is None:
+            yield
+            return
+        started = time.perf_counter()
+        LLM_LANE_QUEUE_DEPTH.labels(provider).inc()
+        try:
+            await lane.acquire()
+        finally:
+            LLM_LANE_QUEUE_DEPTH.labels(provider).dec()
+        LLM_LANE_WAIT_SECONDS.labels(provider).observe(time.perf_counter() - started)
+        try:
+            yield
+        finally:
+            lane.release()
+
+    async def run_llm(self, func: Callable[..., Any], *args, lane: Optional[str] = None, **kwargs) -> Any:
+        """
+        Run a blocking provider call in the thread pool, keeping the caller's context variables.
+        `lane` is the provider the call goes to.
+        """
+        self.start()
+        async with self._lane(lane), self._llm_slots:
+            loop = asyncio.get_running_loop()
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(self._llm_pool, partial(context.run, func, *args, **kwargs))
+
+    async def stream_llm(self, func: Callable[..., Iterator[Any]], *args, lane: Optional[str] = None,
+                         **kwargs) -> AsyncIterator[Any]:
+        """
+        Drive a blocking generator on one thread-pool worker and relay its items to the event loop.
+        The whole generator runs on a single worker so it never waits for a second pool slot while
+        holding a provider rate-limit slot.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        finished = object()
+
+        def produce():
+            iterator = func(*args, **kwargs)
+            try:
+                for item in iterator:
+                    loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+                    if stop.is_set():
+                        break
+                loop.call_soon_threadsafe(queue.put_nowait, (finished, None))
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, (finished, e))
+            finally:
+                close = getattr(iterator, "close", None)
+                if close is not None:
+                    close()
+
+        producer = asyncio.ensure_future(self.run_llm(produce, lane=lane))
+        try:
+            while True:
+                item, error = await queue.get()
+                if item is finished:
+                    if error is not None:
+                        raise error
+                    return
+                yield item
+        finally:
+            # The consumer went away (client disconnect): let the generator wind down at its next item
+            stop.set()
+            if not producer.done():
+                producer.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+
+pools = ExecutionPools(
+    pdf_workers=settings.pdf_workers,
+    pdf_max_concurrency=settings.pdf_max_concurrency,
+    llm_workers=settings.llm_workers,
+    llm_max_concurrency=settings.llm_max_concurrency,
+    # Provider-wide in-flight limits; per-model limits ("ollama:qwen:14b") are enforced by the rate limiter
+    lane_sizes={key: int(limits["max_in_flight"]) for key, limits in settings.rate_limits.items()
+                if ":" not in key and limits.get("max_in_flight")},
+)
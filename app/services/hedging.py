@@ -0,0 +1,54 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+async def hedged_call(calls: List[Tuple[str, Callable[[], Awaitable[T]]]], hedge_delay: Optional[float]) -> T:
+    """
+    Run `calls` (label, coroutine factory) as a fallback chain.
+    The first call starts immediately. The next one is started when the running calls have produced
+    nothing for `hedge_delay` seconds (a hedge), or right away when a call fails (failover). The first
+    successful result wins and the remaining tasks are cancelled; a blocking provider call already
+    running in a worker thread still finishes there, but its result is discarded.
+    """
+    labels = {}
+    pending = set()
+    next_index = 0
+    last_error: Optional[BaseException] = None
+
+    def launch():
+        nonlocal next_index
+        label, factory = calls[next_index]
+        task = asyncio.ensure_future(factory())
+        labels[task] = label
+        pending.add(task)
+        next_index += 1
+
+    launch()
+    try:
+        while pending:
+            can_hedge = hedge_delay is not None and next_index < len(calls)
+            done, pending = await asyncio.wait(pending, timeout=hedge_delay if can_hedge else None,
+                                               return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                logger.info(f"No response after {hedge_delay}s, hedging with {calls[next_index][0]}")
+                launch()
+                continue
+            for task in done:
+                if task.exception() is None:
+                    if len(labels) > 1:
+                        logger.info(f"{labels[task]} won the hedged call")
+                    return task.result()
+                last_error = task.exception()
+                logger.warning(f"{labels[task]} failed: {last_error}")
+            if next_index < len(calls):
+                logger.info(f"Failing over to {calls[next_index][0]}")
+                launch()
+        raise last_error
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,267 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.models.cv_model import CVModel
+from app.models.job_model import JobModel, JobStatus
+from app.services.pipeline import parse_document
+from app.utils.models import ModelType
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = (JobStatus.SUCCEEDED, JobStatus.FAILED)
+
+
+class JobStore:
+    """
+    SQLite-backed job table. Uploaded PDF bytes are kept with the job until it finishes,
+    so queued and interrupted jobs survive a restart.
+
+    A claimed job is leased to this store instance (a fresh id per process start) and the worker
+    renews the lease by bumping `updated_at`. Running jobs whose lease expired belonged to a
+    process that died or hung and are requeued, or failed once they used up `max_attempts`.
+    """
+
+    def __init__(self, db_path: str, lease_seconds: float = 60.0, max_attempts: int = 3):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.worker_id = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA busy_timeout=5000")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, status TEXT NOT NULL, model_type TEXT NOT NULL, filename TEXT, "
+                "content BLOB, use_cache INTEGER NOT NULL DEFAULT 1, result TEXT, error TEXT, "
+                "worker_id TEXT, attempts INTEGER NOT NULL DEFAULT 0, "
+                "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created_at ON jobs (status, created_at)")
+        return self._conn
+
+    def create(self, model_type: ModelType, filename: str, content: bytes, use_cache: bool = True) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._db().execute(
+                "INSERT INTO jobs (id, status, model_type, filename, content, use_cache, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, JobStatus.QUEUED.value, model_type.value, filename, content, int(use_cache), now, now),
+            )
+        return job_id
+
+    def claim_next(self) -> Optional[dict]:
+        """Atomically move the oldest queued job to running and return it with its content."""
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                self._expire_leases(db)
+                row = db.execute(
+                    "SELECT id, model_type, filename, content, use_cache FROM jobs "
+                    "WHERE status = ? ORDER BY created_at LIMIT 1",
+                    (JobStatus.QUEUED.value,),
+                ).fetchone()
+                if row is None:
+                    db.execute("COMMIT")
+                    return None
+                db.execute(
+                    "UPDATE jobs SET status = ?, worker_id = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (JobStatus.RUNNING.value, self.worker_id, time.time(), row[0]),
+                )
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        return {"id": row[0], "model_type": row[1], "filename": row[2], "content": row[3], "use_cache": bool(row[4])}
+
+    def complete(self, job_id: str, result_json: str):
+        self._finish(job_id, JobStatus.SUCCEEDED, result=result_json)
+
+    def fail(self, job_id: str, error: str):
+        self._finish(job_id, JobStatus.FAILED, error=error)
+
+    def _finish(self, job_id: str, status: JobStatus, result: Optional[str] = None, error: Optional[str] = None):
+        # A job whose lease expired may already be running elsewhere; that worker records the outcome
+        with self._lock:
+            self._db().execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, content = NULL, updated_at = ? "
+                "WHERE id = ? AND worker_id = ?",
+                (status.value, result, error, time.time(), job_id, self.worker_id),
+            )
+
+    def _expire_leases(self, db: sqlite3.Connection) -> int:
+        """Requeue running jobs whose lease expired; jobs that used up their attempts fail instead."""
+        now = time.time()
+        expired = (JobStatus.RUNNING.value, now - self.lease_seconds)
+        failed = db.execute(
+            "UPDATE jobs SET status = ?, error = ?, content = NULL, worker_id = NULL, updated_at = ? "
+            "WHERE status = ? AND updated_at < ? AND attempts >= ?",
+            (JobStatus.FAILED.value, f"Abandoned after {self.max_attempts} interrupted attempt(s)", now,
+             *expired, self.max_attempts),
+        ).rowcount
+        requeued = db.execute(
+            "UPDATE jobs SET status = ?, worker_id = NULL, updated_at = ? WHERE status = ? AND updated_at < ?",
+            (JobStatus.QUEUED.value, now, *expired),
+        ).rowcount
+        if failed or requeued:
+            logger.warning(f"Expired job leases: {requeued} requeued, {failed} failed after {self.max_attempts} attempts")
+        return requeued
+
+    def renew_lease(self, job_id: str) -> bool:
+        """Extend the lease on a running job; False when this instance no longer owns it."""
+        with self._lock:
+            return self._db().execute(
+                "UPDATE jobs SET updated_at = ? WHERE id = ? AND status = ? AND worker_id = ?",
+                (time.time(), job_id, JobStatus.RUNNING.value, self.worker_id),
+            ).rowcount == 1
+
+    def release_running(self) -> int:
+        """Requeue the jobs this instance is running on shutdown, without counting it as an attempt."""
+        with self._lock:
+            return self._db().execute(
+                "UPDATE jobs SET status = ?, worker_id = NULL, attempts = attempts - 1, updated_at = ? "
+                "WHERE status = ? AND worker_id = ?",
+                (JobStatus.QUEUED.value, time.time(), JobStatus.RUNNING.value, self.worker_id),
+            ).rowcount
+
+    def get(self, job_id: str) -> Optional[JobModel]:
+        with self._lock:
+            row = self._db().execute(
+                "SELECT id, status, model_type, filename, created_at, updated_at, result, error FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return JobModel(
+            job_id=row[0],
+            status=JobStatus(row[1]),
+            model_type=row[2],
+            filename=row[3],
+            created_at=datetime.fromtimestamp(row[4]),
+            updated_at=datetime.fromtimestamp(row[5]),
+            result=CVModel.model_validate_json(row[6]) if row[6] else None,
+            error=row[7],
+        )
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class JobQueue:
+    """Bounded pool of asyncio workers draining the job store through the parse pipeline."""
+
+    def __init__(self, store: JobStore, workers: int):
+        self.store = store
+        self.workers = workers
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._done_events: Dict[str, asyncio.Event] = {}
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"Job queue started with {self.workers} worker(s)")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        released = await run_in_threadpool(self.store.release_running)
+        await run_in_threadpool(self.store.close)
+        # Jobs of a process that dies without getting here are requeued once their lease expires
+        logger.info(f"Job queue stopped, {released} interrupted job(s) requeued")
+
+    async def submit(self, model_type: ModelType, filename: str, content: bytes, use_cache: bool = True) -> str:
+        job_id = await run_in_threadpool(self.store.create, model_type, filename, content, use_cache=use_cache)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job_id
+
+    async def get(self, job_id: str) -> Optional[JobModel]:
+        return await run_in_threadpool(self.store.get, job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[JobModel]:
+        """Long-poll until the job reaches a terminal status or the timeout expires."""
+        deadline = time.monotonic() + timeout
+        event = self._done_events.setdefault(job_id, asyncio.Event())
+        try:
+            while True:
+                job = await self.get(job_id)
+                remaining = deadline - time.monotonic()
+                if job is None or job.status in TERMINAL_STATUSES or remaining <= 0:
+                    return job
+                # Re-check the store periodically in case another worker process finished the job
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=min(remaining, 1.0))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._done_events.pop(job_id, None)
+
+    async def _worker(self, index: int):
+        while True:
+            job = await run_in_threadpool(self.store.claim_next)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=settings.job_poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            logger.info(f"Worker {index} processing job {job['id']}")
+            heartbeat = asyncio.create_task(self._renew_lease(job["id"]))
+            try:
+                cv_data = await parse_document(job["content"], job["filename"], ModelType(job["model_type"]),
+                                               use_cache=job["use_cache"])
+                await run_in_threadpool(self.store.complete, job["id"], cv_data.model_dump_json())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job {job['id']} failed: {e}")
+                logger.error(traceback.format_exc())
+                await run_in_threadpool(self.store.fail, job["id"], str(e))
+            finally:
+                heartbeat.cancel()
+
+            event = self._done_events.get(job["id"])
+            if event is not None:
+                event.set()
+
+    async def _renew_lease(self, job_id: str):
+        while True:
+            await asyncio.sleep(self.store.lease_seconds / 3)
+            if not await run_in_threadpool(self.store.renew_lease, job_id):
+                logger.warning(f"Lost the lease on job {job_id}; another worker may have taken it over")
+                return
+
+
+job_queue = JobQueue(
+    store=JobStore(os.path.join(settings.data_dir, "jobs.sqlite3"),
+                   lease_seconds=settings.job_lease_seconds, max_attempts=settings.job_max_attempts),
+    workers=settings.job_workers,
+)
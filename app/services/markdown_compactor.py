@@ -0,0 +1,141 @@
+import logging
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.utils.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+PAGE_BREAK_RE = re.compile(r"^\s*-{5,}\s*$")
+IMAGE_RE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+# Placeholders pymupdf4llm writes for images that were not exported
+PICTURE_PLACEHOLDER_RE = re.compile(r"\*{0,2}==> picture .*? <==\*{0,2}"
+                                    r"|\*{0,2}----- (?:Start|End) of picture text -----\*{0,2}(?:<br>)?")
+PAGE_NUMBER_RE = re.compile(r"^(?:page\s+\d+(?:\s*(?:of|/)\s*\d+)?|\d+\s*(?:of|/)\s*\d+|\d{1,3})$", re.IGNORECASE)
+TABLE_SEPARATOR_RE = re.compile(r"^\s*\|?(?:\s*:?-{2,}:?\s*\|)+\s*:?-*:?\s*\|?\s*$")
+EMPHASIS_RE = re.compile(r"\*\*")
+SPACES_RE = re.compile(r"[ \t ]{2,}")
+# Header/footer candidates are the first/last few lines of a page that repeat on most pages of a
+# long enough document; on shorter CVs a line shared by two pages is usually content (employer, city)
+HEADER_FOOTER_EDGE_LINES = 2
+HEADER_FOOTER_MIN_PAGES = 3
+HEADER_FOOTER_PAGE_RATIO = 0.75
+
+
+class MarkdownCompactor:
+    """
+    Normalizes pymupdf4llm markdown before it is sent to the LLM. Each step removes layout noise
+    (repeated headers/footers, page breaks, table pipes, image placeholders, emphasis markers and
+    extra whitespace) that costs prompt tokens without carrying CV content.
+    """
+
+    STEPS = ("images", "headers_footers", "page_breaks", "tables", "emphasis", "whitespace")
+
+    @staticmethod
+    def compact(text: str, steps: Optional[Iterable[str]] = None) -> Tuple[str, Dict]:
+        """Run the given steps (all by default) in pipeline order; returns the text and a savings report."""
+        selected = set(MarkdownCompactor.STEPS if steps is None else steps)
+        unknown = selected - set(MarkdownCompactor.STEPS)
+        if unknown:
+            raise ValueError(f"Unknown compaction step(s): {', '.join(sorted(unknown))}")
+
+        report = {"chars_before": len(text), "tokens_before": estimate_tokens(text), "steps": {}}
+        for step in MarkdownCompactor.STEPS:
+            if step not in selected:
+                continue
+            before = len(text)
+            text = getattr(MarkdownCompactor, f"_{step}")(text)
+            report["steps"][step] = before - len(text)
+
+        report["chars_after"] = len(text)
+        report["tokens_after"] = estimate_tokens(text)
+        report["tokens_saved"] = report["tokens_before"] - report["tokens_after"]
+        return text, report
+
+    @staticmethod
+    def _images(text: str) -> str:
+        text = IMAGE_RE.sub("", text)
+        return PICTURE_PLACEHOLDER_RE.sub("", text)
+
+    @staticmethod
+    def _pages(text: str) -> List[List[str]]:
+        pages, current = [], []
+        for line in text.split("\n"):
+            if PAGE_BREAK_RE.match(line):
+                pages.append(current)
+                current = []
+            else:
+                current.append(line)
+        pages.append(current)
+        return [page for page in pages if any(line.strip() for line in page)]
+
+    @staticmethod
+    def _edge_lines(page: List[str]) -> set:
+        """Indexes of the first and last few non-blank lines of a page, where headers and footers sit."""
+        filled = [i for i, line in enumerate(page) if line.strip()]
+        return set(filled[:HEADER_FOOTER_EDGE_LINES] + filled[-HEADER_FOOTER_EDGE_LINES:])
+
+    @staticmethod
+    def _headers_footers(text: str) -> str:
+        """
+        Drop page numbers at the top or bottom of a page and, on documents of at least
+        HEADER_FOOTER_MIN_PAGES pages, keep only the first copy of lines that sit at a page edge on
+        most pages. Lines in the body of a page are never removed, however often they repeat.
+        """
+        pages = MarkdownCompactor._pages(text)
+        if len(pages) < 2:
+            return text
+        edges = [MarkdownCompactor._edge_lines(page) for page in pages]
+        repeated = set()
+        if len(pages) >= HEADER_FOOTER_MIN_PAGES:
+            counts = Counter(line for page, page_edges in zip(pages, edges)
+                             for line in {page[i].strip() for i in page_edges})
+            threshold = max(HEADER_FOOTER_MIN_PAGES, math.ceil(HEADER_FOOTER_PAGE_RATIO * len(pages)))
+            repeated = {line for line, count in counts.items() if count >= threshold}
+
+        seen = set()
+        kept_pages = []
+        for page, page_edges in zip(pages, edges):
+            filled = [i for i, line in enumerate(page) if line.strip()]
+            outermost = {filled[0], filled[-1]}
+            kept = []
+            for i, line in enumerate(page):
+                stripped = line.strip()
+                if i in outermost and PAGE_NUMBER_RE.match(stripped):
+                    continue
+                if i in page_edges and stripped in repeated:
+                    if stripped in seen:
+                        continue
+                    seen.add(stripped)
+                kept.append(line)
+            kept_pages.append("\n".join(kept))
+        return "\n-----\n".join(kept_pages)
+
+    @staticmethod
+    def _page_breaks(text: str) -> str:
+        return "\n".join(line for line in text.split("\n") if not PAGE_BREAK_RE.match(line))
+
+    @staticmethod
+    def _tables(text: str) -> str:
+        """Turn markdown table rows into plain ' | '-separated cells and drop separator rows."""
+        lines = []
+        for line in text.split("\n"):
+            stripped = line.strip()
+            if stripped.startswith("|") and stripped.endswith("|"):
+                if TABLE_SEPARATOR_RE.match(stripped):
+                    continue
+                cells = [cell.strip() for cell in stripped.strip("|").split("|")]
+                line = " | ".join(cell.replace("<br>", " ") for cell in cells if cell)
+            lines.append(line)
+        return "\n".join(lines)
+
+    @staticmethod
+    def _emphasis(text: str) -> str:
+        return EMPHASIS_RE.sub("", text)
+
+    @staticmethod
+    def _whitespace(text: str) -> str:
+        lines = [SPACES_RE.sub(" ", line).strip() for line in text.split("\n")]
+        return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip() + "\n"
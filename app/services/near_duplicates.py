@@ -0,0 +1,224 @@
+import hashlib
+import logging
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.config import settings
+from app.models.cv_model import CVModel
+
+logger = logging.getLogger(__name__)
+
+SHINGLE_WORDS = 3
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+PERMUTATION_SEED = 1
+WORD_RE = re.compile(r"\w+")
+# Evict this fraction of the oldest documents at once when the index is full
+EVICTION_FRACTION = 0.1
+
+
+@lru_cache(maxsize=8)
+def _permutations(num_perm: int) -> Tuple[Tuple[int, int], ...]:
+    rng = random.Random(PERMUTATION_SEED)
+    return tuple((rng.randint(1, MERSENNE_PRIME - 1), rng.randint(0, MERSENNE_PRIME - 1)) for _ in range(num_perm))
+
+
+def lsh_shape(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    (bands, rows) with bands * rows == num_perm whose S-curve midpoint (1/bands)^(1/rows) is the
+    closest one at or below `threshold`, so documents at the threshold are likely to collide.
+    """
+    shapes = [(num_perm // rows, rows) for rows in range(1, num_perm + 1) if num_perm % rows == 0]
+    below = [shape for shape in shapes if (1 / shape[0]) ** (1 / shape[1]) <= threshold]
+    return max(below or shapes[:1], key=lambda shape: (1 / shape[0]) ** (1 / shape[1]))
+
+
+class MinHasher:
+    """MinHash signatures of the word shingles of extracted CV markdown."""
+
+    @staticmethod
+    def shingles(text: str) -> set:
+        words = WORD_RE.findall(text.lower())
+        if len(words) <= SHINGLE_WORDS:
+            return {" ".join(words)} if words else set()
+        return {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+    @staticmethod
+    def signature(text: str, num_perm: int) -> array:
+        """`num_perm` 32-bit minimum hashes; runs in the process pool, so it only takes plain arguments."""
+        hashes = [int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+                  for shingle in MinHasher.shingles(text)]
+        if not hashes:
+            return array("I", [MAX_HASH] * num_perm)
+        return array("I", [min((a * h + b) % MERSENNE_PRIME for h in hashes) & MAX_HASH
+                           for a, b in _permutations(num_perm)])
+
+    @staticmethod
+    def similarity(first: Sequence[int], second: Sequence[int]) -> float:
+        """Estimated Jaccard similarity of the two shingle sets."""
+        return sum(1 for x, y in zip(first, second) if x == y) / len(first)
+
+
+def diff_cvs(before: CVModel, after: CVModel) -> Dict[str, Dict[str, Any]]:
+    """Fields (contact fields individually) whose value differs between two parses."""
+    old, new = before.model_dump(mode="json"), after.model_dump(mode="json")
+    for data in (old, new):
+        data.update({f"contact.{key}": value for key, value in (data.pop("contact") or {}).items()})
+    return {field: {"before": old.get(field), "after": new.get(field)}
+            for field in sorted(set(old) | set(new)) if old.get(field) != new.get(field)}
+
+
+class NearDuplicateIndex:
+    """
+    Locality-sensitive hashing index over MinHash signatures, kept in SQLite. Each signature is
+    split into bands; documents sharing any band bucket are candidates, and candidates are kept
+    when their estimated similarity reaches the threshold. Entries point at CV store ids. The
+    oldest entries are evicted once the index holds more than `max_documents`.
+    """
+
+    def __init__(self, db_path: str, num_perm: int, threshold: float, max_documents: int):
+        self.db_path = db_path
+        self.num_perm = num_perm
+        self.threshold = threshold
+        self.max_documents = max_documents
+        self.bands, self.rows = lsh_shape(num_perm, threshold)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._count = 0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA busy_timeout=5000")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                "id INTEGER PRIMARY KEY, cv_id INTEGER NOT NULL UNIQUE, signature BLOB NOT NULL, "
+                "added_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "band INTEGER NOT NULL, bucket INTEGER NOT NULL, document_id INTEGER NOT NULL, "
+                "PRIMARY KEY (band, bucket, document_id)) WITHOUT ROWID"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS buckets_document_id ON buckets (document_id)")
+            # Signatures from another permutation count or banding can't be compared; start over
+            shape = f"{self.num_perm}:{self.bands}x{self.rows}:{PERMUTATION_SEED}"
+            stored = self._conn.execute("SELECT value FROM meta WHERE key = 'shape'").fetchone()
+            if stored is not None and stored[0] != shape:
+                logger.warning(f"Near-duplicate index shape changed ({stored[0]} -> {shape}), clearing it")
+                self._conn.execute("DELETE FROM documents")
+                self._conn.execute("DELETE FROM buckets")
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('shape', ?)", (shape,))
+            self._count = self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        return self._conn
+
+    def _buckets(self, signature: array) -> List[Tuple[int, int]]:
+        raw = signature.tobytes()
+        width = self.rows * signature.itemsize
+        return [(band, int.from_bytes(hashlib.blake2b(raw[band * width:(band + 1) * width], digest_size=8).digest(),
+                                      "big", signed=True))
+                for band in range(self.bands)]
+
+    def lookup(self, signature: array, limit: int = 5) -> List[Tuple[int, float]]:
+        """(cv_id, similarity) of indexed documents at or above the threshold, most similar first."""
+        with self._lock:
+            db = self._db()
+            candidates = set()
+            for band, bucket in self._buckets(signature):
+                candidates.update(row[0] for row in db.execute(
+                    "SELECT document_id FROM buckets WHERE band = ? AND bucket = ?", (band, bucket)))
+            if not candidates:
+                return []
+            placeholders = ", ".join("?" * len(candidates))
+            rows = db.execute(f"SELECT cv_id, signature FROM documents WHERE id IN ({placeholders})",
+                              list(candidates)).fetchall()
+
+        best = {}
+        for cv_id, blob in rows:
+            similarity = MinHasher.similarity(signature, array("I", blob))
+            if similarity >= self.threshold and similarity > best.get(cv_id, 0.0):
+                best[cv_id] = similarity
+        return sorted(best.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+    def add(self, cv_id: int, signature: array):
+        self.add_many([(cv_id, signature)])
+
+    def add_many(self, entries: List[Tuple[int, array]]):
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                added = 0
+                for cv_id, signature in entries:
+                    # Re-indexing a CV replaces its document; the old signature's buckets go with it
+                    previous = db.execute("SELECT id FROM documents WHERE cv_id = ?", (cv_id,)).fetchone()
+                    if previous is None:
+                        added += 1
+                    else:
+                        db.execute("DELETE FROM buckets WHERE document_id = ?", (previous[0],))
+                    document_id = db.execute(
+                        "INSERT OR REPLACE INTO documents (cv_id, signature, added_at) VALUES (?, ?, ?)",
+                        (cv_id, signature.tobytes(), time.time()),
+                    ).lastrowid
+                    db.executemany("INSERT OR IGNORE INTO buckets (band, bucket, document_id) VALUES (?, ?, ?)",
+                                   [(band, bucket, document_id) for band, bucket in self._buckets(signature)])
+                self._count += added
+                if self._count > self.max_documents:
+                    self._evict(db)
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                self._count = db.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+                raise
+
+    def remove(self, cv_id: int):
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute("SELECT id FROM documents WHERE cv_id = ?", (cv_id,)).fetchone()
+                if row is not None:
+                    db.execute("DELETE FROM documents WHERE id = ?", (row[0],))
+                    db.execute("DELETE FROM buckets WHERE document_id = ?", (row[0],))
+                    self._count -= 1
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+
+    def _evict(self, db: sqlite3.Connection):
+        evict = max(self._count - self.max_documents, int(self.max_documents * EVICTION_FRACTION), 1)
+        cutoff = db.execute("SELECT id FROM documents ORDER BY id LIMIT 1 OFFSET ?", (evict - 1,)).fetchone()[0]
+        db.execute("DELETE FROM documents WHERE id <= ?", (cutoff,))
+        db.execute("DELETE FROM buckets WHERE document_id <= ?", (cutoff,))
+        self._count = db.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        logger.info(f"Evicted {evict} document(s) from the near-duplicate index")
+
+    def count(self) -> int:
+        with self._lock:
+            self._db()
+            return self._count
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+near_duplicate_index = NearDuplicateIndex(
+    db_path=os.path.join(settings.data_dir, "near_duplicates.sqlite3"),
+    num_perm=settings.dedup_num_perm,
+    threshold=settings.dedup_threshold,
+    max_documents=settings.dedup_index_max_documents,
+)
@@ -1,10 +1,202 @@
+import json
+import logging
+from typing import List, Optional, Tuple, Union
+
+import pymupdf
 import pymupdf4llm
 
+from app.config import settings
+from app.utils.cache import TieredCache, sha256_hex
+
+logger = logging.getLogger(__name__)
+
+extraction_cache = TieredCache(
+    name="pdf_extraction",
+    cache_dir=settings.cache_dir,
+    memory_items=settings.pdf_cache_memory_items,
+    max_bytes=settings.pdf_cache_max_bytes,
+)
+
+TIER_TEXT = "text"
+TIER_MARKDOWN = "markdown"
+# Fast-path quality heuristics
+MIN_CHARS_PER_PAGE = 200
+# Side-by-side blocks that share at least two lines of height are columns the block order interleaves
+COLUMN_OVERLAP_POINTS = 24
+# A block starting this far above the previous one (in the same column) is out of reading order
+BACKWARD_JUMP_POINTS = 12
+# Each percent of garbled characters costs this many percent of quality
+GARBLED_PENALTY = 20
+
+
+def _garbled(char: str) -> bool:
+    return char == "\ufffd" or (ord(char) < 32 and char not in "\n\t") or "\ue000" <= char <= "\uf8ff"
+
+
+def _plain_text(document: pymupdf.Document) -> Tuple[str, float]:
+    """
+    Cheap extraction tier: each page's text blocks in top-to-bottom order, with link targets
+    appended as markdown links, and a 0-1 quality score. The score is the lowest of: text density
+    (characters per page), share of garbled characters, share of text in side-by-side multi-line
+    blocks (columns the block order would interleave) and share of blocks drawn above the block
+    before them in the same column (content streams out of reading order).
+    """
+    pages, chars, garbled, column_chars, jumps, steps = [], 0, 0, 0, 0, 0
+    for page in document:
+        blocks = [block for block in page.get_text("blocks") if block[6] == 0 and block[4].strip()]
+        for previous, block in zip(blocks, blocks[1:]):
+            steps += 1
+            same_column = block[0] < previous[2] and previous[0] < block[2]
+            jumps += same_column and block[1] < previous[1] - BACKWARD_JUMP_POINTS
+        for block in blocks:
+            length = len(block[4].strip())
+            chars += length
+            garbled += sum(1 for char in block[4] if _garbled(char))
+            if any(other is not block and (block[2] <= other[0] or other[2] <= block[0])
+                   and min(block[3], other[3]) - max(block[1], other[1]) >= COLUMN_OVERLAP_POINTS
+                   for other in blocks):
+                column_chars += length
+
+        text = "\n".join(block[4].strip() for block in sorted(blocks, key=lambda block: (block[1], block[0])))
+        links = [f"[{page.get_textbox(link['from']).strip() or link['uri']}]({link['uri']})"
+                 for link in page.get_links() if link["kind"] == pymupdf.LINK_URI and link["uri"] not in text]
+        pages.append("\n".join([text, *links]))
+
+    if not chars:
+        return "", 0.0
+    quality = min(chars / max(document.page_count, 1) / MIN_CHARS_PER_PAGE, 1.0,
+                  1.0 - GARBLED_PENALTY * garbled / chars,
+                  1.0 - column_chars / chars,
+                  1.0 - jumps / steps if steps else 1.0)
+    return "\n\n".join(pages), round(max(quality, 0.0), 3)
+
+
+def _no_results(*args, **kwargs) -> list:
+    return []
+
+
+class _LightDocument(pymupdf.Document):
+    """
+    Document whose pages can skip pymupdf4llm's table detection and its image and vector-graphics
+    analysis. pymupdf4llm 0.0.17 has no switch for either, so the page methods it calls are
+    overridden on each page instance it gets from the document.
+    """
+    detect_tables = True
+    detect_images = True
+
+    def __getitem__(self, index):
+        page = super().__getitem__(index)
+        if not self.detect_tables:
+            page.find_tables = _no_results
+        if not self.detect_images:
+            page.get_image_info = _no_results
+            page.cluster_drawings = _no_results
+        return page
+
 
 class PDFParser:
+    # Options passed to pymupdf4llm.to_markdown; part of the cache key so changing them invalidates entries
+    OPTIONS = {"show_progress": False}
+
+    @staticmethod
+    def cache_key(content: bytes) -> str:
+        options = json.dumps({**PDFParser.OPTIONS, "tables": settings.pdf_detect_tables,
+                              "images": settings.pdf_detect_images, "fast_path": settings.pdf_fast_path_enabled,
+                              "min_quality": settings.pdf_fast_path_min_quality}, sort_keys=True)
+        return sha256_hex(content, pymupdf4llm.__version__, options)
+
+    @staticmethod
+    def get_cached(content: bytes) -> Optional[Tuple[str, dict]]:
+        """Cached (text, extraction) where extraction records the tier used and the fast-path quality."""
+        if not settings.pdf_cache_enabled:
+            return None
+        cached = extraction_cache.get(PDFParser.cache_key(content))
+        if cached is None:
+            return None
+        entry = json.loads(cached)
+        return entry["text"], entry["extraction"]
+
+    @staticmethod
+    def store_cached(content: bytes, text: str, extraction: dict):
+        if settings.pdf_cache_enabled:
+            extraction_cache.set(PDFParser.cache_key(content), json.dumps({"text": text, "extraction": extraction}))
+
+    @staticmethod
+    def open_pdf(source: Union[str, bytes]) -> pymupdf.Document:
+        """Open a file path or PDF bytes (as an in-memory document) with the configured page analysis."""
+        if isinstance(source, str):
+            document = _LightDocument(source)
+        else:
+            document = _LightDocument(stream=source, filetype="pdf")
+        document.detect_tables = settings.pdf_detect_tables
+        document.detect_images = settings.pdf_detect_images
+        return document
+
+    @staticmethod
+    def page_count(source: Union[str, bytes]) -> int:
+        document = pymupdf.open(source) if isinstance(source, str) else pymupdf.open(stream=source, filetype="pdf")
+        try:
+            return document.page_count
+        finally:
+            document.close()
+
+    @staticmethod
+    def page_ranges(page_count: int, parts: int) -> List[List[int]]:
+        """Split the pages into up to `parts` contiguous ranges of near-equal size."""
+        parts = max(1, min(parts, page_count))
+        size, extra = divmod(page_count, parts)
+        ranges, start = [], 0
+        for part in range(parts):
+            end = start + size + (part < extra)
+            ranges.append(list(range(start, end)))
+            start = end
+        return ranges
+
+    @staticmethod
+    def convert_pdf(source: Union[str, bytes], pages: Optional[List[int]] = None) -> str:
+        """
+        Run pymupdf4llm on a file path or on PDF bytes, without consulting the cache (used by worker
+        processes). With `pages`, only those pages are converted; heading levels are still derived
+        from the font sizes of the whole document, so converting consecutive page ranges and joining
+        the results gives the same markdown as converting the document at once.
+        """
+        document = PDFParser.open_pdf(source)
+        try:
+            return pymupdf4llm.to_markdown(document, pages=pages, **PDFParser.OPTIONS)
+        finally:
+            document.close()
+
+    @staticmethod
+    def extract(source: Union[str, bytes], escalate: bool = True) -> Tuple[Optional[str], dict]:
+        """
+        Tiered extraction (used by worker processes): plain text when the fast path is enabled and
+        its quality reaches `pdf_fast_path_min_quality`, otherwise full pymupdf4llm markdown. With
+        `escalate=False` the text is None instead of markdown, so the caller can convert the
+        document itself (e.g. in parallel page ranges).
+        """
+        document = PDFParser.open_pdf(source)
+        try:
+            quality = None
+            if settings.pdf_fast_path_enabled:
+                text, quality = _plain_text(document)
+                if quality >= settings.pdf_fast_path_min_quality:
+                    return text, {"tier": TIER_TEXT, "quality": quality}
+            extraction = {"tier": TIER_MARKDOWN, "quality": quality}
+            if not escalate:
+                return None, extraction
+            return pymupdf4llm.to_markdown(document, **PDFParser.OPTIONS), extraction
+        finally:
+            document.close()
+
     @staticmethod
     def extract_text_from_pdf(file_path: str) -> str:
         with open(file_path, "rb") as file:
-            content = pymupdf4llm.to_markdown(file)
-            # print(content)
-        return content
\ No newline at end of file
+            content = file.read()
+        cached = PDFParser.get_cached(content)
+        if cached is None:
+            text, extraction = PDFParser.extract(file_path)
+            PDFParser.store_cached(content, text, extraction)
+        else:
+            text = cached[0]
+            logger.info(f"Extraction cache hit for {file_path}")
+        return text
@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import os
+import tempfile
+from array import array
+from typing import List, Optional, Tuple, Union
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.models.cv_model import CVModel
+from app.models.store_model import StoredCV
+from app.services.cv_processor import CVProcessor
+from app.services.cv_store import cv_store
+from app.services.execution import pools
+from app.services.markdown_compactor import MarkdownCompactor
+from app.services.near_duplicates import MinHasher, diff_cvs, near_duplicate_index
+from app.services.pdf_parser import PDFParser
+from app.utils.cache import sha256_hex
+from app.utils.metrics import observe_stage
+from app.utils.models import DedupMode, ModelType, ParseMode
+
+logger = logging.getLogger(__name__)
+
+# Define temp directory relative to project root
+TEMP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "temp")
+
+
+def _write_temp_file(content: bytes) -> str:
+    """
+    Write `content` to a new temp file and return its path. mkstemp creates the file exclusively, so
+    concurrent uploads of the same filename never share a path, and the client's filename isn't used.
+    """
+    os.makedirs(TEMP_DIR, exist_ok=True)  # Ensure temp directory exists
+    descriptor, file_path = tempfile.mkstemp(suffix=".pdf", dir=TEMP_DIR)
+    try:
+        with os.fdopen(descriptor, "wb") as buffer:
+            buffer.write(content)
+    except BaseException:
+        _remove_file(file_path)
+        raise
+    return file_path
+
+
+def _remove_file(file_path: str):
+    try:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+            logger.info(f"Temporary file {file_path} removed successfully")
+    except Exception as e:
+        logger.error(f"Failed to remove temporary file: {e}")
+
+
+def _compact(text: str, filename: str) -> str:
+    if not settings.markdown_compaction_enabled:
+        return text
+    text, report = MarkdownCompactor.compact(text, settings.markdown_compaction_steps)
+    logger.info(f"Compacted {filename}: {report['tokens_before']} -> {report['tokens_after']} estimated tokens "
+                f"({report['tokens_saved']} saved)")
+    return text
+
+
+async def _convert(source: Union[str, bytes], filename: str) -> Tuple[str, dict]:
+    """
+    Extract a PDF (bytes or a temp-file path) in the process pool, trying the plain-text fast path
+    first. When it escalates to markdown, documents with at least `pdf_parallel_min_pages` pages
+    are split into one page range per PDF worker and the ranges' markdown is joined in page order.
+    """
+    min_pages = settings.pdf_parallel_min_pages
+    pages = await run_in_threadpool(PDFParser.page_count, source) if min_pages and pools.pdf_workers > 1 else 0
+    if not min_pages or pages < min_pages:
+        return await pools.run_extraction(PDFParser.extract, source)
+    text, extraction = await pools.run_extraction(PDFParser.extract, source, False)
+    if text is not None:
+        return text, extraction
+    ranges = PDFParser.page_ranges(pages, pools.pdf_workers)
+    logger.info(f"Extracting {filename} ({pages} pages) in {len(ranges)} parallel page ranges")
+    parts = await asyncio.gather(*(pools.run_extraction(PDFParser.convert_pdf, source, page_range)
+                                   for page_range in ranges))
+    return "".join(parts), extraction
+
+
+async def _extract_uncached(content: bytes, filename: str) -> Tuple[str, dict]:
+    if len(content) <= settings.pdf_in_memory_max_bytes:
+        return await _convert(content, filename)
+    file_path = await run_in_threadpool(_write_temp_file, content)
+    try:
+        return await _convert(file_path, filename)
+    finally:
+        await run_in_threadpool(_remove_file, file_path)
+
+
+async def extract_document(content: bytes, filename: str, report: Optional[dict] = None,
+                           model_type: Optional[ModelType] = None) -> str:
+    """
+    Return the compacted text for PDF bytes. On a cache miss the bytes are extracted in the
+    process pool as an in-memory document; files over `pdf_in_memory_max_bytes` are staged in a
+    uniquely named temp file instead, so large uploads aren't copied to the worker. The cache keeps
+    the raw text, so changing the compaction settings takes effect without re-extracting. The
+    extraction tier used (plain text or markdown) and the fast-path quality go to `report`.
+    Extraction on a cache miss is timed per `model_type` in the metrics.
+    """
+    # Hashing a large upload and the SQLite tier lookup block, so they run in the thread pool
+    cached = await run_in_threadpool(PDFParser.get_cached, content)
+    if cached is not None:
+        logger.info(f"Extraction cache hit for {filename}")
+        text, extraction = cached
+    else:
+        with observe_stage("pdf_extraction", model_type):
+            text, extraction = await _extract_uncached(content, filename)
+        await run_in_threadpool(PDFParser.store_cached, content, text, extraction)
+        logger.info(f"Extracted {filename} with the {extraction['tier']} tier (fast-path quality {extraction['quality']})")
+    if report is not None:
+        report["extraction"] = extraction
+    return _compact(text, filename)
+
+
+async def find_near_duplicate(text: str, model_type: ModelType,
+                              source_hash: Optional[str] = None) -> Tuple[array, Optional[Tuple[StoredCV, float]]]:
+    """
+    MinHash signature of the markdown and the most similar stored CV above the threshold, if any.
+    Parses of the same file (`source_hash`) are not near-duplicates of it and are skipped. An earlier
+    parse by `model_type` is preferred, since only that one can be reused.
+    """
+    signature = await pools.run_extraction(MinHasher.signature, text, settings.dedup_num_perm)
+    matches = dict(await run_in_threadpool(near_duplicate_index.lookup, signature))
+    stored = await run_in_threadpool(cv_store.get_many, list(matches)) if matches else []
+    stored = [entry for entry in stored if entry.source_hash != source_hash]
+    if not stored:
+        return signature, None
+    best = max(stored, key=lambda entry: (entry.model_type == model_type.value, matches[entry.cv_id]))
+    return signature, (best, matches[best.cv_id])
+
+
+async def store_parse(content: bytes, filename: str, model_type: ModelType, cv_data: CVModel,
+                      text: Optional[str] = None, signature: Optional[array] = None) -> Optional[int]:
+    """
+    Persist a parse in the CV store and index its markdown (`signature`, or computed from `text`)
+    for near-duplicate detection. Failures are logged and never fail the parse itself.
+    """
+    if not settings.cv_store_enabled:
+        return None
+    try:
+        cv_id = await run_in_threadpool(cv_store.save, sha256_hex(content), model_type, filename, cv_data)
+        if signature is None and text is not None and settings.dedup_mode != DedupMode.OFF:
+            signature = await pools.run_extraction(MinHasher.signature, text, settings.dedup_num_perm)
+        if signature is not None:
+            await run_in_threadpool(near_duplicate_index.add, cv_id, signature)
+        return cv_id
+    except Exception as e:
+        logger.error(f"Failed to store parsed CV {filename}: {e}")
+        return None
+
+
+async def _parse_text(text: str, model_type: ModelType, use_cache: bool, fallback: Optional[List[ModelType]],
+                      hedge_delay: Optional[float], mode: Optional[ParseMode]) -> CVModel:
+    mode = settings.parse_mode if mode is None else mode
+    fallback = settings.parse_fallback_chain if fallback is None else fallback
+    if not fallback:
+        if mode == ParseMode.CHUNKED:
+            return await CVProcessor.parse_cv_chunked(text, model_type, use_cache=use_cache)
+        return await pools.run_llm(CVProcessor.parse_cv, text=text, model_type=model_type, use_cache=use_cache,
+                                   lane=CVProcessor.provider(model_type))
+    hedge_delay = settings.parse_hedge_delay_seconds if hedge_delay is None else hedge_delay
+    return await CVProcessor.parse_cv_hedged(text, model_type, fallback=fallback, hedge_delay=hedge_delay,
+                                             use_cache=use_cache, mode=mode)
+
+
+async def parse_document(content: bytes, filename: str, model_type: ModelType, use_cache: bool = True,
+                         fallback: Optional[List[ModelType]] = None,
+                         hedge_delay: Optional[float] = None, mode: Optional[ParseMode] = None,
+                         dedup: Optional[DedupMode] = None, report: Optional[dict] = None) -> CVModel:
+    """
+    Full upload pipeline: PDF bytes -> markdown -> CVModel, persisted in the CV store.
+    `fallback`, `hedge_delay`, `mode` and `dedup` default to the configured settings. The
+    extraction tier is recorded in `report`; with near-duplicate detection on, the earlier CV the upload resembles is recorded in `report`
+    (with the fields that changed), and in reuse mode its parse is returned without a model call.
+    """
+    text = await extract_document(content, filename, report=report, model_type=model_type)
+    dedup = settings.dedup_mode if dedup is None else dedup
+    signature, near_duplicate = None, None
+    if dedup != DedupMode.OFF and settings.cv_store_enabled:
+        try:
+            signature, near_duplicate = await find_near_duplicate(text, model_type, sha256_hex(content))
+        except Exception as e:
+            logger.error(f"Near-duplicate lookup failed for {filename}: {e}")
+
+    reused = (near_duplicate is not None and dedup == DedupMode.REUSE and use_cache
+              and near_duplicate[0].model_type == model_type.value)
+    if reused:
+        cv_data = near_duplicate[0].cv
+    else:
+        cv_data = await _parse_text(text, model_type, use_cache, fallback, hedge_delay, mode)
+    cv_id = await store_parse(content, filename, model_type, cv_data, signature=signature)
+
+    if near_duplicate is not None:
+        stored, similarity = near_duplicate
+        logger.info(f"{filename} is a near-duplicate of CV {stored.cv_id} (similarity {similarity:.2f})"
+                    f"{', reusing its parse' if reused else ''}")
+        if report is not None:
+            report["near_duplicate"] = {"cv_id": stored.cv_id, "similarity": round(similarity, 3), "reused": reused,
+                                        "changed_fields": [] if reused else list(diff_cvs(stored.cv, cv_data))}
+    if report is not None:
+        report["cv_id"] = cv_id
+    return cv_data
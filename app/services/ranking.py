@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import math
+import re
+import time
+from collections import Counter
+from typing import Iterable, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.models.rank_model import RankedCandidate, RankResponse
+from app.services.cv_processor import CVProcessor
+from app.services.execution import pools
+from app.services.scoring import ALIAS_TO_SKILL, ScoringEngine
+from app.utils.models import ModelType
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+STOPWORDS = {"a", "an", "and", "or", "the", "of", "in", "on", "with", "for", "to", "at", "by", "is", "are", "be",
+             "as", "years", "year", "experience", "strong", "knowledge", "plus", "we", "you", "our", "skills"}
+# Weight of the skill/experience score against the BM25 text relevance in the pre-filter score
+SCORER_WEIGHT = 0.6
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for token in TOKEN_RE.findall(text.lower()):
+        token = token.rstrip(".")
+        if token and token not in STOPWORDS:
+            tokens.append(ALIAS_TO_SKILL.get(token, token))
+    return tokens
+
+
+def cv_text(cv_data: dict) -> str:
+    """The searchable text of a parsed CV: title, skills, roles, responsibilities and projects."""
+    parts = [cv_data.get("title") or ""]
+    parts.extend(cv_data.get("skills") or [])
+    parts.extend(cv_data.get("skills_from_work_experience") or [])
+    for entry in cv_data.get("experience") or []:
+        parts.extend(str(entry.get(key) or "") for key in ("position", "company", "responsibilities"))
+    for project in cv_data.get("projects") or []:
+        parts.extend([str(project.get("title") or ""), str(project.get("description") or "")])
+        parts.extend(project.get("technologies_used") or [])
+    for certification in cv_data.get("certifications") or []:
+        parts.append(str(certification.get("name") or ""))
+    return " ".join(parts)
+
+
+class BM25:
+    """Okapi BM25 over a small in-memory corpus."""
+
+    def __init__(self, documents: Iterable[List[str]], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_frequencies = [Counter(document) for document in documents]
+        self.lengths = [sum(tf.values()) for tf in self.term_frequencies]
+        self.average_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+        document_frequency = Counter(term for tf in self.term_frequencies for term in tf)
+        total = len(self.term_frequencies)
+        self.idf = {term: math.log(1 + (total - count + 0.5) / (count + 0.5))
+                    for term, count in document_frequency.items()}
+
+    def score(self, query: List[str], index: int) -> float:
+        tf = self.term_frequencies[index]
+        length_norm = self.k1 * (1 - self.b + self.b * self.lengths[index] / (self.average_length or 1))
+        total = 0.0
+        for term in set(query):
+            frequency = tf.get(term)
+            if frequency:
+                total += self.idf[term] * frequency * (self.k1 + 1) / (frequency + length_norm)
+        return total
+
+
+def prefilter(candidates: List[dict], requirements: str) -> List[dict]:
+    """
+    Score every candidate locally: ScoringEngine skill/experience fit blended with BM25 relevance
+    of the CV text to the requirements. Returns the candidates' entries sorted best first.
+    """
+    parsed = ScoringEngine.parse_requirements(requirements)
+    query = tokenize(requirements) + [token for skill in parsed[0] for token in tokenize(skill)]
+    bm25 = BM25(tokenize(cv_text(candidate["cv"])) for candidate in candidates)
+    relevance = [bm25.score(query, i) for i in range(len(candidates))]
+    best_relevance = max(relevance, default=0.0) or 1.0
+
+    entries = []
+    for candidate, text_score in zip(candidates, relevance):
+        scores = ScoringEngine.score(candidate["cv"], requirements, parsed=parsed)
+        relevance_score = 100 * text_score / best_relevance
+        entries.append({
+            "candidate_id": candidate["id"],
+            "name": candidate["cv"].get("name"),
+            "prefilter_score": round(SCORER_WEIGHT * scores["score"] + (1 - SCORER_WEIGHT) * relevance_score, 1),
+            "bm25": round(text_score, 3),
+            "scores": scores,
+        })
+    entries.sort(key=lambda entry: entry["prefilter_score"], reverse=True)
+    return entries
+
+
+async def rank_candidates(candidates: List[dict], job_title: str, company_name: str, requirements: str,
+                          model_type: ModelType, top_k: int, concurrency: int,
+                          sections: Optional[List[str]] = None, use_cache: bool = True) -> RankResponse:
+    """
+    Pre-filter all candidates locally, then analyze only the top `top_k` with the LLM, at most
+    `concurrency` at a time. The leaderboard lists analyzed candidates by suitability score, then
+    the rest by pre-filter score.
+    """
+    started = time.perf_counter()
+    entries = await run_in_threadpool(prefilter, candidates, requirements)
+    prefilter_seconds = time.perf_counter() - started
+    by_id = {candidate["id"]: candidate["cv"] for candidate in candidates}
+    slots = asyncio.Semaphore(concurrency)
+
+    async def analyze(entry: dict):
+        async with slots:
+            analysis_started = time.perf_counter()
+            try:
+                entry["analysis"] = await pools.run_llm(
+                    CVProcessor.analyze_cv, cv_data=by_id[entry["candidate_id"]], job_title=job_title,
+                    company_name=company_name, requirements=requirements, model_type=model_type,
+                    use_cache=use_cache, sections=sections, lane=CVProcessor.provider(model_type))
+                score = (entry["analysis"].get("recommendation") or {}).get("suitability_score")
+                if isinstance(score, (int, float)):
+                    entry["suitability_score"] = float(score)
+            except Exception as e:
+                logger.error(f"Ranking analysis failed for candidate {entry['candidate_id']}: {e}")
+                entry["error"] = str(e)
+            entry["analysis_seconds"] = round(time.perf_counter() - analysis_started, 3)
+
+    shortlisted = entries[:top_k]
+    await asyncio.gather(*(analyze(entry) for entry in shortlisted))
+
+    for entry in entries:
+        entry["final_score"] = entry.get("suitability_score", entry["prefilter_score"])
+    # Candidates with an LLM suitability score rank above those with only a pre-filter score
+    entries.sort(key=lambda entry: ("suitability_score" in entry, entry["final_score"]), reverse=True)
+    for position, entry in enumerate(entries, start=1):
+        entry["rank"] = position
+
+    return RankResponse(
+        job_title=job_title,
+        company_name=company_name,
+        candidates=len(candidates),
+        analyzed=len(shortlisted),
+        prefilter_seconds=round(prefilter_seconds, 3),
+        total_seconds=round(time.perf_counter() - started, 3),
+        leaderboard=[RankedCandidate(**entry) for entry in entries],
+    )
@@ -0,0 +1,184 @@
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from app.config import settings
+from app.utils.metrics import RATE_LIMIT_QUEUE_DEPTH, RATE_LIMIT_TIMEOUTS, RATE_LIMIT_WAIT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitTimeoutError(RuntimeError):
+    """Raised when a call waited longer than allowed for its rate-limit slot."""
+
+
+class TokenBucket:
+    """Refills `rate_per_minute` units per minute, holding at most one minute's worth."""
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = rate_per_minute
+        self.rate_per_second = rate_per_minute / 60.0
+        self.available = rate_per_minute
+        self._updated_at = time.monotonic()
+
+    def _refill(self, now: float):
+        self.available = min(self.capacity, self.available + (now - self._updated_at) * self.rate_per_second)
+        self._updated_at = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` units are available (0 if they are available now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.rate_per_second
+
+    def consume(self, amount: float):
+        self.available -= min(amount, self.capacity)
+
+
+class ProviderLimiter:
+    """
+    FIFO gate for one provider or provider:model key. A caller is admitted only when it is at the
+    head of the queue, fewer than `max_in_flight` calls are running and both the request and token
+    buckets can cover it, so a burst is served in arrival order instead of failing with 429s.
+    """
+
+    def __init__(self, key: str, requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None, max_in_flight: Optional[int] = None):
+        self.key = key
+        self.max_in_flight = int(max_in_flight) if max_in_flight else None
+        self._requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._condition = threading.Condition()
+        self._queue = deque()
+        self.in_flight = 0
+        self.admitted = 0
+        self.timeouts = 0
+        self.max_queue_depth = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        if self.max_in_flight is not None and self.in_flight >= self.max_in_flight:
+            return float("inf")  # woken by release()
+        wait = 0.0
+        if self._requests is not None:
+            wait = max(wait, self._requests.wait_time(1, now))
+        if self._tokens is not None:
+            wait = max(wait, self._tokens.wait_time(tokens, now))
+        return wait
+
+    def acquire(self, tokens: int, timeout: Optional[float] = None) -> float:
+        """Block until admitted and return the time spent waiting."""
+        ticket = object()
+        started = time.monotonic()
+        with self._condition:
+            self._queue.append(ticket)
+            self.max_queue_depth = max(self.max_queue_depth, len(self._queue))
+            RATE_LIMIT_QUEUE_DEPTH.labels(self.key).inc()
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = self._wait_time(tokens, now) if self._queue[0] is ticket else float("inf")
+                    if wait == 0.0:
+                        break
+                    if timeout is not None:
+                        remaining = started + timeout - now
+                        if remaining <= 0:
+                            self.timeouts += 1
+                            RATE_LIMIT_TIMEOUTS.labels(self.key).inc()
+                            raise RateLimitTimeoutError(f"Timed out waiting for {self.key} rate limit")
+                        wait = min(wait, remaining)
+                    self._condition.wait(None if wait == float("inf") else wait)
+            except BaseException:
+                self._queue.remove(ticket)
+                RATE_LIMIT_QUEUE_DEPTH.labels(self.key).dec()
+                self._condition.notify_all()
+                raise
+
+            self._queue.popleft()
+            RATE_LIMIT_QUEUE_DEPTH.labels(self.key).dec()
+            if self._requests is not None:
+                self._requests.consume(1)
+            if self._tokens is not None:
+                self._tokens.consume(tokens)
+            self.in_flight += 1
+            self.admitted += 1
+            waited = time.monotonic() - started
+            self.total_wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+            RATE_LIMIT_WAIT_SECONDS.labels(self.key).observe(waited)
+            # Let the next caller in line re-evaluate now that the head moved
+            self._condition.notify_all()
+        return waited
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "queue_depth": len(self._queue),
+                "max_queue_depth": self.max_queue_depth,
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+                "admitted": self.admitted,
+                "timeouts": self.timeouts,
+                "avg_wait_seconds": self.total_wait_seconds / self.admitted if self.admitted else 0.0,
+                "max_wait_seconds": self.max_wait_seconds,
+            }
+
+
+class RateLimitGovernor:
+    """
+    Limiters keyed by provider ("ollama") and by provider and model ("ollama:qwen:14b"), built from
+    `settings.rate_limits`. A call passes the model limiter first and then the provider limiter.
+    """
+
+    def __init__(self, limits: Dict[str, Dict[str, float]]):
+        self._limits = limits
+        self._limiters: Dict[str, Optional[ProviderLimiter]] = {}
+        self._lock = threading.Lock()
+
+    def _limiter(self, key: str) -> Optional[ProviderLimiter]:
+        with self._lock:
+            if key not in self._limiters:
+                config = self._limits.get(key)
+                self._limiters[key] = ProviderLimiter(key, **config) if config else None
+            return self._limiters[key]
+
+    @contextmanager
+    def slot(self, provider: str, model: str, tokens: int, timeout: Optional[float] = None) -> Iterator[float]:
+        """Hold a rate-limit slot for one provider call; yields the total time spent queued."""
+        if settings.rate_limit_max_wait_seconds is not None:
+            timeout = min(timeout, settings.rate_limit_max_wait_seconds) if timeout is not None \
+                else settings.rate_limit_max_wait_seconds
+        limiters: List[ProviderLimiter] = [
+            limiter for limiter in (self._limiter(f"{provider}:{model}"), self._limiter(provider)) if limiter
+        ]
+        acquired = []
+        waited = 0.0
+        try:
+            for limiter in limiters:
+                waited += limiter.acquire(tokens, timeout=None if timeout is None else max(0.0, timeout - waited))
+                acquired.append(limiter)
+            if waited > 1.0:
+                logger.info(f"Waited {waited:.1f}s for {provider}:{model} rate limit")
+            yield waited
+        finally:
+            for limiter in acquired:
+                limiter.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            limiters = [limiter for limiter in self._limiters.values() if limiter]
+        return {limiter.key: limiter.stats() for limiter in limiters}
+
+
+governor = RateLimitGovernor(settings.rate_limits)
@@ -0,0 +1,237 @@
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional, TypeVar
+
+from app.config import settings
+from app.services.rate_limiter import RateLimitTimeoutError
+from app.utils.metrics import LLM_RETRIES
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+# SDK exception class names that signal a transient transport problem
+RETRYABLE_ERROR_NAMES = ("Timeout", "ConnectError", "ConnectionError", "APIConnectionError", "RateLimitError",
+                         "ServiceUnavailable", "DeadlineExceeded", "ResourceExhausted", "InternalServerError",
+                         "RemoteProtocolError", "ReadError")
+
+
+class ProviderUnavailableError(RuntimeError):
+    """Raised without calling the provider while its circuit breaker is open."""
+
+
+class DeadlineExceededError(RuntimeError):
+    """Raised when a call cannot finish within its overall deadline."""
+
+
+def _chain(error: Optional[BaseException]) -> Iterator[BaseException]:
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Walk the exception chain looking for a transient (timeout, connection, 429/5xx) failure."""
+    for error in _chain(error):
+        if isinstance(error, (TimeoutError, ConnectionError)):
+            return True
+        for attribute in ("status_code", "code"):
+            status = getattr(error, attribute, None)
+            if isinstance(status, int) and status in RETRYABLE_STATUS_CODES:
+                return True
+        if any(name in type(error).__name__ for name in RETRYABLE_ERROR_NAMES):
+            return True
+    return False
+
+
+def is_timeout(error: BaseException) -> bool:
+    """Whether the call failed because a client-side timeout expired."""
+    return any(isinstance(error, TimeoutError) or "Timeout" in type(error).__name__ for error in _chain(error))
+
+
+class Deadline:
+    """Overall time budget of a call; `seconds=None` means no deadline."""
+
+    def __init__(self, seconds: Optional[float]):
+        self.seconds = seconds
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+
+    def remaining(self) -> Optional[float]:
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.expires_at is not None and self.remaining() <= 0
+
+    def cap(self, seconds: Optional[float]) -> Optional[float]:
+        """The smaller of `seconds` and the time left; None when neither limits the call."""
+        remaining = self.remaining()
+        if seconds is None or remaining is None:
+            return remaining if seconds is None else seconds
+        return min(seconds, remaining)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker. After `failure_threshold` transient failures the circuit
+    opens and calls fail fast for `recovery_seconds`; then a single probe call is let through
+    (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, recovery_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.recovery_seconds:
+                self.state = self.HALF_OPEN
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            self.rejected += 1
+            raise ProviderUnavailableError(f"{self.name} is unavailable (circuit open), try again later")
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def release(self):
+        """End a call without a verdict on the provider's health."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                    logger.warning(f"Circuit for {self.name} opened after {self.failures} failure(s)")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "times_opened": self.times_opened,
+                "rejected_calls": self.rejected,
+            }
+
+
+class CircuitBreakerRegistry:
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        with self._lock:
+            if name not in self._breakers:
+                self._breakers[name] = CircuitBreaker(name, settings.circuit_failure_threshold,
+                                                      settings.circuit_recovery_seconds)
+            return self._breakers[name]
+
+    def stats(self) -> dict:
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.name: breaker.stats() for breaker in breakers}
+
+
+circuit_breakers = CircuitBreakerRegistry()
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter for the given 1-based retry attempt."""
+    ceiling = min(settings.llm_retry_max_delay, settings.llm_retry_base_delay * (2 ** (attempt - 1)))
+    return random.uniform(0, ceiling)
+
+
+def call_with_resilience(provider: str, attempt_call: Callable[[Deadline], T],
+                         deadline: Optional[Deadline] = None, timeouts_transient: bool = True) -> T:
+    """
+    Run `attempt_call` with retries on transient errors, behind the provider's circuit breaker and
+    within an overall deadline. `attempt_call` receives the deadline so it can size its own timeouts.
+    With `timeouts_transient=False` (local backends, where a timed-out generation would only time
+    out again) a client-side timeout is neither retried nor counted against the circuit.
+    """
+    breaker = circuit_breakers.get(provider)
+    deadline = deadline or Deadline(settings.llm_deadline_seconds)
+    attempt = 0
+    while True:
+        if deadline.expired():
+            raise DeadlineExceededError(f"{provider} call exceeded its {deadline.seconds}s deadline")
+        breaker.before_call()
+        attempt += 1
+        try:
+            result = attempt_call(deadline)
+        except RateLimitTimeoutError:
+            # Queued behind our own limiter; says nothing about the provider's health
+            breaker.release()
+            raise
+        except Exception as e:
+            if not timeouts_transient and is_timeout(e):
+                breaker.release()
+                raise
+            if not is_retryable(e):
+                # The provider answered; the request itself was bad
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            if attempt >= settings.llm_retry_attempts:
+                raise
+            delay = backoff_delay(attempt)
+            if deadline.cap(delay) < delay:
+                raise DeadlineExceededError(f"{provider} call exceeded its deadline after {attempt} attempt(s)") from e
+            logger.warning(f"{provider} attempt {attempt} failed ({e}), retrying in {delay:.2f}s")
+            LLM_RETRIES.labels(provider).inc()
+            time.sleep(delay)
+            continue
+        breaker.record_success()
+        return result
+
+
+@contextmanager
+def circuit_guard(provider: str, timeouts_transient: bool = True) -> Iterator[None]:
+    """Circuit breaker bookkeeping for a call that can't be retried, such as a stream already delivering output."""
+    breaker = circuit_breakers.get(provider)
+    breaker.before_call()
+    try:
+        yield
+    except Exception as e:
+        if not timeouts_transient and is_timeout(e):
+            breaker.release()
+        elif is_retryable(e):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        raise
+    except BaseException:
+        breaker.release()
+        raise
+    breaker.record_success()
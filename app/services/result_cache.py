@@ -0,0 +1,20 @@
+from app.config import settings
+from app.utils.cache import TieredCache
+
+# Parsed CVModel JSON keyed by (markdown hash, service, model, prompt version)
+parse_cache = TieredCache(
+    name="parse_results",
+    cache_dir=settings.cache_dir,
+    memory_items=settings.parse_cache_memory_items,
+    max_bytes=settings.parse_cache_max_bytes,
+    ttl_seconds=settings.parse_cache_ttl_seconds,
+)
+
+# Analysis JSON (without metadata) keyed by (CV fingerprint, job fingerprint, service, model, prompt version)
+analysis_cache = TieredCache(
+    name="analysis_results",
+    cache_dir=settings.cache_dir,
+    memory_items=settings.analysis_cache_memory_items,
+    max_bytes=settings.analysis_cache_max_bytes,
+    ttl_seconds=settings.analysis_cache_ttl_seconds,
+)
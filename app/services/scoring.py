@@ -0,0 +1,291 @@
+import difflib
+import logging
+import re
+import time
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.models.cv_model import CVModel
+
+logger = logging.getLogger(__name__)
+
+MONTHS = {name: index for index, names in enumerate(
+    [("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"), ("may",), ("jun", "june"),
+     ("jul", "july"), ("aug", "august"), ("sep", "sept", "september"), ("oct", "october"), ("nov", "november"),
+     ("dec", "december")], start=1) for name in names}
+PRESENT_WORDS = ("present", "current", "currently", "now", "today", "ongoing", "till date", "to date")
+SEASONS = {"spring": 3, "summer": 6, "fall": 9, "autumn": 9, "winter": 12}
+
+# Canonical skill -> spellings seen in CVs and job requirements
+SKILL_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "javascript": ("js", "java script", "ecmascript", "es6"),
+    "typescript": ("ts",),
+    "python": ("python3", "python 3", "py"),
+    "golang": ("go", "go lang"),
+    "c++": ("cpp", "c plus plus"),
+    "c#": ("csharp", "c sharp"),
+    ".net": ("dotnet", "dot net", ".net core", "asp.net"),
+    "node.js": ("node", "nodejs", "node js"),
+    "react": ("reactjs", "react.js", "react js"),
+    "angular": ("angularjs", "angular.js"),
+    "vue": ("vuejs", "vue.js"),
+    "next.js": ("nextjs",),
+    "django": ("django rest framework", "drf"),
+    "kubernetes": ("k8s",),
+    "docker": (),
+    "amazon web services": ("aws",),
+    "google cloud platform": ("gcp", "google cloud"),
+    "microsoft azure": ("azure",),
+    "postgresql": ("postgres", "psql"),
+    "mysql": ("my sql",),
+    "mongodb": ("mongo",),
+    "sql": ("structured query language",),
+    "nosql": ("no sql",),
+    "machine learning": ("ml",),
+    "deep learning": ("dl",),
+    "artificial intelligence": ("ai",),
+    "natural language processing": ("nlp",),
+    "continuous integration": ("ci", "ci/cd", "cicd", "ci cd"),
+    "html": ("html5",),
+    "css": ("css3",),
+    "rest": ("rest api", "restful", "restful api", "rest apis"),
+    "graphql": ("graph ql",),
+    "terraform": (),
+    "git": (),
+    "linux": (),
+    "tensorflow": ("tf2",),
+    "scikit-learn": ("sklearn", "scikit learn"),
+    "microservices": ("micro services", "microservice"),
+    "agile": ("scrum",),
+}
+ALIAS_TO_SKILL = {alias: skill for skill, aliases in SKILL_ALIASES.items() for alias in aliases}
+# Skills without aliases that requirements commonly name; together with SKILL_ALIASES they are the
+# only skills scored, so phrases like "communication" or "senior backend engineer" are not
+OTHER_SKILLS = ("java", "kotlin", "scala", "ruby", "ruby on rails", "php", "perl", "rust", "bash", "powershell",
+                "flask", "fastapi", "spring boot", "laravel", "jquery", "redux", "tailwind", "sass", "redis", "kafka",
+                "rabbitmq", "elasticsearch", "cassandra", "dynamodb", "sqlite", "oracle", "spark", "hadoop", "airflow",
+                "dbt", "pandas", "numpy", "pytorch", "keras", "jenkins", "ansible", "helm", "prometheus", "grafana",
+                "nginx", "tableau", "power bi", "figma", "selenium", "jira")
+KNOWN_SKILLS = set(SKILL_ALIASES) | set(OTHER_SKILLS)
+# Spellings that are skills only when they make up a whole skill entry or requirement phrase; in
+# running text they are ordinary words ("rest of the team", "react to incidents", "a graph node")
+EXACT_ONLY_SPELLINGS = {"rest", "react", "node", "agile", "scrum"}
+# One alternation over every spelling that may be recognized inside running text, longest first so
+# "google cloud platform" wins over "google cloud"; a single findall pass replaces a regex per skill
+MENTION_RE = re.compile(
+    r"(?<![\w.+#])(" + "|".join(re.escape(spelling) for spelling in sorted(
+        (spelling for spelling in KNOWN_SKILLS | set(ALIAS_TO_SKILL)
+         if len(spelling) > 2 and spelling not in EXACT_ONLY_SPELLINGS), key=len, reverse=True)) + r")(?![\w+#])")
+
+YEARS_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(?:\+|plus)?\s*(?:-\s*\d+\s*)?(?:years?|yrs?)", re.IGNORECASE)
+# Words around skills in requirement text; they separate skills rather than belong to them
+REQUIREMENT_FILLER_RE = re.compile(
+    r"\b(?:experience|experienced|with|in|of|knowledge|strong|solid|good|excellent|proficiency|proficient|"
+    r"familiarity|familiar|skills?|understanding|working|hands-on|at least|minimum|a|an|the|using|"
+    r"background|expertise|required|preferred|plus|including|such as|like|etc|we|you|our|need|needs|someone|"
+    r"candidate|ideal|looking|for|who|will|must|should|have|has|is|are|be|able|ability|to|build|building|"
+    r"develop|developing|team)\b|[+():]",
+    re.IGNORECASE)
+# Role words around a skill in a requirement phrase ("senior Go developer")
+ROLE_WORDS_RE = re.compile(
+    r"\b(?:senior|junior|mid-level|lead|principal|staff|developers?|engineers?|programmers?|architects?|"
+    r"development|engineering|programming|languages?|frameworks?|stack)\b")
+EDUCATION_RE = re.compile(r"\b(?:degree|bachelor'?s?|master'?s?|phd|diploma|b\.?sc?|m\.?sc?)\b", re.IGNORECASE)
+FUZZY_CUTOFF = 0.88
+
+
+class ScoringEngine:
+    """
+    Deterministic job-fit numbers computed from a parsed CV in milliseconds: total years of
+    experience from merged date intervals, and required skills matched against the CV's skills
+    through an alias dictionary and fuzzy matching.
+    """
+
+    # Bump when the rules change; analyses embedding these numbers are cached by it
+    VERSION = "2"
+
+    @staticmethod
+    def parse_date(value: Optional[str], today: Optional[date] = None) -> Optional[date]:
+        """Normalize the date spellings found in CVs ("2019-03", "Mar 2019", "03/2019", "Present", ...)."""
+        if not value:
+            return None
+        text = value.strip().lower()
+        today = today or date.today()
+        if ScoringEngine.is_present(text):
+            return today
+
+        match = re.search(r"\b((?:19|20)\d{2})[-/.](\d{1,2})(?:[-/.](\d{1,2}))?\b", text)
+        if match:
+            return date(int(match.group(1)), min(max(int(match.group(2)), 1), 12), 1)
+        match = re.search(r"\b(\d{1,2})[-/.]((?:19|20)\d{2})\b", text)
+        if match:
+            return date(int(match.group(2)), min(max(int(match.group(1)), 1), 12), 1)
+        match = re.search(r"\b((?:19|20)\d{2})\b", text)
+        if not match:
+            return None
+        year = int(match.group(1))
+        month = next((number for name, number in MONTHS.items() if re.search(rf"\b{name}\b", text)), None)
+        month = month or next((number for name, number in SEASONS.items() if name in text), 1)
+        return date(year, month, 1)
+
+    @staticmethod
+    def is_present(value: Optional[str]) -> bool:
+        """Whether an end date such as "Present" or "till date" marks an ongoing role."""
+        return bool(value) and any(word in value.strip().lower() for word in PRESENT_WORDS)
+
+    @staticmethod
+    def merge_intervals(intervals: Iterable[Tuple[date, date]]) -> List[Tuple[date, date]]:
+        """Merge overlapping or touching intervals so concurrent jobs are not counted twice."""
+        merged: List[Tuple[date, date]] = []
+        for start, end in sorted(intervals):
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    @staticmethod
+    def experience_years(experience: Iterable[dict], today: Optional[date] = None) -> float:
+        intervals = []
+        for entry in experience:
+            start = ScoringEngine.parse_date(entry.get("start_date"), today)
+            if start is None:
+                continue
+            end = ScoringEngine.parse_date(entry.get("end_date"), today) or start
+            if end < start:
+                start, end = end, start
+            # A role listed as "2019 - 2019" or with a month only still lasted about a month
+            intervals.append((start, date(end.year + end.month // 12, end.month % 12 + 1, 1)))
+        months = sum((end.year - start.year) * 12 + end.month - start.month
+                     for start, end in ScoringEngine.merge_intervals(intervals))
+        return round(months / 12, 1)
+
+    @staticmethod
+    def normalize_skill(skill: str) -> str:
+        text = " ".join(re.sub(r"[()\[\]{}:;,!?\"']", " ", skill.lower()).split()).strip(" .-")
+        return ALIAS_TO_SKILL.get(text, text)
+
+    @staticmethod
+    def required_years(requirements: str) -> Optional[float]:
+        match = YEARS_RE.search(requirements or "")
+        return float(match.group(1)) if match else None
+
+    @staticmethod
+    def required_skills(requirements: str) -> List[str]:
+        """Dictionary skills named in free-text requirements, e.g. "5+ years of Python, k8s and AWS"."""
+        skills: List[str] = []
+        text = requirements or ""
+        # Keep aliases that contain a separator ("ci/cd") in one piece
+        for alias in (alias for alias in ALIAS_TO_SKILL if "/" in alias):
+            text = re.sub(re.escape(alias), ALIAS_TO_SKILL[alias], text, flags=re.IGNORECASE)
+        for chunk in re.split(r"[,;/\n•·|&]|\band\b|\bor\b", text, flags=re.IGNORECASE):
+            if EDUCATION_RE.search(chunk):
+                continue
+            for fragment in REQUIREMENT_FILLER_RE.split(YEARS_RE.sub(" ", chunk)):
+                words = fragment.split()
+                if not words:
+                    continue
+                phrase = ScoringEngine.normalize_skill(" ".join(words))
+                core = ScoringEngine.normalize_skill(ROLE_WORDS_RE.sub(" ", phrase))
+                if phrase in KNOWN_SKILLS or core in KNOWN_SKILLS:
+                    skills.append(phrase if phrase in KNOWN_SKILLS else core)
+                else:
+                    # "Python and cloud-native platform work": only the dictionary skills it mentions
+                    skills.extend(ScoringEngine._mentions(phrase))
+        return list(dict.fromkeys(skills))
+
+    @staticmethod
+    def candidate_skills(cv_data: dict) -> Set[str]:
+        skills = list(cv_data.get("skills") or []) + list(cv_data.get("skills_from_work_experience") or [])
+        for project in cv_data.get("projects") or []:
+            skills.extend(project.get("technologies_used") or [])
+        normalized = set()
+        for skill in skills:
+            # "Python (Django)" and "SQL (MySQL, PostgreSQL)" name several skills at once
+            for part in re.split(r"[(),/;]", skill or ""):
+                if part.strip():
+                    normalized.add(ScoringEngine.normalize_skill(part))
+        return normalized
+
+    @staticmethod
+    def _matches(required: str, candidate: Set[str], mentioned: Set[str]) -> bool:
+        if required in candidate or required in mentioned:
+            return True
+        return bool(difflib.get_close_matches(required, candidate, n=1, cutoff=FUZZY_CUTOFF))
+
+    @staticmethod
+    def _mentions(text: str) -> List[str]:
+        """Dictionary skills named in `text`, in order of first mention."""
+        skills = [ALIAS_TO_SKILL.get(spelling, spelling) for spelling in MENTION_RE.findall((text or "").lower())]
+        return list(dict.fromkeys(skills))
+
+    @staticmethod
+    def mentioned_skills(text: str) -> Set[str]:
+        """Dictionary skills named in free text such as experience or project descriptions."""
+        return set(ScoringEngine._mentions(text))
+
+    @staticmethod
+    def parse_requirements(requirements: str) -> Tuple[List[str], Optional[float]]:
+        return ScoringEngine.required_skills(requirements), ScoringEngine.required_years(requirements)
+
+    @staticmethod
+    def score(cv_data: dict, requirements: str, today: Optional[date] = None,
+              parsed: Optional[Tuple[List[str], Optional[float]]] = None) -> dict:
+        """
+        Years of experience, skill match against `requirements` and a 0-100 fit score. Pass `parsed`
+        (from parse_requirements) when scoring many CVs against the same requirements.
+        """
+        started = time.perf_counter()
+        if isinstance(cv_data, CVModel):
+            cv_data = cv_data.model_dump()
+
+        years_actual = ScoringEngine.experience_years(cv_data.get("experience") or [], today)
+        required, years_required = parsed or ScoringEngine.parse_requirements(requirements)
+        candidate = ScoringEngine.candidate_skills(cv_data)
+        mentioned = ScoringEngine.mentioned_skills(" ".join(
+            [str(entry.get("responsibilities") or "") for entry in cv_data.get("experience") or []]
+            + [str(project.get("description") or "") for project in cv_data.get("projects") or []]
+        ))
+
+        matching = [skill for skill in required if ScoringEngine._matches(skill, candidate, mentioned)]
+        missing = [skill for skill in required if skill not in matching]
+        skill_ratio = len(matching) / len(required) if required else 1.0
+        if years_required:
+            experience_ratio = min(1.0, years_actual / years_required)
+        else:
+            experience_ratio = 1.0 if years_actual > 0 else 0.0
+
+        return {
+            "years_actual": years_actual,
+            "years_required": years_required,
+            "meets_duration": years_required is None or years_actual >= years_required,
+            "required_skills": required,
+            "matching_skills": matching,
+            "missing_skills": missing,
+            "skill_match_ratio": round(skill_ratio, 3),
+            "score": round(100 * (0.7 * skill_ratio + 0.3 * experience_ratio), 1),
+            "elapsed_ms": round(1000 * (time.perf_counter() - started), 3),
+        }
+
+    @staticmethod
+    def apply_to_analysis(analysis_data: dict, scores: dict) -> dict:
+        """
+        Replace the LLM's experience numbers with the computed ones, and its verdict on the dictionary
+        skills that were scored; skills outside the dictionary keep the LLM's verdict.
+        """
+        qualification = analysis_data.get("basic_qualification_check")
+        if not isinstance(qualification, dict):
+            return analysis_data
+        work_experience = qualification.setdefault("work_experience", {})
+        work_experience["years_actual"] = int(scores["years_actual"])
+        work_experience["meets_duration"] = scores["meets_duration"]
+        if scores["years_required"] is not None:
+            work_experience["years_required"] = int(scores["years_required"])
+        if scores["required_skills"]:
+            technical_skills = qualification.setdefault("technical_skills", {})
+            scored = set(scores["required_skills"])
+            for key in ("required_skills", "matching_skills", "missing_skills"):
+                unscored = [skill for skill in technical_skills.get(key) or []
+                            if isinstance(skill, str) and ScoringEngine.normalize_skill(skill) not in scored]
+                technical_skills[key] = unscored + scores[key]
+        return analysis_data
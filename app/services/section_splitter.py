@@ -0,0 +1,63 @@
+import logging
+import re
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Normalized heading text -> section; headings not listed here stay part of the current section
+SECTION_HEADINGS = {
+    "experience": ("experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history", "career history", "relevant experience"),
+    "education": ("education", "academic background", "education and training", "academic qualifications"),
+    "projects": ("projects", "personal projects", "key projects", "selected projects", "academic projects"),
+    "certifications": ("certifications", "certificates", "certification", "licenses and certifications",
+                       "licenses & certifications", "courses", "courses and certifications"),
+    "skills": ("skills", "technical skills", "core competencies", "key skills", "skills and tools",
+               "technologies", "tools"),
+}
+# Top-level CVModel fields extracted from each section
+SECTION_FIELDS = {
+    "header": ("name", "title", "contact"),
+    "experience": ("experience", "skills_from_work_experience"),
+    "education": ("education",),
+    "projects": ("projects",),
+    "certifications": ("certifications",),
+    "skills": ("skills",),
+}
+HEADING_TO_SECTION = {heading: section for section, headings in SECTION_HEADINGS.items() for heading in headings}
+MARKDOWN_HEADING_RE = re.compile(r"^#{1,6}\s+")
+
+
+class SectionSplitter:
+    """
+    Splits CV markdown into the sections that can be parsed independently. Everything before the
+    first recognized heading (name, title, contact details, summary) becomes the "header" section.
+    """
+
+    @staticmethod
+    def section_of(line: str) -> Optional[str]:
+        is_heading = bool(MARKDOWN_HEADING_RE.match(line.strip()))
+        text = MARKDOWN_HEADING_RE.sub("", line.strip())
+        text = " ".join(re.sub(r"[*_:|]+", " ", text).split())
+        if not text:
+            return None
+        section = HEADING_TO_SECTION.get(text.lower()) if len(text) <= 40 else None
+        if section is None and is_heading:
+            # Two-column layouts can merge a heading with the next line: "WORK EXPERIENCE Software Developer"
+            words = text.split()
+            capitals = " ".join(words[:next((i for i, w in enumerate(words) if not w.isupper()), len(words))])
+            section = HEADING_TO_SECTION.get(capitals.lower())
+        return section
+
+    @staticmethod
+    def split(text: str) -> Dict[str, str]:
+        """Map each section found to its text; repeated headings (e.g. two columns) are concatenated."""
+        sections: Dict[str, list] = {"header": []}
+        current = "header"
+        for line in text.split("\n"):
+            section = SectionSplitter.section_of(line)
+            if section is not None:
+                current = section
+                sections.setdefault(current, [])
+            sections[current].append(line)
+        return {name: "\n".join(lines).strip() for name, lines in sections.items() if "\n".join(lines).strip()}
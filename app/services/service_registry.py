@@ -0,0 +1,128 @@
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+import httpx
+from ollama import Client
+
+from app.config import settings
+from app.services.cv_processor_services.base_service import BaseService
+from app.services.cv_processor_services.chatgpt_service import ChatGPTService
+from app.services.cv_processor_services.claude_service import ClaudeService
+from app.services.cv_processor_services.deepseek_service import DeepSeekService
+from app.services.cv_processor_services.gemini_service import GeminiService
+from app.services.cv_processor_services.ollama_service import OllamaService
+from app.utils.models import ModelType
+
+logger = logging.getLogger(__name__)
+
+SERVICE_CLASSES = {
+    ModelType.CHATGPT: ChatGPTService,
+    ModelType.DEEPSEEK_API: DeepSeekService,
+    ModelType.DEEPSEEK_R1_1_5B: OllamaService,
+    ModelType.DEEPSEEK_R1_8B: OllamaService,
+    ModelType.DEEPSEEK_R1_14B: OllamaService,
+    ModelType.MISTRAL: OllamaService,
+    ModelType.QWEN_1_8B: OllamaService,
+    ModelType.QWEN_14B: OllamaService,
+    ModelType.GEMINI: GeminiService,
+    ModelType.OLLAMA: OllamaService,
+    ModelType.CLAUDE: ClaudeService,
+}
+
+
+class ServiceRegistry:
+    """
+    Process-wide registry of provider services.
+    Each service is built on first use and reused afterwards. The OpenAI-compatible and Anthropic
+    clients share one keep-alive HTTP connection pool, and all Ollama models share one client.
+    """
+
+    def __init__(self):
+        self._services: Dict[ModelType, BaseService] = {}
+        self._lock = threading.Lock()
+        self._http_client: Optional[httpx.Client] = None
+        self._ollama_client: Optional[Client] = None
+        self._ollama_transport: Optional[httpx.HTTPTransport] = None
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry,
+        )
+
+    @property
+    def http_client(self) -> httpx.Client:
+        if self._http_client is None:
+            self._http_client = httpx.Client(limits=self._limits(), follow_redirects=True)
+        return self._http_client
+
+    @property
+    def ollama_client(self) -> Client:
+        if self._ollama_client is None:
+            # The ollama client builds its own httpx.Client, so it is handed a transport (the connection
+            # pool) that the registry owns and closes. It has no per-request timeout, so the attempt
+            # timeout is set on the client.
+            self._ollama_transport = httpx.HTTPTransport(limits=self._limits())
+            self._ollama_client = Client(host=settings.ollama_host, timeout=settings.ollama_timeout_seconds,
+                                         transport=self._ollama_transport)
+        return self._ollama_client
+
+    def _builders(self) -> Dict[ModelType, Callable[[], BaseService]]:
+        return {
+            ModelType.CHATGPT: lambda: ChatGPTService(model=settings.openai_model, api_key=settings.openai_api_key,
+                                                      http_client=self.http_client),
+            ModelType.DEEPSEEK_API: lambda: DeepSeekService(model=settings.deepseek_model,
+                                                            api_key=settings.deepseek_api_key,
+                                                            http_client=self.http_client),
+            ModelType.DEEPSEEK_R1_1_5B: lambda: OllamaService(model=ModelType.DEEPSEEK_R1_1_5B, client=self.ollama_client),
+            ModelType.DEEPSEEK_R1_8B: lambda: OllamaService(model=ModelType.DEEPSEEK_R1_8B, client=self.ollama_client),
+            ModelType.DEEPSEEK_R1_14B: lambda: OllamaService(model=ModelType.DEEPSEEK_R1_14B, client=self.ollama_client),
+            ModelType.MISTRAL: lambda: OllamaService(model=ModelType.MISTRAL, client=self.ollama_client),
+            ModelType.QWEN_1_8B: lambda: OllamaService(model=ModelType.QWEN_1_8B, client=self.ollama_client),
+            ModelType.QWEN_14B: lambda: OllamaService(model=ModelType.QWEN_14B, client=self.ollama_client),
+            ModelType.GEMINI: lambda: GeminiService(model=settings.gemini_model),
+            ModelType.OLLAMA: lambda: OllamaService(model=settings.ollama_model, client=self.ollama_client),
+            ModelType.CLAUDE: lambda: ClaudeService(model=settings.anthropic_model, api_key=settings.anthropic_api_key,
+                                                    http_client=self.http_client),
+        }
+
+    @staticmethod
+    def provider(model_type: ModelType) -> str:
+        """Provider of a model type (its rate-limit key and execution lane), without building the service."""
+        service_class = SERVICE_CLASSES.get(model_type)
+        if service_class is None:
+            raise ValueError(f"Unsupported model type: {model_type}")
+        return service_class.provider
+
+    def get(self, model_type: ModelType) -> BaseService:
+        service = self._services.get(model_type)
+        if service is not None:
+            return service
+        with self._lock:
+            service = self._services.get(model_type)
+            if service is None:
+                builder = self._builders().get(model_type)
+                if builder is None:
+                    raise ValueError(f"Unsupported model type: {model_type}")
+                service = builder()
+                service.model_type = model_type
+                self._services[model_type] = service
+                logger.info(f"Initialized {type(service).__name__} for {model_type.value}")
+        return service
+
+    def close(self):
+        with self._lock:
+            self._services.clear()
+            if self._http_client is not None:
+                self._http_client.close()
+                self._http_client = None
+            if self._ollama_transport is not None:
+                self._ollama_transport.close()
+                self._ollama_transport = None
+            self._ollama_client = None
+        logger.info("Service registry closed")
+
+
+service_registry = ServiceRegistry()
@@ -0,0 +1,186 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+from app.config import settings
+from app.utils.metrics import LLM_COST, LLM_TOKENS, model_label
+from app.utils.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Per-request tally set by the endpoints; provider calls run in pool threads with a copy of the context
+_request_tally: ContextVar[Optional["UsageTally"]] = ContextVar("usage_request_tally", default=None)
+# The provider call being measured on this thread, filled in by the service from its response
+_current_call: ContextVar[Optional["CallUsage"]] = ContextVar("usage_current_call", default=None)
+
+
+def price(model_type, prompt_tokens: int, completion_tokens: int) -> float:
+    """Cost in USD from `model_prices` (USD per million tokens); models without a price (local ones) cost 0."""
+    prices = settings.model_prices.get(model_label(model_type), {})
+    return (prompt_tokens * prices.get("input", 0.0) + completion_tokens * prices.get("output", 0.0)) / 1_000_000
+
+
+class CallUsage:
+    """Token counts and timings of one provider call."""
+
+    def __init__(self, model_type, provider: str, estimated_prompt_tokens: int):
+        self.model_type = model_type
+        self.provider = provider
+        self.estimated_prompt_tokens = estimated_prompt_tokens
+        self.started = time.perf_counter()
+        self.prompt_tokens: Optional[int] = None
+        self.completion_tokens: Optional[int] = None
+        self.first_token_seconds: Optional[float] = None
+        # Time spent generating, when the provider reports it (Ollama) or a first token was seen (streams);
+        # None for other calls, whose wall time also covers queueing and prompt processing
+        self.generation_seconds: Optional[float] = None
+        self.duration_seconds = 0.0
+        self.output = ""
+        self.estimated = False
+
+    def finish(self):
+        self.duration_seconds = time.perf_counter() - self.started
+        if self.prompt_tokens is None or self.completion_tokens is None:
+            # The provider didn't return usage; fall back to the character-based estimate
+            self.estimated = True
+            self.prompt_tokens = self.estimated_prompt_tokens if self.prompt_tokens is None else self.prompt_tokens
+            if self.completion_tokens is None:
+                self.completion_tokens = estimate_tokens(self.output)
+        if self.generation_seconds is None and self.first_token_seconds is not None:
+            self.generation_seconds = self.duration_seconds - self.first_token_seconds
+
+    @property
+    def cost_usd(self) -> float:
+        return price(self.model_type, self.prompt_tokens or 0, self.completion_tokens or 0)
+
+
+class UsageTally:
+    """Running sums of provider calls per model type, for one request or for the whole process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models: Dict[str, Dict[str, float]] = {}
+
+    def add(self, call: CallUsage):
+        with self._lock:
+            sums = self._models.setdefault(model_label(call.model_type), {
+                "calls": 0, "estimated_calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0,
+                "llm_seconds": 0.0, "generation_seconds": 0.0, "generation_tokens": 0, "first_token_seconds": 0.0,
+                "first_token_calls": 0,
+            })
+            sums["calls"] += 1
+            sums["estimated_calls"] += call.estimated
+            sums["prompt_tokens"] += call.prompt_tokens
+            sums["completion_tokens"] += call.completion_tokens
+            sums["cost_usd"] += call.cost_usd
+            sums["llm_seconds"] += call.duration_seconds
+            if call.generation_seconds is not None:
+                # Only calls with a measured generation phase count towards the generation speed
+                sums["generation_seconds"] += call.generation_seconds
+                sums["generation_tokens"] += call.completion_tokens
+            if call.first_token_seconds is not None:
+                sums["first_token_seconds"] += call.first_token_seconds
+                sums["first_token_calls"] += 1
+
+    @staticmethod
+    def _report(sums: Dict[str, float]) -> Dict[str, Any]:
+        cost = sums["cost_usd"]
+        return {
+            "calls": int(sums["calls"]),
+            "estimated_calls": int(sums["estimated_calls"]),
+            "prompt_tokens": int(sums["prompt_tokens"]),
+            "completion_tokens": int(sums["completion_tokens"]),
+            "cost_usd": round(cost, 6),
+            "llm_seconds": round(sums["llm_seconds"], 3),
+            "time_to_first_token_seconds": (round(sums["first_token_seconds"] / sums["first_token_calls"], 3)
+                                            if sums["first_token_calls"] else None),
+            "tokens_per_second": (round(sums["generation_tokens"] / sums["generation_seconds"], 1)
+                                  if sums["generation_seconds"] > 0 else None),
+            "cost_per_call_usd": round(cost / sums["calls"], 6) if sums["calls"] else None,
+            "completion_tokens_per_dollar": round(sums["completion_tokens"] / cost) if cost > 0 else None,
+        }
+
+    def by_model(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {model: self._report(sums) for model, sums in sorted(self._models.items())}
+
+    def summary(self) -> Dict[str, Any]:
+        """All model types together."""
+        with self._lock:
+            totals: Dict[str, float] = {}
+            for sums in self._models.values():
+                for key, value in sums.items():
+                    totals[key] = totals.get(key, 0) + value
+        if not totals:
+            return self._report({"calls": 0, "estimated_calls": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                                 "cost_usd": 0.0, "llm_seconds": 0.0, "generation_seconds": 0.0,
+                                 "generation_tokens": 0, "first_token_seconds": 0.0, "first_token_calls": 0})
+        return self._report(totals)
+
+
+# Calls made by this worker process since it started; /metrics has the same counts across workers
+process_usage = UsageTally()
+
+
+@contextmanager
+def collect_usage() -> Iterator[UsageTally]:
+    """Tally the provider calls made while the block runs (including those in pool threads)."""
+    tally = UsageTally()
+    token = _request_tally.set(tally)
+    try:
+        yield tally
+    finally:
+        _request_tally.reset(token)
+
+
+@contextmanager
+def measure_call(model_type, provider: str, estimated_prompt_tokens: int) -> Iterator[CallUsage]:
+    """
+    Measure one provider call. The service reports the usage its provider returned with
+    `report_tokens`; successful calls are added to the request's tally, the process totals and
+    the token and cost metrics.
+    """
+    call = CallUsage(model_type, provider, estimated_prompt_tokens)
+    token = _current_call.set(call)
+    try:
+        yield call
+    finally:
+        _current_call.reset(token)
+    call.finish()
+    label = model_label(model_type)
+    LLM_TOKENS.labels(label, "prompt").inc(call.prompt_tokens)
+    LLM_TOKENS.labels(label, "completion").inc(call.completion_tokens)
+    LLM_COST.labels(label).inc(call.cost_usd)
+    process_usage.add(call)
+    tally = _request_tally.get()
+    if tally is not None:
+        tally.add(call)
+
+
+def report_tokens(prompt_tokens: Optional[int] = None, completion_tokens: Optional[int] = None,
+                  first_token_seconds: Optional[float] = None, generation_seconds: Optional[float] = None):
+    """Record the usage a provider returned for the call being measured; fields left as None are kept."""
+    call = _current_call.get()
+    if call is None:
+        return
+    if prompt_tokens is not None:
+        call.prompt_tokens = prompt_tokens
+    if completion_tokens is not None:
+        call.completion_tokens = completion_tokens
+    if first_token_seconds is not None:
+        call.first_token_seconds = first_token_seconds
+    if generation_seconds is not None:
+        call.generation_seconds = generation_seconds
+
+
+def record_output(chunk: str):
+    """Note streamed output: the first chunk sets the time to first token, the text backs the estimate."""
+    call = _current_call.get()
+    if call is None:
+        return
+    if call.first_token_seconds is None:
+        call.first_token_seconds = time.perf_counter() - call.started
+    call.output += chunk
@@ -0,0 +1,173 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.utils.metrics import CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+
+def sha256_hex(*parts) -> str:
+    """Hash bytes/str parts into a single hex digest, separating parts so concatenations can't collide."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        digest.update(part)
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class TieredCache:
+    """
+    String cache with an in-memory LRU tier in front of a SQLite tier.
+    The SQLite tier is evicted least-recently-used first once its payload exceeds `max_bytes`;
+    entries older than `ttl_seconds` (if set) are treated as misses in both tiers.
+    """
+
+    def __init__(self, name: str, cache_dir: str, memory_items: int, max_bytes: int,
+                 ttl_seconds: Optional[float] = None):
+        self.name = name
+        self.db_path = os.path.join(cache_dir, f"{name}.sqlite3")
+        self.memory_items = memory_items
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._disk_bytes = 0
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _db(self) -> sqlite3.Connection:
+        # Connect lazily so processes that import the cache but never use it don't open the database
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at)")
+            self._disk_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        return self._conn
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds
+
+    def _remember(self, key: str, value: str, created_at: float):
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[1]):
+                    self._memory.move_to_end(key)
+                    self.hits_memory += 1
+                    CACHE_LOOKUPS.labels(self.name, "memory").inc()
+                    return entry[0]
+                del self._memory[key]
+
+            if self.max_bytes > 0:
+                db = self._db()
+                row = db.execute("SELECT value, size, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    value, size, created_at = row
+                    if not self._expired(created_at):
+                        db.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key))
+                        db.commit()
+                        self._remember(key, value, created_at)
+                        self.hits_disk += 1
+                        CACHE_LOOKUPS.labels(self.name, "disk").inc()
+                        return value
+                    db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    db.commit()
+                    self._disk_bytes -= size
+
+            self.misses += 1
+            CACHE_LOOKUPS.labels(self.name, "miss").inc()
+            return None
+
+    def set(self, key: str, value: str):
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            if self.max_bytes <= 0:
+                return
+            size = len(value.encode("utf-8"))
+            if size > self.max_bytes:
+                return
+            db = self._db()
+            previous = db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            db.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._disk_bytes += size - (previous[0] if previous else 0)
+            self._evict(db)
+            db.commit()
+
+    def _evict(self, db: sqlite3.Connection):
+        while self._disk_bytes > self.max_bytes:
+            rows = db.execute("SELECT key, size FROM entries ORDER BY accessed_at LIMIT 64").fetchall()
+            if not rows:
+                self._disk_bytes = 0
+                return
+            for key, size in rows:
+                db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._memory.pop(key, None)
+                self._disk_bytes -= size
+                self.evictions += 1
+                if self._disk_bytes <= self.max_bytes:
+                    return
+
+    def delete(self, key: str):
+        with self._lock:
+            self._memory.pop(key, None)
+            if self.max_bytes > 0:
+                db = self._db()
+                row = db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    db.commit()
+                    self._disk_bytes -= row[0]
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self.max_bytes > 0:
+                db = self._db()
+                db.execute("DELETE FROM entries")
+                db.commit()
+                self._disk_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits_memory + self.hits_disk + self.misses
+            entries = 0
+            if self.max_bytes > 0:
+                entries = self._db().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            return {
+                "hits_memory": self.hits_memory,
+                "hits_disk": self.hits_disk,
+                "misses": self.misses,
+                "hit_ratio": (self.hits_memory + self.hits_disk) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+                "disk_entries": entries,
+                "disk_bytes": self._disk_bytes,
+                "max_bytes": self.max_bytes,
+            }
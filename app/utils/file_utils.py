@@ -0,0 +1,55 @@
+import logging
+
+from fastapi import UploadFile
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.utils.metrics import observe_stage
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+# Room for multipart boundaries and part headers around the file itself
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    pass
+
+
+async def read_upload(file: UploadFile, max_bytes: int, model_type=None) -> bytes:
+    """Read an upload from Starlette's spooled buffer in chunks, stopping as soon as it exceeds `max_bytes`."""
+    with observe_stage("upload_read", model_type):
+        if file.size is not None and file.size > max_bytes:
+            raise UploadTooLargeError(f"{file.filename} exceeds the {max_bytes} byte upload limit")
+        buffer = bytearray()
+        while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+            buffer.extend(chunk)
+            if len(buffer) > max_bytes:
+                raise UploadTooLargeError(f"{file.filename} exceeds the {max_bytes} byte upload limit")
+        return bytes(buffer)
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Rejects multipart uploads whose declared Content-Length is over the limit with 413 before the
+    body is received, instead of after it has been spooled. Batch endpoints get their own limit.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: int, batch_max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.batch_max_bytes = batch_max_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http":
+            headers = dict(scope["headers"])
+            if headers.get(b"content-type", b"").startswith(b"multipart/form-data"):
+                limit = self.batch_max_bytes if scope["path"].rstrip("/").endswith("/batch") else self.max_bytes
+                length = headers.get(b"content-length", b"")
+                if length.isdigit() and int(length) > limit + MULTIPART_OVERHEAD_BYTES:
+                    logger.warning(f"Rejected {int(length)} byte upload to {scope['path']} (limit {limit})")
+                    response = JSONResponse({"detail": f"Upload exceeds the {limit} byte limit"}, status_code=413)
+                    await response(scope, receive, send)
+                    return
+        await self.app(scope, receive, send)
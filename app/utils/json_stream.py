@@ -0,0 +1,93 @@
+import json
+import logging
+from typing import Any, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalJSONParser:
+    """
+    Incremental parser for a streamed JSON object.
+    `feed` accepts text chunks as they arrive and returns the top-level (key, value) members that
+    became complete, so callers can act on each section without waiting for the closing brace.
+    Text before the opening brace (code fences, <think> blocks of reasoning models) is skipped.
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self._started = False
+        self._finished = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = 0
+        self.members: dict = {}
+
+    @property
+    def finished(self) -> bool:
+        return self._finished
+
+    def _find_start(self) -> bool:
+        search_from = 0
+        if "<think>" in self._text:
+            end = self._text.find("</think>")
+            if end < 0:
+                return False
+            search_from = end + len("</think>")
+        start = self._text.find("{", max(search_from, self._pos))
+        if start < 0:
+            self._pos = len(self._text)
+            return False
+        self._started = True
+        self._depth = 1
+        self._pos = start + 1
+        self._member_start = self._pos
+        return True
+
+    def _emit(self, end: int, completed: List[Tuple[str, Any]]):
+        member = self._text[self._member_start:end].strip()
+        self._member_start = end + 1
+        if not member:
+            return
+        try:
+            parsed = json.loads("{" + member + "}")
+        except json.JSONDecodeError:
+            logger.warning(f"Skipping malformed JSON member: {member[:80]}")
+            return
+        for key, value in parsed.items():
+            self.members[key] = value
+            completed.append((key, value))
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        completed: List[Tuple[str, Any]] = []
+        if self._finished or not chunk:
+            return completed
+        self._text += chunk
+        if not self._started and not self._find_start():
+            return completed
+
+        text = self._text
+        for pos in range(self._pos, len(text)):
+            char = text[pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(pos, completed)
+                    self._finished = True
+                    break
+            elif char == "," and self._depth == 1:
+                self._emit(pos, completed)
+        self._pos = len(text)
+        return completed
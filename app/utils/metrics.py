@@ -0,0 +1,103 @@
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# From sub-millisecond prompt building and validation to multi-minute local model calls
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+METRICS_PATH = "/metrics"
+
+# Stages: upload_read, pdf_extraction, prompt_build, llm_call, validation; model_type is "none" before a
+# model is involved (e.g. extraction for the streaming endpoint's first event)
+STAGE_SECONDS = Histogram("cvinsight_stage_duration_seconds", "Duration of a pipeline stage",
+                          ["stage", "model_type"], buckets=STAGE_BUCKETS)
+STAGE_ERRORS = Counter("cvinsight_stage_errors_total", "Pipeline stages that raised", ["stage", "model_type"])
+HTTP_ERRORS = Counter("cvinsight_http_errors_total", "Responses with a 4xx or 5xx status", ["status"])
+CACHE_LOOKUPS = Counter("cvinsight_cache_lookups_total", "Cache lookups by tier that answered (memory, disk or miss)",
+                        ["cache", "result"])
+LLM_RETRIES = Counter("cvinsight_llm_retries_total", "Provider calls retried after a transient error", ["provider"])
+LLM_TOKENS = Counter("cvinsight_llm_tokens_total", "Tokens sent to and generated by the models (kind: prompt or "
+                     "completion)", ["model_type", "kind"])
+LLM_COST = Counter("cvinsight_llm_cost_usd_total", "Cost of the model calls in USD, from model_prices", ["model_type"])
+# Rate limiting: callers queued per limiter key ("openai", "ollama:qwen:14b") and per provider lane
+RATE_LIMIT_QUEUE_DEPTH = Gauge("cvinsight_rate_limit_queue_depth", "Calls waiting for a rate-limit slot",
+                               ["limiter"], multiprocess_mode="livesum")
+RATE_LIMIT_WAIT_SECONDS = Histogram("cvinsight_rate_limit_wait_seconds", "Time a call waited for its rate-limit slot",
+                                    ["limiter"], buckets=STAGE_BUCKETS)
+RATE_LIMIT_TIMEOUTS = Counter("cvinsight_rate_limit_timeouts_total", "Calls that gave up waiting for a rate-limit slot",
+                              ["limiter"])
+LLM_LANE_QUEUE_DEPTH = Gauge("cvinsight_llm_lane_queue_depth", "Calls waiting for one of their provider's in-flight "
+                             "slots before taking an LLM thread", ["provider"], multiprocess_mode="livesum")
+LLM_LANE_WAIT_SECONDS = Histogram("cvinsight_llm_lane_wait_seconds", "Time a call waited for its provider's in-flight "
+                                  "slot", ["provider"], buckets=STAGE_BUCKETS)
+REQUESTS_IN_FLIGHT = Gauge("cvinsight_requests_in_flight", "HTTP requests being handled",
+                           multiprocess_mode="livesum")
+
+
+def model_label(model_type) -> str:
+    if model_type is None:
+        return "none"
+    return getattr(model_type, "value", str(model_type))
+
+
+@contextmanager
+def observe_stage(stage: str, model_type=None) -> Iterator[None]:
+    """Time a pipeline stage into the stage histogram; exceptions are counted as stage errors and re-raised."""
+    label = model_label(model_type)
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.labels(stage, label).inc()
+        raise
+    finally:
+        STAGE_SECONDS.labels(stage, label).observe(time.perf_counter() - started)
+
+
+def render() -> Tuple[bytes, str]:
+    """
+    Metrics in the Prometheus text format. With PROMETHEUS_MULTIPROC_DIR set (one directory shared by
+    all uvicorn workers, emptied before they start), the samples of every worker are aggregated.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: Optional[int] = None):
+    """Drop this worker's live gauge samples from the shared directory when it shuts down."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
+class MetricsMiddleware:
+    """Tracks HTTP requests in flight and counts error responses; scrapes of /metrics are not counted."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] == METRICS_PATH:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_status(message: Message):
+            if message["type"] == "http.response.start" and message["status"] >= 400:
+                HTTP_ERRORS.labels(str(message["status"])).inc()
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
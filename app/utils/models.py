@@ -13,3 +13,29 @@ class ModelType(str, Enum):
     GEMINI = "gemini"
     OLLAMA = "ollama"
     CLAUDE = "claude"
+
+
+class ParseMode(str, Enum):
+    SINGLE = "single"
+    CHUNKED = "chunked"
+
+
+class AnalysisMode(str, Enum):
+    SINGLE = "single"
+    DECOMPOSED = "decomposed"
+
+
+class AnalysisSection(str, Enum):
+    EXECUTIVE_SUMMARY = "executive_summary"
+    BASIC_QUALIFICATION_CHECK = "basic_qualification_check"
+    POSITION_SPECIFIC_ANALYSIS = "position_specific_analysis"
+    STRENGTHS_AND_WEAKNESSES = "strengths_and_weaknesses"
+    RECOMMENDATION = "recommendation"
+    CV_ENHANCEMENT_RECOMMENDATIONS = "cv_enhancement_recommendations"
+    OPTIONAL_ANALYSIS = "optional_analysis"
+
+
+class DedupMode(str, Enum):
+    OFF = "off"
+    DETECT = "detect"
+    REUSE = "reuse"
@@ -1,3 +1,6 @@
+import re
+from typing import Dict, List, Set, Tuple
+
 prompt = """
 I have a markdown-formatted CV. Please extract all the relevant information and provide a structured JSON output with the following fields:
 
@@ -59,4 +62,73 @@ Desired JSON format:
 }
 
 Use the exact words from the provided CV text. Do not add or summarize or hallucinate anything. If a field is missing, leave it as null.
-"""
\ No newline at end of file
+"""
+
+# Contact keys in the prompt template; parse_prompt can leave out the ones already known
+CONTACT_PROMPT_FIELDS = ("email", "phone", "location", "linkedin", "github", "other_links")
+
+SECTION_PROMPT_INTRO = ("I have one section of a markdown-formatted CV. Please extract the relevant information "
+                        "and provide a structured JSON output with only the following fields:")
+
+
+def parse_prompt(known_contact_fields=()) -> str:
+    """The parse prompt without the contact fields that were already extracted from the CV text."""
+    known = set(known_contact_fields) & set(CONTACT_PROMPT_FIELDS)
+    if not known:
+        return prompt
+    return "\n".join(_drop_contact_fields(prompt.splitlines(), known)) + "\n"
+
+
+def split_template(template: str) -> Tuple[List[str], Dict[str, List[str]], List[str]]:
+    """Split a prompt around its JSON template: lines before it, lines of each top-level member, lines after it."""
+    lines = template.splitlines()
+    start = lines.index("{")
+    end = len(lines) - 1 - lines[::-1].index("}")
+    members = {}
+    current = None
+    for line in lines[start + 1:end]:
+        match = re.match(r'^  "(\w+)":', line)
+        if match:
+            current = match.group(1)
+            members[current] = []
+        members[current].append(line)
+    return lines[:start], members, lines[end + 1:]
+
+
+def join_template(head: List[str], members: List[List[str]], tail: List[str]) -> str:
+    body = ",\n".join("\n".join(member).rstrip(",") for member in members)
+    return "\n".join(head + ["{", body, "}"] + tail) + "\n"
+
+
+def section_prompt(fields, known_contact_fields=()) -> str:
+    """
+    A prompt asking only for the given top-level CV fields, built from the members of the full
+    prompt's JSON template so both stay in sync.
+    """
+    head, members, tail = split_template(prompt)
+    selected = []
+    for field in fields:
+        member = members[field]
+        if field == "contact":
+            member = _drop_contact_fields(member, set(known_contact_fields) & set(CONTACT_PROMPT_FIELDS))
+        selected.append(member)
+    # Swap the opening sentence, keep the rest of the prompt around the JSON template
+    head = [SECTION_PROMPT_INTRO if line.startswith("I have a markdown-formatted CV") else line for line in head]
+    return join_template(head, selected, tail)
+
+
+def _drop_contact_fields(lines: List[str], known: Set[str]) -> List[str]:
+    if not known:
+        return lines
+    start = next(i for i, line in enumerate(lines) if line.strip().startswith('"contact":'))
+    end = next(i for i in range(start, len(lines)) if _closes_block(lines[i]))
+    contact = [line for line in lines[start + 1:end]
+               if not any(line.strip().startswith(f'"{field}":') for field in known)]
+    if contact:
+        # Dropping the last contact line would otherwise leave a dangling comma
+        contact[-1] = contact[-1].rstrip(",")
+    return lines[:start + 1] + contact + lines[end:]
+
+
+def _closes_block(line: str) -> bool:
+    return line.strip() in ("}", "},")
@@ -1,3 +1,5 @@
+from app.utils.prompt import join_template, split_template
+
 analysis_prompt = """
 Analyze the following candidate's CV data and provide a structured JSON response evaluating their suitability for the [JOB_TITLE] position at [COMPANY_NAME]. The job requires [REQUIREMENTS].
 
@@ -179,3 +181,9 @@ Expected response format:
 
 Provide a detailed, objective analysis based on the CV data provided. Focus on concrete evidence from the CV rather than assumptions. For any gaps or concerns, provide constructive suggestions for improvement.
 """
+
+
+def analysis_sections_prompt(sections) -> str:
+    """The analysis prompt asking only for the given top-level sections (metadata is added by the service)."""
+    head, members, tail = split_template(analysis_prompt)
+    return join_template(head, [members[section] for section in sections], tail)
@@ -0,0 +1,3 @@
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budgeting (about four characters per token for English text)."""
+    return max(1, len(text) // 4) if text else 0
@@ -0,0 +1,103 @@
+"""
+Benchmark for the markdown compaction stage.
+
+Extracts every PDF in a folder, compacts the markdown and reports the estimated input tokens before
+and after. Each CV is also checked for lost content: words of the raw markdown missing from the
+compacted text, and the rule-based contact fields. With --model, both versions are parsed by the
+LLM as well and the populated CV fields are compared. Exits non-zero if anything was lost.
+
+Usage:
+    python -m scripts.benchmark_compaction --folder sample_CV
+    python -m scripts.benchmark_compaction --folder sample_CV --model ollama
+"""
+import argparse
+import logging
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from app.services.contact_extractor import ContactExtractor
+from app.services.cv_processor import CVProcessor
+from app.services.markdown_compactor import MarkdownCompactor
+from app.services.pdf_parser import PDFParser
+from app.utils.models import ModelType
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+# Words that only ever appear in the layout noise the compactor is meant to remove
+NOISE_WORDS = {"picture", "intentionally", "omitted", "start", "end", "of", "text", "page", "br"}
+
+
+def words(text: str) -> Set[str]:
+    return {word.lower() for word in re.findall(r"\w+", text)}
+
+
+def populated_fields(cv_data: dict) -> Dict[str, int]:
+    """Number of filled entries per CV field, contact fields counted individually."""
+    counts = {}
+    for key, value in cv_data.items():
+        if key == "contact":
+            for contact_key, contact_value in (value or {}).items():
+                counts[f"contact.{contact_key}"] = 1 if contact_value else 0
+        elif isinstance(value, list):
+            counts[key] = len(value)
+        else:
+            counts[key] = 1 if value and value != "N/A" else 0
+    return counts
+
+
+def benchmark_file(pdf_path: Path, steps: Optional[List[str]], model: Optional[ModelType]) -> dict:
+    raw = PDFParser.convert_pdf(str(pdf_path))
+    compacted, report = MarkdownCompactor.compact(raw, steps)
+
+    lost_words = sorted(word for word in words(raw) - words(compacted)
+                        if word not in NOISE_WORDS and not word.isdigit())
+    # Rule-based contact fields must survive compaction unchanged
+    lost_contact = [field for field in ContactExtractor.FIELDS
+                    if getattr(ContactExtractor.extract(raw), field) != getattr(ContactExtractor.extract(compacted), field)]
+
+    result = {"file": pdf_path.name, "report": report, "lost_words": lost_words, "lost_contact": lost_contact,
+              "lost_fields": []}
+    if model is not None:
+        raw_fields = populated_fields(CVProcessor.parse_cv(raw, model, use_cache=False).model_dump())
+        compact_fields = populated_fields(CVProcessor.parse_cv(compacted, model, use_cache=False).model_dump())
+        result["lost_fields"] = [field for field, count in raw_fields.items()
+                                 if compact_fields.get(field, 0) < count]
+    return result
+
+
+def print_results(results: List[dict]):
+    print(f"{'file':<50} {'tokens before':>13} {'after':>7} {'saved':>7} {'saved %':>8}  lost")
+    for r in results:
+        report = r["report"]
+        saved_pct = 100 * report["tokens_saved"] / report["tokens_before"] if report["tokens_before"] else 0.0
+        lost = r["lost_words"] + [f"contact.{f}" for f in r["lost_contact"]] + r["lost_fields"]
+        print(f"{r['file']:<50} {report['tokens_before']:>13} {report['tokens_after']:>7} "
+              f"{report['tokens_saved']:>7} {saved_pct:>7.1f}%  {', '.join(lost) or '-'}")
+
+    before = sum(r["report"]["tokens_before"] for r in results)
+    after = sum(r["report"]["tokens_after"] for r in results)
+    print(f"\nTotal: {before} -> {after} estimated input tokens "
+          f"({100 * (before - after) / before if before else 0.0:.1f}% fewer)")
+    for step in MarkdownCompactor.STEPS:
+        removed = sum(r["report"]["steps"].get(step, 0) for r in results)
+        print(f"  {step:<16} {removed:>7} characters removed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure token savings of the markdown compaction stage")
+    parser.add_argument("--folder", default="sample_CV")
+    parser.add_argument("--steps", nargs="+", choices=MarkdownCompactor.STEPS, help="Steps to run (default: all)")
+    parser.add_argument("--model", type=ModelType, help="Also parse raw and compacted text with this model")
+    args = parser.parse_args()
+
+    pdf_files = sorted(Path(args.folder).glob("*.pdf"))
+    if not pdf_files:
+        sys.exit(f"No PDF files found in {args.folder}")
+
+    results = [benchmark_file(pdf, args.steps, args.model) for pdf in pdf_files]
+    print_results(results)
+    if any(r["lost_words"] or r["lost_contact"] or r["lost_fields"] for r in results):
+        sys.exit(1)
@@ -0,0 +1,99 @@
+"""
+Benchmark for the CV store search.
+
+Fills a throwaway store with synthetic parsed CVs and times a set of searches, reporting the
+number of matches and the median and worst latency of each.
+
+Usage:
+    python -m scripts.benchmark_cv_store --cvs 100000
+    python -m scripts.benchmark_cv_store --cvs 100000 --query "Python AND Kubernetes, 5+ years"
+"""
+import argparse
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import List
+
+from app.models.cv_model import Contact, CVModel, Experience, Project
+from app.services.cv_store import CVStore
+from app.utils.models import ModelType
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+SKILLS = ["Python", "Java", "JavaScript", "TypeScript", "Go", "C++", "C#", "Rust", "SQL", "PostgreSQL", "MongoDB",
+          "Kubernetes", "Docker", "AWS", "GCP", "Azure", "Terraform", "React", "Angular", "Node.js", "Django",
+          "Flask", "Spark", "Kafka", "Machine Learning", "TensorFlow", "PyTorch", "Linux", "Git", "GraphQL"]
+TITLES = ["Software Engineer", "Senior Software Engineer", "Backend Developer", "Frontend Developer",
+          "Data Scientist", "DevOps Engineer", "Site Reliability Engineer", "Engineering Manager", "QA Engineer"]
+COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises", "Tokopedia",
+             "Gojek", "Traveloka", "Shopee", "Grab"]
+LOCATIONS = ["Jakarta", "Bandung", "Surabaya", "Singapore", "Berlin", "London", "Remote", "New York"]
+DEFAULT_QUERIES = [
+    "Python AND Kubernetes, 5+ years",
+    "Go OR Rust",
+    "React, TypeScript, NOT Angular",
+    "machine learning, 3+ years",
+    "C++",
+]
+
+
+def synthetic_cv(rng: random.Random, index: int) -> CVModel:
+    year = 2024
+    experience = []
+    for _ in range(rng.randint(1, 4)):
+        length = rng.randint(1, 5)
+        skills = rng.sample(SKILLS, 3)
+        experience.append(Experience(
+            position=rng.choice(TITLES), company=rng.choice(COMPANIES), location=rng.choice(LOCATIONS),
+            start_date=f"{rng.choice(['Jan', 'Mar', 'Jun', 'Sep'])} {year - length}", end_date=str(year),
+            responsibilities=f"Built services with {', '.join(skills)} and mentored the team.",
+        ))
+        year -= length + rng.randint(0, 1)
+    return CVModel(
+        name=f"Candidate {index}",
+        title=rng.choice(TITLES),
+        contact=Contact(email=f"candidate{index}@example.com", location=rng.choice(LOCATIONS)),
+        experience=experience,
+        projects=[Project(title="Side project", description="Internal tooling", technologies_used=rng.sample(SKILLS, 2))],
+        skills=rng.sample(SKILLS, rng.randint(3, 8)),
+    )
+
+
+def fill(store: CVStore, count: int, seed: int):
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    for index in range(count):
+        store.save(f"synthetic-{index}", ModelType.OLLAMA, f"cv{index}.pdf", synthetic_cv(rng, index))
+        if (index + 1) % 10000 == 0:
+            print(f"  stored {index + 1} CVs ({time.perf_counter() - started:.1f}s)")
+    print(f"Stored {count} CVs in {time.perf_counter() - started:.1f}s")
+
+
+def benchmark(store: CVStore, queries: List[str], repeat: int):
+    print(f"\n{'query':<40} {'matches':>8} {'median ms':>10} {'max ms':>8}")
+    for query in queries:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            total, _, _ = store.search(query, limit=20)
+            timings.append(1000 * (time.perf_counter() - started))
+        print(f"{query:<40} {total:>8} {statistics.median(timings):>10.2f} {max(timings):>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure CV store search latency over synthetic CVs")
+    parser.add_argument("--cvs", type=int, default=100000, help="Number of synthetic CVs to store")
+    parser.add_argument("--query", action="append", help="Query to time (repeatable; default: a built-in set)")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = CVStore(os.path.join(directory, "cvs.sqlite3"))
+        fill(store, args.cvs, args.seed)
+        benchmark(store, args.query or DEFAULT_QUERIES, args.repeat)
+        store.close()
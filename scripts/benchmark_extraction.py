@@ -0,0 +1,117 @@
+"""
+Benchmark for PDF extraction.
+
+Converts every PDF in a folder plus a synthetic multi-page PDF (the folder's pages repeated) with
+pymupdf4llm, whole-document on one worker and split into page ranges across a process pool, with
+and without table detection and image/vector-graphics analysis, and with the tiered extraction
+that tries plain text first. Reports the median time per document, whether the markdown matches
+the serial, full-analysis output, the tier each document got and the throughput on the folder.
+
+Usage:
+    python -m scripts.benchmark_extraction --folder sample_CV
+    python -m scripts.benchmark_extraction --workers 4 --pages 50 --repeats 5
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import pymupdf
+
+from app.services.pdf_parser import TIER_MARKDOWN, TIER_TEXT, PDFParser
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+# (label, mode, detect tables, detect images); tiered uses the fast path with the default threshold
+CONFIGURATIONS = [
+    ("serial", "serial", True, True),
+    ("page-parallel", "parallel", True, True),
+    ("parallel, no tables", "parallel", False, True),
+    ("parallel, no images", "parallel", True, False),
+    ("parallel, text only", "parallel", False, False),
+    ("tiered", "tiered", True, True),
+]
+
+
+def synthetic_pdf(pdf_files: List[Path], pages: int) -> bytes:
+    document = pymupdf.open()
+    while document.page_count < pages:
+        for pdf_path in pdf_files:
+            if document.page_count < pages:
+                with pymupdf.open(pdf_path) as source:
+                    document.insert_pdf(source, to_page=pages - document.page_count - 1)
+    content = document.tobytes()
+    document.close()
+    return content
+
+
+def convert(pool: ProcessPoolExecutor, content: bytes, mode: str, workers: int) -> Tuple[str, str]:
+    """(text, tier) of one document."""
+    if mode == "tiered":
+        text, extraction = pool.submit(PDFParser.extract, content).result()
+        return text, extraction["tier"]
+    if mode == "serial":
+        return pool.submit(PDFParser.convert_pdf, content).result(), TIER_MARKDOWN
+    ranges = PDFParser.page_ranges(PDFParser.page_count(content), workers)
+    return "".join(pool.map(PDFParser.convert_pdf, [content] * len(ranges), ranges)), TIER_MARKDOWN
+
+
+def run_configuration(documents: Dict[str, bytes], mode: str, tables: bool, images: bool,
+                      workers: int, repeats: int) -> Dict[str, Tuple[float, str, str]]:
+    # Spawned workers read the analysis switches from the environment when they import the settings
+    os.environ["pdf_detect_tables"] = str(tables).lower()
+    os.environ["pdf_detect_images"] = str(images).lower()
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        list(pool.map(PDFParser.page_count, [next(iter(documents.values()))] * workers))  # warm up the workers
+        for name, content in documents.items():
+            timings, text, tier = [], "", TIER_MARKDOWN
+            for _ in range(repeats):
+                started = time.perf_counter()
+                text, tier = convert(pool, content, mode, workers)
+                timings.append(1000 * (time.perf_counter() - started))
+            results[name] = (statistics.median(timings), text, tier)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure serial, page-parallel and tiered PDF extraction")
+    parser.add_argument("--folder", default="sample_CV")
+    parser.add_argument("--pages", type=int, default=50, help="Page count of the synthetic PDF")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    pdf_files = sorted(Path(args.folder).glob("*.pdf"))
+    if not pdf_files:
+        sys.exit(f"No PDF files found in {args.folder}")
+    documents = {pdf_path.name: pdf_path.read_bytes() for pdf_path in pdf_files}
+    documents[f"synthetic ({args.pages} pages)"] = synthetic_pdf(pdf_files, args.pages)
+    pages = {name: PDFParser.page_count(content) for name, content in documents.items()}
+
+    runs = {label: run_configuration(documents, mode, tables, images, args.workers, args.repeats)
+            for label, mode, tables, images in CONFIGURATIONS}
+    baseline = runs[CONFIGURATIONS[0][0]]
+
+    print(f"{args.workers} workers, median of {args.repeats} runs (ms); * = markdown differs from serial, "
+          f"t = plain-text tier\n")
+    print(f"{'document':<50} {'pages':>5}" + "".join(f" {label:>20}" for label in runs))
+    for name in documents:
+        cells = []
+        for label, results in runs.items():
+            elapsed, text, tier = results[name]
+            marker = "t" if tier == TIER_TEXT else "" if text == baseline[name][1] else "*"
+            cells.append(f"{elapsed:.0f}{marker}".rjust(20))
+        print(f"{name:<50} {pages[name]:>5} " + " ".join(cells))
+
+    folder = [pdf_path.name for pdf_path in pdf_files]
+    print(f"\nThroughput on {args.folder} (documents per second, one at a time):")
+    for label, results in runs.items():
+        print(f"  {label:<22} {1000 * len(folder) / sum(results[name][0] for name in folder):7.1f}")
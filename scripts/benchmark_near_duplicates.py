@@ -0,0 +1,116 @@
+"""
+Benchmark for the near-duplicate index.
+
+Fills a throwaway index with random MinHash signatures (stand-ins for unrelated CVs) plus the
+signatures of synthetic CV texts, then looks up lightly edited copies of those CVs and fresh
+unrelated texts. Reports lookup latency at the full index size, the share of edited copies found
+(recall) and the share of unrelated texts wrongly flagged.
+
+Usage:
+    python -m scripts.benchmark_near_duplicates --documents 1000000
+    python -m scripts.benchmark_near_duplicates --documents 100000 --threshold 0.9 --edit-rate 0.05
+"""
+import argparse
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+from array import array
+from typing import List
+
+from app.services.near_duplicates import MinHasher, NearDuplicateIndex
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+VOCABULARY = ("python java kubernetes docker aws terraform react angular postgres kafka spark backend frontend "
+              "engineer developer senior lead team built designed migrated services platform api latency "
+              "customers revenue reduced improved automated pipeline data analytics mentoring hiring agile "
+              "jakarta bandung singapore university bachelor computer science 2015 2018 2020 2023 present").split()
+BATCH_SIZE = 10000
+
+
+def synthetic_text(rng: random.Random, words: int = 400) -> str:
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+
+def edit(rng: random.Random, text: str, rate: float) -> str:
+    """Replace, drop or insert about `rate` of the words, like a candidate touching up a CV."""
+    words = []
+    for word in text.split():
+        roll = rng.random()
+        if roll < rate / 3:
+            continue
+        words.append(rng.choice(VOCABULARY) if roll < 2 * rate / 3 else word)
+        if roll > 1 - rate / 3:
+            words.append(rng.choice(VOCABULARY))
+    return " ".join(words)
+
+
+def fill(index: NearDuplicateIndex, documents: int, planted: List[array]):
+    started = time.perf_counter()
+    next_id = 1
+    for start in range(0, documents - len(planted), BATCH_SIZE):
+        size = min(BATCH_SIZE, documents - len(planted) - start)
+        index.add_many([(next_id + i, array("I", os.urandom(4 * index.num_perm))) for i in range(size)])
+        next_id += size
+        if next_id // BATCH_SIZE % 10 == 0:
+            print(f"  indexed {next_id - 1} documents ({time.perf_counter() - started:.0f}s)")
+    index.add_many([(next_id + i, signature) for i, signature in enumerate(planted)])
+    print(f"Indexed {index.count()} documents in {time.perf_counter() - started:.0f}s")
+    return next_id
+
+
+def timed_lookups(index: NearDuplicateIndex, signatures: List[array]):
+    timings, results = [], []
+    for signature in signatures:
+        started = time.perf_counter()
+        results.append(index.lookup(signature))
+        timings.append(1000 * (time.perf_counter() - started))
+    return timings, results
+
+
+def summarize(label: str, timings: List[float]):
+    timings = sorted(timings)
+    print(f"{label:<22} median {statistics.median(timings):6.2f} ms   "
+          f"p99 {timings[int(0.99 * (len(timings) - 1))]:6.2f} ms   max {timings[-1]:6.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure near-duplicate lookup latency and accuracy")
+    parser.add_argument("--documents", type=int, default=1000000, help="Index size")
+    parser.add_argument("--queries", type=int, default=500, help="Edited copies and unrelated texts looked up")
+    parser.add_argument("--num-perm", type=int, default=128)
+    parser.add_argument("--threshold", type=float, default=0.85)
+    parser.add_argument("--edit-rate", type=float, default=0.02, help="Share of words changed in the copies")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    originals = [synthetic_text(rng) for _ in range(args.queries)]
+    copies = [edit(rng, text, args.edit_rate) for text in originals]
+    unrelated = [synthetic_text(rng) for _ in range(args.queries)]
+    started = time.perf_counter()
+    planted = [MinHasher.signature(text, args.num_perm) for text in originals]
+    print(f"Computed {len(planted)} signatures in {1000 * (time.perf_counter() - started) / len(planted):.1f} ms each")
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = NearDuplicateIndex(os.path.join(directory, "near_duplicates.sqlite3"), num_perm=args.num_perm,
+                                   threshold=args.threshold, max_documents=args.documents)
+        print(f"LSH shape: {index.bands} bands x {index.rows} rows")
+        first_planted_id = fill(index, args.documents, planted)
+
+        copy_timings, copy_results = timed_lookups(index, [MinHasher.signature(t, args.num_perm) for t in copies])
+        other_timings, other_results = timed_lookups(index, [MinHasher.signature(t, args.num_perm) for t in unrelated])
+        print()
+        summarize("edited copy lookup", copy_timings)
+        summarize("unrelated lookup", other_timings)
+        found = sum(any(cv_id == first_planted_id + i for cv_id, _ in result) for i, result in enumerate(copy_results))
+        flagged = sum(1 for result in other_results if result)
+        similarities = [MinHasher.similarity(planted[i], MinHasher.signature(text, args.num_perm))
+                        for i, text in enumerate(copies[:50])]
+        print(f"recall {found / len(copies):.3f} (mean estimated similarity of copies "
+              f"{statistics.mean(similarities):.3f}), false positives {flagged / len(unrelated):.3f}")
+        index.close()
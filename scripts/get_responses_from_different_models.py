@@ -1,11 +1,37 @@
+"""
+Batch runner comparing CV parsing across models.
+
+PDF extraction runs in a process pool and, as soon as a file's markdown is ready, one parse task per
+model is queued on that model's provider lane (a thread pool sized per provider, e.g. ollama=2,
+openai=8). Every finished (file, model) pair is appended to a JSONL manifest, so an interrupted run
+resumes where it stopped, and a PDF is moved to the processed folder once every model has parsed
+it. A throughput/latency report per model and per file is printed and written to the output folder.
+The parse cache is bypassed so the latencies are those of the models; pass --use-cache to reuse
+earlier parses.
+
+Usage:
+    python -m scripts.get_responses_from_different_models --models mistral qwen:1.8b qwen:14b --lane ollama=2
+"""
+import argparse
+import json
 import logging
+import multiprocessing
 import os
 import shutil
+import statistics
+import threading
+import time
 import traceback
+from collections import defaultdict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import Dict, List, Set, Tuple
 
+from app.config import settings
 from app.services.cv_processor import CVProcessor
+from app.services.markdown_compactor import MarkdownCompactor
 from app.services.pdf_parser import PDFParser
+from app.services.service_registry import service_registry
 from app.utils.models import ModelType
 
 # Configure logging
@@ -17,57 +43,226 @@ INPUT_FOLDER = "./cv_uploads"  # Folder containing PDFs
 OUTPUT_FOLDER = "./cv_processed_new"  # Folder to store text and JSON
 PROCESSED_FOLDER = "./cv_processed_pdfs_new"  # Folder to store processed PDFs
 
-# Ensure output and processed directories exist
-os.makedirs(OUTPUT_FOLDER, exist_ok=True)
-os.makedirs(PROCESSED_FOLDER, exist_ok=True)
-
-models = [ ModelType.MISTRAL, ModelType.QWEN_1_8B,
+models = [ModelType.MISTRAL, ModelType.QWEN_1_8B,
           ModelType.QWEN_14B]
 
+DEFAULT_LANE_SIZE = 2
+
+
+class Manifest:
+    """Append-only JSONL record of finished (file, model) pairs."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def completed(self) -> Set[Tuple[str, str]]:
+        done = set()
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # partially written line from an interrupted run
+                    if entry.get("status") == "ok":
+                        done.add((entry["file"], entry["model"]))
+        return done
+
+    def record(self, entry: dict):
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+
+
+def extract(pdf_path: str) -> Tuple[str, float]:
+    started = time.perf_counter()
+    text = PDFParser.extract_text_from_pdf(pdf_path)
+    if settings.markdown_compaction_enabled:
+        text, _ = MarkdownCompactor.compact(text, settings.markdown_compaction_steps)
+    return text, time.perf_counter() - started
+
+
+def parse(pdf_file: Path, text: str, model: ModelType, output_folder: Path, use_cache: bool = False) -> dict:
+    started = time.perf_counter()
+    entry = {"file": pdf_file.name, "model": model.value}
+    try:
+        # Parse CV to structured JSON
+        cv_data = CVProcessor.parse_cv(text=text, model_type=model, use_cache=use_cache)
+        json_path = output_folder / f"{pdf_file.stem}{model.value}.json"
+        with open(json_path, "w", encoding="utf-8") as json_file:
+            json_file.write(cv_data.model_dump_json(indent=4))
+        logger.info(f"Parsed JSON saved: {json_path}")
+        entry["status"] = "ok"
+    except Exception as e:
+        logger.error(f"{model.value} failed on {pdf_file.name}: {e}")
+        entry["status"] = "error"
+        entry["error"] = str(e)
+    entry["parse_seconds"] = round(time.perf_counter() - started, 3)
+    entry["finished_at"] = time.time()
+    return entry
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[int(fraction * (len(ordered) - 1))] if ordered else 0.0
+
+
+def build_report(entries: List[dict], extraction_times: Dict[str, float], wall_time: float) -> dict:
+    per_model = defaultdict(list)
+    per_file = defaultdict(dict)
+    for entry in entries:
+        per_model[entry["model"]].append(entry)
+        per_file[entry["file"]][entry["model"]] = entry["parse_seconds"]
 
-def process_cv_files():
-    pdf_files = list(Path(INPUT_FOLDER).glob("*.pdf"))
+    model_report = {}
+    for model, model_entries in per_model.items():
+        latencies = [e["parse_seconds"] for e in model_entries if e["status"] == "ok"]
+        model_report[model] = {
+            "ok": len(latencies),
+            "errors": len(model_entries) - len(latencies),
+            "mean_seconds": statistics.mean(latencies) if latencies else 0.0,
+            "p50_seconds": percentile(latencies, 0.5),
+            "p95_seconds": percentile(latencies, 0.95),
+            "cvs_per_minute": 60 * len(latencies) / wall_time if wall_time else 0.0,
+        }
 
-    if not pdf_files:
-        logger.info("No PDF files found in input folder.")
+    file_report = {
+        name: {"extract_seconds": round(extraction_times.get(name, 0.0), 3), "parse_seconds": timings}
+        for name, timings in per_file.items()
+    }
+    return {"wall_seconds": wall_time, "models": model_report, "files": file_report}
+
+
+def print_report(report: dict):
+    print(f"\nWall time: {report['wall_seconds']:.1f}s")
+    print(f"{'model':<20} {'ok':>5} {'err':>5} {'mean (s)':>9} {'p50 (s)':>8} {'p95 (s)':>8} {'CV/min':>7}")
+    for model, r in report["models"].items():
+        print(f"{model:<20} {r['ok']:>5} {r['errors']:>5} {r['mean_seconds']:>9.2f} "
+              f"{r['p50_seconds']:>8.2f} {r['p95_seconds']:>8.2f} {r['cvs_per_minute']:>7.2f}")
+
+
+def process_cv_files(input_folder: str = INPUT_FOLDER, output_folder: str = OUTPUT_FOLDER,
+                     processed_folder: str = PROCESSED_FOLDER, model_types: List[ModelType] = None,
+                     extract_workers: int = 2, lanes: Dict[str, int] = None, manifest_path: str = None,
+                     move_processed: bool = True, use_cache: bool = False):
+    model_types = model_types or models
+    lanes = lanes or {}
+    output_path = Path(output_folder)
+    # Ensure output and processed directories exist
+    os.makedirs(output_path, exist_ok=True)
+    if move_processed:
+        os.makedirs(processed_folder, exist_ok=True)
+
+    manifest = Manifest(Path(manifest_path) if manifest_path else output_path / "manifest.jsonl")
+    completed = manifest.completed()
+
+    pdf_files = list(Path(input_folder).glob("*.pdf"))
+    pending = {pdf: [m for m in model_types if (pdf.name, m.value) not in completed] for pdf in pdf_files}
+    pending = {pdf: pending_models for pdf, pending_models in pending.items() if pending_models}
+    if not pending:
+        logger.info("No pending PDF files found in input folder.")
         return
 
-    for pdf_file in pdf_files:
-        try:
-            logger.info(f"Processing {pdf_file.name}")
+    skipped = sum(len(model_types) for _ in pdf_files) - sum(len(m) for m in pending.values())
+    logger.info(f"{len(pending)} file(s) to process, {skipped} (file, model) pair(s) already in the manifest")
 
-            # Extract text from PDF
-            text = PDFParser.extract_text_from_pdf(str(pdf_file))
-            text_filename = pdf_file.stem + ".txt"
-            text_path = Path(OUTPUT_FOLDER) / text_filename
+    # One lane (thread pool) per provider so a slow local Ollama host doesn't hold back API models
+    provider_of = {m: service_registry.provider(m) for m in model_types}
+    lane_pools = {
+        provider: ThreadPoolExecutor(max_workers=lanes.get(provider, DEFAULT_LANE_SIZE),
+                                     thread_name_prefix=f"lane-{provider}")
+        for provider in set(provider_of.values())
+    }
 
-            with open(text_path, "w", encoding="utf-8") as text_file:
-                text_file.write(text)
-            logger.info(f"Extracted text saved: {text_path}")
+    entries: List[dict] = []
+    extraction_times: Dict[str, float] = {}
+    remaining = {pdf.name: len(models_left) for pdf, models_left in pending.items()}
+    failed: Set[str] = set()
+    remaining_lock = threading.Lock()
+    started = time.perf_counter()
+
+    def on_parsed(pdf_file: Path, future: Future):
+        entry = future.result()
+        entry["extract_seconds"] = round(extraction_times.get(pdf_file.name, 0.0), 3)
+        manifest.record(entry)
+        entries.append(entry)
+        with remaining_lock:
+            remaining[pdf_file.name] -= 1
+            if entry["status"] != "ok":
+                failed.add(pdf_file.name)
+            # Files with a failed model stay in the input folder so the next run retries them
+            finished = remaining[pdf_file.name] == 0 and pdf_file.name not in failed
+        if finished and move_processed:
+            # Move the processed PDF to the processed folder
+            processed_pdf_path = Path(processed_folder) / pdf_file.name
+            shutil.move(str(pdf_file), str(processed_pdf_path))
+            logger.info(f"Moved processed PDF to: {processed_pdf_path}")
 
-            for model in models:
+    try:
+        with ProcessPoolExecutor(max_workers=extract_workers,
+                                 mp_context=multiprocessing.get_context("spawn")) as extract_pool:
+            extract_futures = {extract_pool.submit(extract, str(pdf)): pdf for pdf in pending}
+            for future in as_completed(extract_futures):
+                pdf_file = extract_futures[future]
                 try:
-                    # Parse CV to structured JSON
-                    cv_data = CVProcessor.parse_cv(text=text, model_type=model)
-                    json_filename = pdf_file.stem + f"{model}.json"
-                    json_path = Path(OUTPUT_FOLDER) / json_filename
-
-                    with open(json_path, "w", encoding="utf-8") as json_file:
-                        json_file.write(cv_data.model_dump_json(indent=4))
-                    logger.info(f"Parsed JSON saved: {json_path}")
+                    text, extract_seconds = future.result()
                 except Exception as e:
-                    print(e)
+                    logger.error(f"Error extracting {pdf_file.name}: {e}")
+                    logger.error(traceback.format_exc())
                     continue
+                extraction_times[pdf_file.name] = extract_seconds
+                text_path = output_path / (pdf_file.stem + ".txt")
+                with open(text_path, "w", encoding="utf-8") as text_file:
+                    text_file.write(text)
+                logger.info(f"Extracted text saved: {text_path} ({extract_seconds:.2f}s)")
 
-            # Move the processed PDF to the processed folder
-            processed_pdf_path = Path(PROCESSED_FOLDER) / pdf_file.name
-            shutil.move(str(pdf_file), str(processed_pdf_path))
-            logger.info(f"Moved processed PDF to: {processed_pdf_path}")
+                for model in pending[pdf_file]:
+                    parse_future = lane_pools[provider_of[model]].submit(parse, pdf_file, text, model, output_path,
+                                                                         use_cache)
+                    parse_future.add_done_callback(lambda f, pdf=pdf_file: on_parsed(pdf, f))
+    finally:
+        # Waits for queued parses; their done-callbacks run on the lane threads before shutdown returns
+        for pool in lane_pools.values():
+            pool.shutdown(wait=True)
+
+    report = build_report(entries, extraction_times, time.perf_counter() - started)
+    with open(output_path / "report.json", "w", encoding="utf-8") as report_file:
+        json.dump(report, report_file, indent=2)
+    print_report(report)
 
-        except Exception as e:
-            logger.error(f"Error processing {pdf_file.name}: {e}")
-            logger.error(traceback.format_exc())
+
+def parse_lanes(values: List[str]) -> Dict[str, int]:
+    lanes = {}
+    for value in values or []:
+        provider, _, size = value.partition("=")
+        lanes[provider] = int(size)
+    return lanes
 
 
 if __name__ == "__main__":
-    process_cv_files()
+    parser = argparse.ArgumentParser(description="Parse a folder of CVs with several models in parallel")
+    parser.add_argument("--input", default=INPUT_FOLDER)
+    parser.add_argument("--output", default=OUTPUT_FOLDER)
+    parser.add_argument("--processed", default=PROCESSED_FOLDER, help="Where finished PDFs are moved")
+    parser.add_argument("--no-move", action="store_true", help="Leave finished PDFs in the input folder")
+    parser.add_argument("--models", nargs="+", type=ModelType, default=models)
+    parser.add_argument("--extract-workers", type=int, default=2, help="Processes used for PDF extraction")
+    parser.add_argument("--lane", action="append", metavar="PROVIDER=N",
+                        help=f"Concurrent requests per provider (default {DEFAULT_LANE_SIZE}), e.g. ollama=2 openai=8")
+    parser.add_argument("--manifest", help="Progress manifest (default: <output>/manifest.jsonl)")
+    parser.add_argument("--use-cache", action="store_true",
+                        help="Reuse cached parses (the latencies then no longer measure the models)")
+    args = parser.parse_args()
+
+    process_cv_files(
+        input_folder=args.input,
+        output_folder=args.output,
+        processed_folder=args.processed,
+        model_types=args.models,
+        extract_workers=args.extract_workers,
+        lanes=parse_lanes(args.lane),
+        manifest_path=args.manifest,
+        move_processed=not args.no_move,
+        use_cache=args.use_cache,
+    )
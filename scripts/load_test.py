@@ -0,0 +1,93 @@
+"""
+Load test for the CV parser API.
+
+Fires the same request at increasing concurrency levels against a running server and reports
+throughput and latency per level. With blocking work off the event loop, throughput should grow
+with concurrency until the configured pool limits are reached instead of staying flat.
+
+Usage:
+    uvicorn app.main:app --port 8000
+    python -m scripts.load_test --file sample_CV/software-engineer-resume-example.pdf --model ollama
+"""
+import argparse
+import logging
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def send_parse_request(url: str, pdf_bytes: bytes, filename: str, model: str) -> float:
+    started = time.perf_counter()
+    response = requests.post(
+        f"{url}/parse-cv/",
+        files={"file": (filename, pdf_bytes, "application/pdf")},
+        params={"model_type": model},
+        timeout=600,
+    )
+    elapsed = time.perf_counter() - started
+    if response.status_code != 200:
+        raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+    return elapsed
+
+
+def run_level(url: str, pdf_bytes: bytes, filename: str, model: str, concurrency: int, total: int) -> dict:
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(send_parse_request, url, pdf_bytes, filename, model) for _ in range(total)]
+        for future in futures:
+            try:
+                latencies.append(future.result())
+            except Exception as e:
+                errors += 1
+                logger.warning(f"Request failed: {e}")
+    wall_time = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "wall_time": wall_time,
+        "throughput": len(latencies) / wall_time if wall_time else 0.0,
+        "p50": statistics.median(latencies) if latencies else 0.0,
+        "p95": latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure /parse-cv/ throughput at increasing concurrency")
+    parser.add_argument("--url", default="http://127.0.0.1:8000/api/v1")
+    parser.add_argument("--file", required=True, help="PDF to upload")
+    parser.add_argument("--model", default="ollama", help="model_type query parameter")
+    parser.add_argument("--levels", default="1,2,4,8,16", help="comma separated concurrency levels")
+    parser.add_argument("--requests-per-worker", type=int, default=4)
+    args = parser.parse_args()
+
+    with open(args.file, "rb") as f:
+        pdf_bytes = f.read()
+    filename = args.file.rsplit("/", 1)[-1]
+
+    results = []
+    for level in [int(level) for level in args.levels.split(",")]:
+        logger.info(f"Running concurrency level {level}")
+        results.append(run_level(args.url, pdf_bytes, filename, args.model, level,
+                                 level * args.requests_per_worker))
+
+    print(f"{'concurrency':>11} {'requests':>8} {'errors':>6} {'wall (s)':>9} {'req/s':>7} {'p50 (s)':>8} {'p95 (s)':>8}")
+    for r in results:
+        print(f"{r['concurrency']:>11} {r['requests']:>8} {r['errors']:>6} {r['wall_time']:>9.2f} "
+              f"{r['throughput']:>7.2f} {r['p50']:>8.2f} {r['p95']:>8.2f}")
+    if len(results) > 1 and results[0]["throughput"]:
+        print(f"Throughput scaling {results[0]['concurrency']} -> {results[-1]['concurrency']}: "
+              f"{results[-1]['throughput'] / results[0]['throughput']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import io
+import json
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import cv_parser
+from app.config import settings
+from app.main import app
+from app.models.cv_model import Contact, CVModel
+
+PDF = b"%PDF-1.4 test"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def parse_document(content, filename, model_type, **kwargs):
+        if b"broken" in content:
+            raise ValueError("unreadable PDF")
+        return CVModel(name=filename, contact=Contact())
+
+    monkeypatch.setattr(cv_parser, "parse_document", parse_document)
+    return TestClient(app)  # no lifespan: the pools and job workers aren't needed
+
+
+def _zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def _post(client, files):
+    return client.post("/api/v1/parse-cv/batch?model_type=chatgpt", files=[("files", file) for file in files])
+
+
+def test_errors_are_reported_inline(client):
+    response = _post(client, [
+        ("a.pdf", PDF, "application/pdf"),
+        ("b.pdf", PDF + b" broken", "application/pdf"),
+        ("notes.txt", b"hello", "text/plain"),
+        ("cvs.zip", _zip({"c.pdf": PDF, "readme.md": b"skip"}), "application/zip"),
+    ])
+    assert response.status_code == 200
+    lines = {line["filename"]: line for line in map(json.loads, response.text.splitlines())}
+
+    assert lines["a.pdf"]["status"] == "ok" and lines["a.pdf"]["result"]["name"] == "a.pdf"
+    assert lines["cvs.zip/c.pdf"]["status"] == "ok"
+    assert lines["b.pdf"]["status"] == "error" and lines["b.pdf"]["error"] == "unreadable PDF"
+    assert lines["notes.txt"]["error"] == "File must be a PDF or ZIP"
+    assert len(lines) == 4
+
+
+def test_too_many_files_is_rejected_before_unzipping(client, monkeypatch):
+    monkeypatch.setattr(settings, "batch_max_files", 2)
+    reads = []
+    monkeypatch.setattr(zipfile.ZipFile, "read", lambda self, member: reads.append(member))
+
+    response = _post(client, [("cvs.zip", _zip({f"{n}.pdf": PDF for n in range(3)}), "application/zip")])
+    assert response.status_code == 413 and "2 files" in response.json()["detail"]
+    assert reads == []
+
+    response = _post(client, [("a.pdf", PDF, "application/pdf"), ("b.pdf", PDF, "application/pdf"),
+                              ("c.pdf", PDF, "application/pdf")])
+    assert response.status_code == 413
+
+
+def test_uncompressed_size_is_checked_against_the_batch_limit(client, monkeypatch):
+    monkeypatch.setattr(settings, "batch_upload_max_bytes", 64 * 1024)
+    # Compresses to a few hundred bytes but expands past the batch limit
+    archive = _zip({"a.pdf": b"0" * 40 * 1024, "b.pdf": b"0" * 40 * 1024})
+    assert len(archive) < 1024
+
+    response = _post(client, [("cvs.zip", archive, "application/zip")])
+    assert response.status_code == 413 and "uncompressed bytes" in response.json()["detail"]
@@ -0,0 +1,80 @@
+import asyncio
+import threading
+
+from app.services import pipeline
+from app.utils import cache as cache_module
+from app.utils.cache import TieredCache
+
+
+def _cache(tmp_path, **kwargs):
+    options = {"memory_items": 2, "max_bytes": 1024, "ttl_seconds": None}
+    options.update(kwargs)
+    return TieredCache("test", str(tmp_path), **options)
+
+
+def test_memory_tier_is_lru_and_backed_by_disk(tmp_path):
+    cache = _cache(tmp_path)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+    cache.set("c", "3")  # evicts "b", the least recently used, from memory
+
+    assert cache.get("b") == "2"
+    stats = cache.stats()
+    assert stats["hits_memory"] == 1 and stats["hits_disk"] == 1 and stats["memory_entries"] == 2
+
+
+def test_expired_entries_are_misses_in_both_tiers(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: clock[0])
+    cache = _cache(tmp_path, ttl_seconds=60)
+    cache.set("a", "1")
+    clock[0] += 30
+    assert cache.get("a") == "1"
+
+    clock[0] += 31
+    assert cache.get("a") is None
+    assert cache.stats()["disk_entries"] == 0
+
+
+def test_disk_tier_evicts_least_recently_used_over_max_bytes(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: clock[0])
+    cache = _cache(tmp_path, memory_items=1, max_bytes=25)
+    for key in ("a", "b"):
+        cache.set(key, key * 10)
+        clock[0] += 1
+    assert cache.get("a") == "a" * 10  # from disk, now more recently used than "b"
+    clock[0] += 1
+
+    cache.set("c", "c" * 10)
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["disk_bytes"] == 20
+    assert cache.get("b") is None
+    assert cache.get("a") == "a" * 10 and cache.get("c") == "c" * 10
+
+
+def test_values_larger_than_the_disk_tier_stay_in_memory_only(tmp_path):
+    cache = _cache(tmp_path, max_bytes=4)
+    cache.set("a", "too large")
+    assert cache.get("a") == "too large"
+    assert cache.stats()["disk_entries"] == 0
+
+
+def test_extraction_cache_runs_off_the_event_loop(monkeypatch):
+    threads = []
+
+    def get_cached(content):
+        threads.append(threading.current_thread())
+        return "# Jane Doe", {"tier": "text", "quality": 0.9}
+
+    async def extract_uncached(content, filename):
+        raise AssertionError("a cache hit must not extract")
+
+    monkeypatch.setattr(pipeline.PDFParser, "get_cached", get_cached)
+    monkeypatch.setattr(pipeline, "_extract_uncached", extract_uncached)
+    report = {}
+    text = asyncio.run(pipeline.extract_document(b"%PDF", "cv.pdf", report=report))
+
+    assert text.strip() == "# Jane Doe" and report["extraction"]["tier"] == "text"
+    assert threads and threads[0] is not threading.main_thread()
@@ -0,0 +1,26 @@
+from app.services.contact_extractor import HEADER_CHARS, ContactExtractor
+
+HEADER = ("# Jane Doe\njane.doe@example.com | +1 (555) 123-4567 | [LinkedIn](https://linkedin.com/in/janedoe)\n"
+          "https://janedoe.dev\n")
+BODY = ("## Experience\nEngineer at [Acme](https://acme.example.com), 2019 - 2023\n"
+        "Maintainer of https://github.com/acme/payments and https://github.com/janedoe\n"
+        "Blog posts on https://medium.com/@janedoe\n")
+
+
+def test_header_and_profile_links_are_contact_links():
+    contact = ContactExtractor.extract(HEADER + "\n" * HEADER_CHARS + BODY)
+
+    assert contact.email == "jane.doe@example.com"
+    assert contact.phone == "+1 (555) 123-4567"
+    assert contact.linkedin == "https://linkedin.com/in/janedoe"
+    assert contact.github == "https://github.com/janedoe"
+    assert contact.other_links == ["https://janedoe.dev", "https://medium.com/@janedoe"]
+
+
+def test_body_links_are_left_to_the_model():
+    body = BODY.replace("https://medium.com/@janedoe", "")
+    contact = ContactExtractor.extract("# Jane Doe\n" + "\n" * HEADER_CHARS + body)
+
+    assert contact.github == "https://github.com/janedoe"
+    assert contact.other_links == []
+    assert ContactExtractor.known_fields(contact) == ["github"]
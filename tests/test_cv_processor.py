@@ -0,0 +1,78 @@
+import pytest
+
+from app.config import settings
+from app.services.contact_extractor import ContactExtractor
+from app.services.cv_processor_services import base_service
+from app.services.cv_processor_services.base_service import BaseService
+from app.services.scoring import ScoringEngine
+from app.utils.cache import TieredCache
+
+CV = "# Jane Doe\nBackend Engineer\n## Skills\nPython"
+
+
+class CountingService(BaseService):
+    provider = "test"
+    model = "counting-model"
+
+    def __init__(self):
+        self.calls = 0
+
+    def _call_api(self, text, is_analysis=False, **kwargs):
+        self.calls += 1
+        return {"name": "Jane Doe", "title": "Backend Engineer", "contact": {}, "skills": ["Python"]}
+
+
+@pytest.fixture
+def service(monkeypatch, tmp_path):
+    monkeypatch.setattr(base_service, "parse_cache", TieredCache("parse", str(tmp_path), 8, 1024 * 1024))
+    monkeypatch.setattr(base_service, "analysis_cache", TieredCache("analysis", str(tmp_path), 8, 1024 * 1024))
+    monkeypatch.setattr(settings, "parse_cache_enabled", True)
+    monkeypatch.setattr(settings, "analysis_cache_enabled", True)
+    monkeypatch.setattr(settings, "deterministic_scoring", True)
+    monkeypatch.setattr(settings, "contact_pre_extraction", False)
+    return CountingService()
+
+
+def test_parses_are_cached_per_text(service):
+    first = service.parse_cv(CV)
+    assert service.parse_cv(CV) == first and service.calls == 1
+
+    service.parse_cv(CV + "\nGo")
+    assert service.calls == 2
+    service.parse_cv(CV, use_cache=False)
+    assert service.calls == 3
+
+
+def test_prompt_version_bump_invalidates_cached_parses(service, monkeypatch):
+    service.parse_cv(CV)
+    monkeypatch.setattr(base_service, "PARSE_PROMPT_VERSION", "bumped")
+
+    service.parse_cv(CV)
+    assert service.calls == 2
+
+
+def test_contact_extractor_version_bump_invalidates_cached_parses(service, monkeypatch):
+    service.parse_cv(CV)
+    monkeypatch.setattr(ContactExtractor, "VERSION", "bumped")
+
+    service.parse_cv(CV)
+    assert service.calls == 2
+
+
+def test_analyses_are_cached_until_the_prompt_or_scoring_version_changes(service, monkeypatch):
+    cv_data = {"name": "Jane Doe", "skills": ["Python"], "experience": []}
+
+    def analyze(requirements="Python,  3+ years"):
+        return service.analyze_cv(cv_data, "Backend Engineer", "Acme", requirements)
+
+    analyze()
+    analyze("Python, 3+ years")  # same job after whitespace normalization
+    assert service.calls == 1
+
+    monkeypatch.setattr(base_service, "ANALYSIS_PROMPT_VERSION", "bumped")
+    analyze()
+    assert service.calls == 2
+
+    monkeypatch.setattr(ScoringEngine, "VERSION", "bumped")
+    analyze()
+    assert service.calls == 3
@@ -0,0 +1,26 @@
+import time
+
+from app.models.cv_model import Contact, CVModel, Experience
+from app.services.cv_store import YEAR_SECONDS, CVStore
+from app.utils.models import ModelType
+
+
+def _cv(name, end_date):
+    return CVModel(name=name, contact=Contact(), skills=["Python"],
+                   experience=[Experience(position="Engineer", start_date=f"{time.gmtime().tm_year - 4}-01",
+                                          end_date=end_date)])
+
+
+def test_years_of_ongoing_roles_are_computed_at_query_time(tmp_path):
+    store = CVStore(str(tmp_path / "cvs.sqlite3"))
+    ongoing = store.save("a", ModelType.CHATGPT, "a.pdf", _cv("Ongoing", "Present"))
+    finished = store.save("b", ModelType.CHATGPT, "b.pdf", _cv("Finished", f"{time.gmtime().tm_year - 1}-01"))
+    assert {cv.cv_id for cv in store.search(min_years=3)[1]} == {ongoing, finished}
+    assert store.search(min_years=5)[0] == 0
+
+    # Two years later the ongoing role counts two more years; the finished one does not
+    store._db().execute("UPDATE cvs SET updated_at = updated_at - ?", (2 * YEAR_SECONDS,))
+    total, results, _ = store.search("Python, 5+ years")
+    assert total == 1 and results[0].cv_id == ongoing and results[0].years_experience >= 5
+    assert store.get(finished).years_experience < 4
+    store.close()
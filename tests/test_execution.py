@@ -0,0 +1,31 @@
+import asyncio
+import threading
+
+from app.services.execution import ExecutionPools
+
+
+def test_saturated_provider_lane_does_not_take_threads_from_others():
+    pools = ExecutionPools(pdf_workers=1, pdf_max_concurrency=1, llm_workers=2, llm_max_concurrency=2,
+                           lane_sizes={"ollama": 1})
+    release = threading.Event()
+    running = []
+
+    def local_call(i):
+        running.append(i)
+        release.wait(5)
+        return i
+
+    async def scenario():
+        local = [asyncio.create_task(pools.run_llm(local_call, i, lane="ollama")) for i in range(4)]
+        await asyncio.sleep(0.1)
+        # One Ollama call runs, the others wait on the event loop, so a thread is left for OpenAI
+        remote = await asyncio.wait_for(pools.run_llm(lambda: "remote", lane="openai"), timeout=2)
+        assert running == [0]
+        release.set()
+        return remote, await asyncio.gather(*local)
+
+    try:
+        assert asyncio.run(scenario()) == ("remote", [0, 1, 2, 3])
+    finally:
+        release.set()
+        pools.shutdown()
@@ -0,0 +1,75 @@
+import asyncio
+import io
+
+import pytest
+from fastapi import UploadFile
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.api.v1.endpoints import cv_parser
+from app.config import settings
+from app.main import app
+from app.models.cv_model import Contact, CVModel
+from app.utils import file_utils
+from app.utils.file_utils import MULTIPART_OVERHEAD_BYTES, UploadSizeLimitMiddleware, UploadTooLargeError, read_upload
+
+
+def _upload(content, size=None):
+    return UploadFile(io.BytesIO(content), size=size, filename="cv.pdf")
+
+
+def test_read_upload_stops_streaming_past_the_limit(monkeypatch):
+    monkeypatch.setattr(file_utils, "UPLOAD_CHUNK_BYTES", 4)
+    # No declared size, so only the streamed total can catch it
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(read_upload(_upload(b"x" * 11), max_bytes=10))
+    assert asyncio.run(read_upload(_upload(b"x" * 10), max_bytes=10)) == b"x" * 10
+
+
+def test_read_upload_rejects_a_declared_size_over_the_limit():
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(read_upload(_upload(b"", size=11), max_bytes=10))
+
+
+def test_parse_endpoint_returns_413_over_the_limit_and_accepts_at_it(monkeypatch):
+    async def parse_document(content, filename, model_type, **kwargs):
+        return CVModel(name=filename, contact=Contact())
+
+    monkeypatch.setattr(cv_parser, "parse_document", parse_document)
+    monkeypatch.setattr(settings, "upload_max_bytes", 1000)
+    client = TestClient(app)
+
+    def post(size):
+        return client.post("/api/v1/parse-cv/?model_type=chatgpt",
+                           files={"file": ("cv.pdf", b"x" * size, "application/pdf")})
+
+    response = post(1001)
+    assert response.status_code == 413 and "1000 byte upload limit" in response.json()["detail"]
+    assert post(1000).status_code == 200
+
+
+def _limited_client():
+    async def upload(request):
+        return PlainTextResponse("ok")
+
+    inner = Starlette(routes=[Route(path, upload, methods=["POST"]) for path in ("/parse", "/parse/batch")])
+    return TestClient(UploadSizeLimitMiddleware(inner, max_bytes=100, batch_max_bytes=1000))
+
+
+def test_middleware_rejects_on_content_length_before_reading_the_body():
+    client = _limited_client()
+    headers = {"content-type": "multipart/form-data; boundary=x"}
+
+    def post(path, size):
+        return client.post(path, content=b"x" * size, headers=headers)
+
+    response = post("/parse", 100 + MULTIPART_OVERHEAD_BYTES + 1)
+    assert response.status_code == 413 and response.json()["detail"] == "Upload exceeds the 100 byte limit"
+    assert post("/parse", 100 + MULTIPART_OVERHEAD_BYTES).status_code == 200
+    # Batch uploads have their own, larger limit
+    assert post("/parse/batch", 1000 + MULTIPART_OVERHEAD_BYTES).status_code == 200
+    assert post("/parse/batch", 1000 + MULTIPART_OVERHEAD_BYTES + 1).status_code == 413
+    # Only multipart uploads are checked
+    assert client.post("/parse", content=b"x" * 2 * MULTIPART_OVERHEAD_BYTES).status_code == 200
@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from app.services.hedging import hedged_call
+
+
+def test_slow_call_is_hedged_and_the_loser_cancelled():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append("slow")
+            raise
+        return "slow"
+
+    async def fast():
+        await asyncio.sleep(0.01)
+        return "fast"
+
+    result = asyncio.run(hedged_call([("slow", slow), ("fast", fast)], hedge_delay=0.05))
+    assert result == "fast"
+    assert cancelled == ["slow"]
+
+
+def test_failure_fails_over_without_hedge_delay():
+    started = []
+
+    def call(label, error=None):
+        async def run():
+            started.append(label)
+            if error:
+                raise error
+            return label
+        return run
+
+    calls = [("a", call("a", RuntimeError("down"))), ("b", call("b")), ("c", call("c"))]
+    assert asyncio.run(hedged_call(calls, hedge_delay=None)) == "b"
+    assert started == ["a", "b"]
+
+
+def test_last_error_is_raised_when_every_call_fails():
+    async def fail():
+        raise RuntimeError("down")
+
+    with pytest.raises(RuntimeError, match="down"):
+        asyncio.run(hedged_call([("a", fail), ("b", fail)], hedge_delay=0.01))
@@ -0,0 +1,52 @@
+import time
+
+from app.models.job_model import JobStatus
+from app.services.job_queue import JobStore
+from app.utils.models import ModelType
+
+
+def _store(tmp_path, **kwargs):
+    return JobStore(str(tmp_path / "jobs.sqlite3"), **kwargs)
+
+
+def _expire(store, job_id):
+    store._db().execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time() - store.lease_seconds - 1, job_id))
+
+
+def test_expired_lease_of_previous_process_is_requeued(tmp_path):
+    crashed = _store(tmp_path)
+    job_id = crashed.create(ModelType.OLLAMA, "cv.pdf", b"%PDF")
+    assert crashed.claim_next()["id"] == job_id
+
+    restarted = _store(tmp_path)
+    assert restarted.claim_next() is None  # the lease is still held
+    _expire(restarted, job_id)
+    assert restarted.claim_next()["id"] == job_id
+
+    # The old owner can no longer renew or finish the job
+    assert not crashed.renew_lease(job_id)
+    crashed.complete(job_id, "{}")
+    assert restarted.get(job_id).status == JobStatus.RUNNING
+
+
+def test_job_that_keeps_crashing_workers_fails(tmp_path):
+    store = _store(tmp_path, max_attempts=2)
+    job_id = store.create(ModelType.OLLAMA, "cv.pdf", b"%PDF")
+    for _ in range(2):
+        assert store.claim_next()["id"] == job_id
+        _expire(store, job_id)
+
+    assert store.claim_next() is None
+    job = store.get(job_id)
+    assert job.status == JobStatus.FAILED and "2 interrupted attempt" in job.error
+
+
+def test_release_on_shutdown_does_not_count_as_attempt(tmp_path):
+    store = _store(tmp_path, max_attempts=1)
+    job_id = store.create(ModelType.OLLAMA, "cv.pdf", b"%PDF")
+    store.claim_next()
+    assert store.release_running() == 1
+
+    claimed = store.claim_next()
+    assert claimed["id"] == job_id
+    assert store.renew_lease(job_id)
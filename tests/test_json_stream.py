@@ -0,0 +1,38 @@
+from app.utils.json_stream import IncrementalJSONParser
+
+
+def _feed_in_chunks(parser, text, size):
+    completed = []
+    for start in range(0, len(text), size):
+        completed.extend(parser.feed(text[start:start + size]))
+    return completed
+
+
+def test_members_are_emitted_as_they_complete():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"name": "Jane", "skills": ["Py') == [("name", "Jane")]
+    assert parser.feed('thon", "Go"], ') == [("skills", ["Python", "Go"])]
+    assert not parser.finished
+    assert parser.feed('"contact": {"email": "j@x.io"}}') == [("contact", {"email": "j@x.io"})]
+    assert parser.finished
+    assert parser.feed(', "ignored": 1}') == []
+
+
+def test_separators_inside_strings_and_nested_values_do_not_split_members():
+    text = '{"summary": "Led {platform}, \\"core\\" team, [infra]", "experience": [{"a": 1, "b": [2, 3]}]}'
+    completed = _feed_in_chunks(IncrementalJSONParser(), text, 3)
+    assert completed == [("summary", 'Led {platform}, "core" team, [infra]'),
+                         ("experience", [{"a": 1, "b": [2, 3]}])]
+
+
+def test_code_fences_and_think_blocks_before_the_object_are_skipped():
+    parser = IncrementalJSONParser()
+    text = '<think>maybe {"name": "wrong"}</think>\n```json\n{"name": "Jane"}\n```'
+    assert _feed_in_chunks(parser, text, 5) == [("name", "Jane")]
+    assert parser.members == {"name": "Jane"} and parser.finished
+
+
+def test_malformed_member_is_skipped():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"name": "Jane", "age": oops, "title": "Engineer"}') == [("name", "Jane"),
+                                                                                  ("title", "Engineer")]
@@ -0,0 +1,53 @@
+from app.services.markdown_compactor import PAGE_BREAK_RE, MarkdownCompactor
+
+
+def _document(pages):
+    return "\n-----\n".join("\n".join(page) for page in pages)
+
+
+def _lines(text):
+    return [line.strip() for line in text.split("\n") if line.strip() and not PAGE_BREAK_RE.match(line)]
+
+
+def _experience(page):
+    return [f"## Experience {page}", "Acme Corp", "New York, NY", f"Built service {page}", "Beta Inc",
+            "New York, NY", "Python, Go", f"Shipped app {page}"]
+
+
+def test_two_page_cv_keeps_lines_repeated_across_pages():
+    pages = [["# Jane Doe", *_experience(1), "1"], ["# Jane Doe", *_experience(2), "2"]]
+    compacted = MarkdownCompactor._headers_footers(_document(pages))
+
+    # Too few pages to tell a header from content: only the page numbers go
+    assert _lines(compacted) == [line for page in pages for line in page[:-1]]
+
+
+def test_repeated_edge_lines_are_kept_once():
+    header = "Jane Doe - Curriculum Vitae"
+    pages = [[header, *_experience(n), f"Page {n} of 4"] for n in range(1, 5)]
+    pages[2].insert(4, header)  # the same text in the body of a page is content
+    compacted = MarkdownCompactor._headers_footers(_document(pages))
+
+    lines = _lines(compacted)
+    assert lines.count(header) == 2
+    assert not any(line.startswith("Page ") for line in lines)
+
+
+def test_no_non_edge_line_is_removed_from_multi_page_document():
+    header, footer = "Jane Doe | jane@example.com", "Confidential"
+    pages = [[header, "", *_experience(n), "", footer] for n in range(1, 6)]
+    compacted = MarkdownCompactor._headers_footers(_document(pages))
+
+    lines = _lines(compacted)
+    assert lines.count(header) == 1 and lines.count(footer) == 1
+    body = [line for page in pages for line in _lines("\n".join(page[1:-1]))]
+    assert [line for line in lines if line not in (header, footer)] == body
+
+
+def test_compact_reports_saved_characters_per_step():
+    text = "**Skills**\n\n\n\n| Python | Go |\n|---|---|\n![logo](logo.png)\n"
+    compacted, report = MarkdownCompactor.compact(text)
+
+    assert compacted == "Skills\n\nPython | Go\n"
+    assert report["chars_before"] == len(text) and report["chars_after"] == len(compacted)
+    assert set(report["steps"]) == set(MarkdownCompactor.STEPS)
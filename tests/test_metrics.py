@@ -0,0 +1,76 @@
+import pymupdf
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client.parser import text_string_to_metric_families
+
+from app.config import settings
+from app.main import app
+from app.services import pipeline
+from app.services.cv_processor_services.base_service import BaseService
+from app.services.service_registry import service_registry
+from app.services.usage import report_tokens
+from app.utils.metrics import METRICS_PATH
+from app.utils.models import ModelType
+
+
+class StubService(BaseService):
+    provider = "test"
+    model = "stub-model"
+
+    def _call_api(self, text, is_analysis=False, **kwargs):
+        report_tokens(prompt_tokens=120, completion_tokens=30)
+        return {"name": "Jane Doe", "title": "Engineer", "contact": {}}
+
+
+class InlinePools:
+    pdf_workers = 1
+
+    async def run_extraction(self, func, *args):
+        return func(*args)
+
+    async def run_llm(self, func, *args, lane=None, **kwargs):
+        return func(*args, **kwargs)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    service = StubService()
+    service.model_type = ModelType.CHATGPT
+    monkeypatch.setitem(service_registry._services, ModelType.CHATGPT, service)
+    monkeypatch.setattr(pipeline, "pools", InlinePools())
+    for name in ("pdf_cache_enabled", "parse_cache_enabled", "cv_store_enabled"):
+        monkeypatch.setattr(settings, name, False)
+    monkeypatch.setattr(settings, "parse_fallback_chain", [])
+    return TestClient(app)  # no lifespan: the pools and job workers aren't needed
+
+
+def _samples(client):
+    response = client.get(METRICS_PATH)
+    assert response.status_code == 200
+    return {(sample.name, tuple(sorted(sample.labels.items()))): sample.value
+            for family in text_string_to_metric_families(response.text) for sample in family.samples}
+
+
+def _pdf():
+    document = pymupdf.open()
+    document.new_page().insert_text((72, 72), "Jane Doe, Engineer")
+    content = document.tobytes()
+    document.close()
+    return content
+
+
+def test_a_parse_is_recorded_in_the_stage_histogram_and_token_counters(client):
+    before = _samples(client)
+    response = client.post("/api/v1/parse-cv/?model_type=chatgpt&mode=single&dedup=off",
+                           files={"file": ("cv.pdf", _pdf(), "application/pdf")})
+    assert response.status_code == 200 and response.json()["name"] == "Jane Doe"
+    after = _samples(client)
+
+    def increase(name, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        return after.get(key, 0.0) - before.get(key, 0.0)
+
+    for stage in ("upload_read", "pdf_extraction", "llm_call", "validation"):
+        assert increase("cvinsight_stage_duration_seconds_count", stage=stage, model_type="chatgpt") == 1
+    assert increase("cvinsight_llm_tokens_total", model_type="chatgpt", kind="prompt") == 120
+    assert increase("cvinsight_llm_tokens_total", model_type="chatgpt", kind="completion") == 30
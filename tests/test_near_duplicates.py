@@ -0,0 +1,70 @@
+import asyncio
+from datetime import datetime
+
+from app.models.store_model import StoredCV
+from app.services import pipeline
+from app.services.near_duplicates import MinHasher, NearDuplicateIndex
+from app.utils.models import ModelType
+
+TEXT = "Jane Doe\nSenior engineer at Acme Corp building payment services in Python and Go since 2018.\n" * 5
+OTHER_TEXT = "John Smith\nData analyst at Beta Inc reporting on retail sales with SQL and Tableau since 2015.\n" * 5
+
+
+def _index(tmp_path):
+    return NearDuplicateIndex(str(tmp_path / "index.sqlite3"), num_perm=64, threshold=0.8, max_documents=100)
+
+
+def _stored(cv_id, source_hash):
+    now = datetime.now()
+    return StoredCV(cv_id=cv_id, source_hash=source_hash, model_type=ModelType.CHATGPT.value, years_experience=5.0,
+                    created_at=now, updated_at=now)
+
+
+def test_removed_cv_is_no_longer_found(tmp_path):
+    index = _index(tmp_path)
+    signature = MinHasher.signature(TEXT, 64)
+    index.add_many([(1, signature), (2, signature)])
+    assert [cv_id for cv_id, _ in index.lookup(signature)] == [1, 2]
+
+    index.remove(1)
+    index.remove(3)  # unknown ids are ignored
+    assert [cv_id for cv_id, _ in index.lookup(signature)] == [2]
+    assert index.count() == 1
+    index.close()
+
+
+def test_re_adding_a_cv_replaces_its_buckets(tmp_path):
+    index = _index(tmp_path)
+    old, new = MinHasher.signature(TEXT, 64), MinHasher.signature(OTHER_TEXT, 64)
+    index.add(1, old)
+    index.add(1, new)
+
+    assert index.lookup(old) == []
+    assert [cv_id for cv_id, _ in index.lookup(new)] == [1]
+    assert index._db().execute("SELECT COUNT(*) FROM buckets").fetchone()[0] == index.bands
+    assert index.count() == 1
+    index.close()
+
+
+def test_parses_of_the_same_file_are_not_near_duplicates(tmp_path, monkeypatch):
+    index = _index(tmp_path)
+    signature = MinHasher.signature(TEXT, 64)
+    index.add_many([(1, signature), (2, signature)])
+    stored = {1: _stored(1, "same-file"), 2: _stored(2, "other-file")}
+
+    async def run_extraction(func, *args):
+        return func(*args)
+
+    monkeypatch.setattr(pipeline, "near_duplicate_index", index)
+    monkeypatch.setattr(pipeline.pools, "run_extraction", run_extraction)
+    monkeypatch.setattr(pipeline.cv_store, "get_many", lambda cv_ids: [stored[cv_id] for cv_id in cv_ids])
+    monkeypatch.setattr(pipeline.settings, "dedup_num_perm", 64)
+
+    _, match = asyncio.run(pipeline.find_near_duplicate(TEXT, ModelType.CHATGPT, "same-file"))
+    assert match[0].cv_id == 2
+
+    del stored[2]
+    index.remove(2)
+    _, match = asyncio.run(pipeline.find_near_duplicate(TEXT, ModelType.CHATGPT, "same-file"))
+    assert match is None
+    index.close()
@@ -0,0 +1,91 @@
+import asyncio
+
+import pymupdf
+import pytest
+
+from app.config import settings
+from app.services import pipeline
+from app.services.pdf_parser import PDFParser
+
+
+def _pdf(pages):
+    """PDF bytes with one page per list of (font size, line) pairs."""
+    document = pymupdf.open()
+    for lines in pages:
+        page = document.new_page()
+        y = 72
+        for size, line in lines:
+            page.insert_text((72, y), line, fontsize=size)
+            y += size * 1.6
+    content = document.tobytes()
+    document.close()
+    return content
+
+
+def _resume(page_count):
+    return _pdf([[(18, f"Section {n}"), (11, f"Role {n} at Company {n}"), (11, "Built services in Python")]
+                 for n in range(page_count)])
+
+
+class InlinePools:
+    """Runs extraction in the test process and records the page ranges it was asked to convert."""
+    pdf_workers = 3
+
+    def __init__(self):
+        self.ranges = []
+
+    async def run_extraction(self, func, *args):
+        if func is PDFParser.convert_pdf:
+            self.ranges.append(args[1])
+        return func(*args)
+
+
+@pytest.mark.parametrize("page_count, parts, expected", [
+    (1, 4, [[0]]),
+    (2, 4, [[0], [1]]),
+    (7, 3, [[0, 1, 2], [3, 4], [5, 6]]),
+    (5, 0, [[0, 1, 2, 3, 4]]),
+])
+def test_page_ranges_are_contiguous_and_near_equal(page_count, parts, expected):
+    assert PDFParser.page_ranges(page_count, parts) == expected
+
+
+def test_page_parallel_markdown_matches_serial(monkeypatch):
+    content = _resume(7)
+    pools = InlinePools()
+    monkeypatch.setattr(pipeline, "pools", pools)
+    monkeypatch.setattr(settings, "pdf_parallel_min_pages", 4)
+    monkeypatch.setattr(settings, "pdf_fast_path_enabled", False)
+
+    text, extraction = asyncio.run(pipeline._convert(content, "cv.pdf"))
+
+    assert pools.ranges == [[0, 1, 2], [3, 4], [5, 6]]
+    assert text == PDFParser.convert_pdf(content)
+    assert "# Section 6" in text and extraction["tier"] == "markdown"
+
+
+def _text_heavy(page_count):
+    line = "Led a team of five engineers building payment services in Python and Go"
+    return _pdf([[(11, f"{n}. {line}") for n in range(12)] for _ in range(page_count)])
+
+
+def test_text_heavy_pdf_takes_the_plain_text_tier(monkeypatch):
+    monkeypatch.setattr(settings, "pdf_fast_path_enabled", True)
+    monkeypatch.setattr(settings, "pdf_fast_path_min_quality", 0.8)
+
+    text, extraction = PDFParser.extract(_text_heavy(2))
+
+    assert extraction["tier"] == "text" and extraction["quality"] == 1.0
+    assert text.startswith("0. Led a team of five engineers") and "#" not in text
+
+
+def test_low_quality_escalates_to_markdown(monkeypatch):
+    monkeypatch.setattr(settings, "pdf_fast_path_enabled", True)
+    monkeypatch.setattr(settings, "pdf_fast_path_min_quality", 0.8)
+    content = _resume(2)  # well under MIN_CHARS_PER_PAGE
+
+    text, extraction = PDFParser.extract(content)
+    assert extraction["tier"] == "markdown" and extraction["quality"] < 0.8
+    assert text == PDFParser.convert_pdf(content)
+
+    assert PDFParser.extract(content, escalate=False) == (None, extraction)
@@ -0,0 +1,62 @@
+import asyncio
+
+from app.services import ranking
+from app.services.ranking import prefilter, rank_candidates
+from app.utils.models import ModelType
+
+REQUIREMENTS = "Backend engineer, 5+ years of experience with Python, Django and PostgreSQL"
+CANDIDATES = [
+    {"id": "designer", "cv": {
+        "name": "Dana", "title": "Product Designer", "skills": ["Figma", "Sketch"],
+        "experience": [{"position": "Designer", "company": "Studio", "start_date": "2012-01",
+                        "end_date": "2020-01", "responsibilities": "Designed mobile apps"}],
+    }},
+    {"id": "junior", "cv": {
+        "name": "Jun", "title": "Python Developer", "skills": ["Python"],
+        "experience": [{"position": "Developer", "company": "Startup", "start_date": "2018-01",
+                        "end_date": "2020-01", "responsibilities": "Wrote Python scripts"}],
+    }},
+    {"id": "senior", "cv": {
+        "name": "Sam", "title": "Backend Engineer", "skills": ["Python", "Django", "PostgreSQL"],
+        "experience": [{"position": "Backend Engineer", "company": "Shop", "start_date": "2014-01",
+                        "end_date": "2020-01", "responsibilities": "Built Django APIs on PostgreSQL"}],
+    }},
+]
+
+
+class InlinePools:
+    """Runs the analyses in the test and returns a fixed suitability score per candidate."""
+
+    def __init__(self, suitability):
+        self.suitability = suitability
+        self.analyzed = []
+
+    async def run_llm(self, func, *, cv_data, lane=None, **kwargs):
+        self.analyzed.append(cv_data["name"])
+        return {"recommendation": {"suitability_score": self.suitability[cv_data["name"]]}}
+
+
+def test_prefilter_orders_candidates_by_fit():
+    entries = prefilter(CANDIDATES, REQUIREMENTS)
+
+    assert [entry["candidate_id"] for entry in entries] == ["senior", "junior", "designer"]
+    assert entries[0]["scores"]["missing_skills"] == [] and entries[0]["scores"]["meets_duration"]
+    assert entries[2]["bm25"] == 0.0
+    assert entries[0]["prefilter_score"] > entries[1]["prefilter_score"] > entries[2]["prefilter_score"]
+
+
+def test_only_the_top_k_are_analyzed_and_they_rank_first(monkeypatch):
+    pools = InlinePools({"Sam": 70, "Jun": 90})
+    monkeypatch.setattr(ranking, "pools", pools)
+    monkeypatch.setattr(ranking.CVProcessor, "provider", staticmethod(lambda model_type: "test"))
+
+    response = asyncio.run(rank_candidates(CANDIDATES, "Backend Engineer", "Shop", REQUIREMENTS,
+                                           ModelType.CHATGPT, top_k=2, concurrency=2))
+
+    assert sorted(pools.analyzed) == ["Jun", "Sam"]
+    assert response.candidates == 3 and response.analyzed == 2
+    assert [entry.candidate_id for entry in response.leaderboard] == ["junior", "senior", "designer"]
+    assert [entry.rank for entry in response.leaderboard] == [1, 2, 3]
+    assert response.leaderboard[0].final_score == 90.0
+    designer = response.leaderboard[2]
+    assert designer.analysis is None and designer.final_score == designer.prefilter_score
@@ -0,0 +1,132 @@
+import httpx
+import pytest
+
+from app.config import settings
+from app.services import resilience
+from app.services.resilience import (
+    CircuitBreaker, Deadline, DeadlineExceededError, ProviderUnavailableError, call_with_resilience, is_retryable,
+    is_timeout,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers(monkeypatch):
+    monkeypatch.setattr(resilience, "circuit_breakers", resilience.CircuitBreakerRegistry())
+    monkeypatch.setattr(settings, "llm_retry_attempts", 3)
+    monkeypatch.setattr(settings, "llm_retry_base_delay", 0.0)
+    monkeypatch.setattr(settings, "circuit_failure_threshold", 5)
+
+
+def _wrapped(error):
+    """Services re-raise SDK errors as RuntimeError from the original."""
+    try:
+        raise error
+    except Exception as e:
+        try:
+            raise RuntimeError(f"API error: {e}") from e
+        except RuntimeError as wrapped:
+            return wrapped
+
+
+def test_breaker_opens_after_threshold_and_probes_once_after_recovery(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: clock[0])
+    breaker = CircuitBreaker("test", failure_threshold=2, recovery_seconds=30)
+
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(ProviderUnavailableError):
+        breaker.before_call()
+
+    clock[0] += 30
+    breaker.before_call()  # the probe
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(ProviderUnavailableError):
+        breaker.before_call()  # only one probe at a time
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    clock[0] += 30
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.failures == 0
+    assert breaker.stats()["times_opened"] == 2
+
+
+def test_released_probe_lets_the_next_call_probe(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: clock[0])
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_seconds=1)
+    breaker.record_failure()
+    clock[0] += 1
+    breaker.before_call()
+    breaker.release()
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def test_transient_errors_are_retried_until_success():
+    calls = []
+
+    def attempt(deadline):
+        calls.append(deadline)
+        if len(calls) < 3:
+            raise _wrapped(httpx.ConnectError("refused"))
+        return "ok"
+
+    assert call_with_resilience("test", attempt) == "ok"
+    assert len(calls) == 3
+    assert resilience.circuit_breakers.get("test").state == CircuitBreaker.CLOSED
+
+
+def test_bad_requests_are_not_retried():
+    calls = []
+
+    def attempt(deadline):
+        calls.append(deadline)
+        raise ValueError("invalid JSON in response")
+
+    with pytest.raises(ValueError):
+        call_with_resilience("test", attempt)
+    assert len(calls) == 1
+
+
+def test_local_timeouts_are_not_retried_nor_counted():
+    calls = []
+
+    def attempt(deadline):
+        calls.append(deadline)
+        raise _wrapped(httpx.ReadTimeout("timed out"))
+
+    with pytest.raises(RuntimeError):
+        call_with_resilience("local", attempt, Deadline(None), timeouts_transient=False)
+    assert len(calls) == 1
+    assert resilience.circuit_breakers.get("local").failures == 0
+
+    with pytest.raises(RuntimeError):
+        call_with_resilience("remote", attempt)
+    assert len(calls) == 4
+    assert resilience.circuit_breakers.get("remote").failures == 3
+
+
+def test_expired_deadline_fails_before_calling():
+    deadline = Deadline(0)
+    with pytest.raises(DeadlineExceededError):
+        call_with_resilience("test", lambda d: "never", deadline)
+
+
+def test_deadline_without_limit():
+    deadline = Deadline(None)
+    assert deadline.remaining() is None and not deadline.expired()
+    assert deadline.cap(60) == 60 and deadline.cap(None) is None
+    assert Deadline(10).cap(60) <= 10
+
+
+def test_error_classification_walks_the_cause_chain():
+    assert is_retryable(_wrapped(httpx.ReadTimeout("slow")))
+    assert is_timeout(_wrapped(httpx.ReadTimeout("slow")))
+    assert is_retryable(_wrapped(httpx.ConnectError("refused")))
+    assert not is_timeout(_wrapped(httpx.ConnectError("refused")))
+    assert not is_retryable(_wrapped(KeyError("choices")))
@@ -0,0 +1,55 @@
+from datetime import date
+
+from app.services.scoring import ScoringEngine
+
+
+def test_required_skills_are_dictionary_skills_only():
+    requirements = ("Senior backend engineer leading our platform, communication, 5+ years of Python, "
+                    "k8s and AWS, senior Go developer")
+    assert ScoringEngine.required_skills(requirements) == ["python", "kubernetes", "amazon web services", "golang"]
+    assert ScoringEngine.required_years(requirements) == 5
+
+
+def test_ambiguous_words_in_running_text_are_not_skills():
+    text = ("Worked with the rest of the team on next generation tooling hosted on GitHub; "
+            "reacted to incidents in containers. Built services in Node.js and Google Cloud Platform.")
+    assert ScoringEngine.mentioned_skills(text) == {"node.js", "google cloud platform"}
+
+
+def test_whole_skill_entries_still_resolve_aliases():
+    cv = {"skills": ["Go", "REST", "Node"], "experience": []}
+    assert ScoringEngine.candidate_skills(cv) == {"golang", "rest", "node.js"}
+
+
+def test_score_merges_overlapping_roles():
+    cv = {
+        "skills": ["Python"],
+        "experience": [
+            {"start_date": "2018-01", "end_date": "2019-12", "responsibilities": "Deployed on k8s"},
+            {"start_date": "2019-06", "end_date": "2020-12", "responsibilities": ""},
+        ],
+    }
+    scores = ScoringEngine.score(cv, "3+ years Python, Kubernetes and Java", today=date(2024, 1, 1))
+
+    assert scores["years_actual"] == 3.0 and scores["meets_duration"]
+    assert scores["matching_skills"] == ["python", "kubernetes"]
+    assert scores["missing_skills"] == ["java"]
+
+
+def test_apply_to_analysis_only_overrides_scored_skills():
+    analysis = {"basic_qualification_check": {"technical_skills": {
+        "required_skills": ["Python", "Communication"],
+        "matching_skills": ["Communication"],
+        "missing_skills": ["Python"],
+    }}}
+    scores = {"years_actual": 4.5, "years_required": None, "meets_duration": True, "required_skills": ["python"],
+              "matching_skills": ["python"], "missing_skills": []}
+    ScoringEngine.apply_to_analysis(analysis, scores)
+
+    qualification = analysis["basic_qualification_check"]
+    assert qualification["work_experience"] == {"years_actual": 4, "meets_duration": True}
+    assert qualification["technical_skills"] == {
+        "required_skills": ["Communication", "python"],
+        "matching_skills": ["Communication", "python"],
+        "missing_skills": [],
+    }
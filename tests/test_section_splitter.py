@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.services.cv_processor_services import base_service
+from app.services.cv_processor_services.base_service import BaseService
+from app.services.execution import ExecutionPools
+from app.services.section_splitter import SECTION_FIELDS, SectionSplitter
+from app.utils.cache import TieredCache
+
+CV = "\n".join([
+    "# Jane Doe", "Backend Engineer", "jane@example.com",
+    "## WORK EXPERIENCE", "Acme Corp, Engineer, 2019 - Present",
+    "## Education", "BSc Computer Science, State University",
+    "**Projects:**", "Payments gateway",
+    "## Licenses & Certifications", "AWS Solutions Architect",
+    "## Technical Skills", "Python, Go",
+])
+SECTION_RESULTS = {
+    "header": {"name": "Jane Doe", "title": "Backend Engineer", "contact": {"email": "jane@example.com"}},
+    "experience": {"experience": [{"company": "Acme Corp", "position": "Engineer"}],
+                   "skills_from_work_experience": ["APIs"]},
+    "education": {"education": [{"institution": "State University"}]},
+    "projects": {"projects": [{"title": "Payments gateway"}]},
+    "certifications": {"certifications": [{"name": "AWS Solutions Architect"}]},
+    "skills": {"skills": ["Python", "Go"]},
+}
+
+
+class SectionService(BaseService):
+    provider = "test"
+    model = "section-model"
+
+    def __init__(self):
+        self.sections = []
+
+    def _call_api(self, text, is_analysis=False, **kwargs):
+        raise AssertionError("chunked parsing calls parse_section")
+
+    def parse_section(self, section, text, known_contact_fields=()):
+        self.sections.append((section, text))
+        return {field: SECTION_RESULTS[section].get(field) for field in SECTION_FIELDS[section]}
+
+
+@pytest.fixture
+def pools(monkeypatch, tmp_path):
+    pools = ExecutionPools(pdf_workers=1, pdf_max_concurrency=1, llm_workers=4, llm_max_concurrency=4)
+    monkeypatch.setattr(base_service, "pools", pools)
+    monkeypatch.setattr(base_service, "parse_cache", TieredCache("parse", str(tmp_path), 8, 1024 * 1024))
+    monkeypatch.setattr(settings, "parse_cache_enabled", True)
+    monkeypatch.setattr(settings, "contact_pre_extraction", False)
+    yield pools
+    pools.shutdown()
+
+
+def test_split_finds_every_section():
+    sections = SectionSplitter.split(CV)
+
+    assert list(sections) == ["header", "experience", "education", "projects", "certifications", "skills"]
+    assert sections["header"].startswith("# Jane Doe") and "jane@example.com" in sections["header"]
+    assert sections["experience"].endswith("Acme Corp, Engineer, 2019 - Present")
+    assert sections["skills"] == "## Technical Skills\nPython, Go"
+
+
+def test_repeated_headings_are_joined_and_unknown_headings_stay_in_their_section():
+    sections = SectionSplitter.split("Jane\n## Skills\nPython\n## Hobbies\nChess\n## Skills\nGo")
+    assert sections["skills"] == "## Skills\nPython\n## Hobbies\nChess\n## Skills\nGo"
+
+
+def test_chunked_parse_merges_every_section(pools):
+    service = SectionService()
+    cv = asyncio.run(service.parse_cv_chunked(CV))
+
+    assert sorted(section for section, _ in service.sections) == sorted(SECTION_RESULTS)
+    assert (cv.name, cv.title, cv.contact.email) == ("Jane Doe", "Backend Engineer", "jane@example.com")
+    assert cv.experience[0].company == "Acme Corp" and cv.skills_from_work_experience == ["APIs"]
+    assert cv.education[0].institution == "State University"
+    assert cv.projects[0].title == "Payments gateway"
+    assert cv.certifications[0].name == "AWS Solutions Architect"
+    assert cv.skills == ["Python", "Go"]
+
+    # The merged result is cached as a whole
+    service.sections.clear()
+    assert asyncio.run(service.parse_cv_chunked(CV)) == cv
+    assert service.sections == []
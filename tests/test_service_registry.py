@@ -0,0 +1,16 @@
+from app.services.service_registry import ServiceRegistry
+
+
+def test_close_closes_the_connection_pools_it_owns(monkeypatch):
+    registry = ServiceRegistry()
+    closed = []
+    http_client = registry.http_client
+    registry.ollama_client  # built lazily
+    transport = registry._ollama_transport
+    monkeypatch.setattr(http_client, "close", lambda: closed.append("http"))
+    monkeypatch.setattr(transport, "close", lambda: closed.append("ollama"))
+
+    registry.close()
+
+    assert closed == ["http", "ollama"]
+    assert registry._ollama_client is None and registry._ollama_transport is None
@@ -0,0 +1,80 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+
+import pytest
+
+from app.config import settings
+from app.services import usage
+from app.services.usage import collect_usage, measure_call, price, record_output, report_tokens
+from app.utils.models import ModelType
+
+
+@pytest.fixture(autouse=True)
+def fixed_prices(monkeypatch):
+    monkeypatch.setattr(settings, "model_prices", {"chatgpt": {"input": 2.0, "output": 10.0}})
+    monkeypatch.setattr(usage, "process_usage", usage.UsageTally())
+
+
+def test_price_per_million_tokens_and_free_local_models():
+    assert price(ModelType.CHATGPT, 1_000_000, 100_000) == pytest.approx(3.0)
+    assert price(ModelType.QWEN_14B, 1_000_000, 100_000) == 0.0
+
+
+def test_reported_usage_is_tallied_per_request_and_model():
+    with collect_usage() as tally:
+        with measure_call(ModelType.CHATGPT, "openai", estimated_prompt_tokens=999):
+            report_tokens(prompt_tokens=500_000, completion_tokens=50_000)
+        with measure_call(ModelType.CHATGPT, "openai", estimated_prompt_tokens=999):
+            report_tokens(prompt_tokens=500_000, completion_tokens=50_000)
+
+    report = tally.by_model()["chatgpt"]
+    assert report["calls"] == 2 and report["estimated_calls"] == 0
+    assert report["prompt_tokens"] == 1_000_000 and report["completion_tokens"] == 100_000
+    assert report["cost_usd"] == pytest.approx(3.0)
+    assert report["cost_per_call_usd"] == pytest.approx(1.5)
+    assert usage.process_usage.summary()["calls"] == 2
+
+
+def test_missing_usage_falls_back_to_estimates():
+    with collect_usage() as tally:
+        with measure_call(ModelType.QWEN_14B, "ollama", estimated_prompt_tokens=120):
+            record_output("x" * 40)
+            record_output("y" * 40)
+
+    report = tally.summary()
+    assert report["estimated_calls"] == 1
+    assert report["prompt_tokens"] == 120 and report["completion_tokens"] == 20
+    assert report["cost_usd"] == 0.0 and report["completion_tokens_per_dollar"] is None
+    assert report["time_to_first_token_seconds"] is not None
+
+
+def test_calls_in_pool_threads_reach_the_request_tally():
+    def call():
+        with measure_call(ModelType.CHATGPT, "openai", estimated_prompt_tokens=10):
+            report_tokens(prompt_tokens=10, completion_tokens=5)
+
+    with collect_usage() as tally, ThreadPoolExecutor(2) as pool:
+        for future in [pool.submit(copy_context().run, call) for _ in range(3)]:
+            future.result()
+    with measure_call(ModelType.CHATGPT, "openai", estimated_prompt_tokens=10):
+        pass  # outside the request
+
+    assert tally.summary()["calls"] == 3
+    assert usage.process_usage.summary()["calls"] == 4
+
+
+def test_generation_speed_needs_a_measured_first_token():
+    with collect_usage() as tally:
+        # A non-streaming call: its wall time includes prompt processing, so it says nothing about generation
+        with measure_call(ModelType.CHATGPT, "openai", estimated_prompt_tokens=10):
+            report_tokens(prompt_tokens=10, completion_tokens=1000)
+    assert tally.summary()["tokens_per_second"] is None
+
+    with collect_usage() as tally:
+        with measure_call(ModelType.QWEN_14B, "ollama", estimated_prompt_tokens=10):
+            report_tokens(prompt_tokens=10, completion_tokens=100, first_token_seconds=0.5, generation_seconds=2.0)
+        with measure_call(ModelType.CHATGPT, "openai", estimated_prompt_tokens=10):
+            report_tokens(prompt_tokens=10, completion_tokens=1000)
+    summary = tally.summary()
+    assert summary["tokens_per_second"] == 50.0
+    assert summary["completion_tokens"] == 1100